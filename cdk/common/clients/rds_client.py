@@ -1,37 +1,95 @@
-import json
 import logging
 import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import partial
+from itertools import islice
 
-import boto3
-
+from common.clients.copy_stream import CopyInStream, CopyOutBuffer, copy_options, split_identifier, COPY_FORMAT_CSV, \
+    DEFAULT_COPY_BUFFER_SIZE
+from common.clients.pipeline import Pipeline, DEFAULT_PIPELINE_MAX_QUEUED
+from common.clients.prepared_statement_cache import PreparedStatementCache, DEFAULT_MAX_PREPARED_STATEMENTS
+from common.clients.replica_router import ReplicaEndpoint, ReplicaRouter, is_read_only, parse_replica_hosts, \
+    DEFAULT_REPLICA_MAX_LAG_SECONDS, DEFAULT_REPLICA_LAG_CHECK_INTERVAL_SECONDS
+from common.clients.secret_provider import SecretProvider, get_secret_provider
+from common.exceptions.statement_timeout_exception import StatementTimeoutException
 from common.utils.logger import get_logger
+from common.utils.query_metrics import QueryMetrics, query_metrics
 
 DEFAULT_MIN_DB_CONNECTIONS = 1
 DEFAULT_MAX_DB_CONNECTIONS = 10
+DEFAULT_DB_POOL_TIMEOUT_SECONDS = 5
+DEFAULT_DB_HEALTH_CHECK_INTERVAL_SECONDS = 30
+DEFAULT_BATCH_PAGE_SIZE = 100
+DEFAULT_STREAM_CHUNK_SIZE = 1000
+# Below the Lambda timeout, so a runaway query is cancelled while the invocation can still return its connection
+DEFAULT_DB_STATEMENT_TIMEOUT_MS = 25000
+QUERY_CANCELED_PG_CODE = '57014'
+RETURNING_CLAUSE = re.compile(r'\bRETURNING\b', re.IGNORECASE)
 
 logger = get_logger(__name__)
 
+
+def returns_rows(query):
+    """
+        SELECTs and writes with a RETURNING clause, whose execute() result is their rows.
+    """
+    return query.strip().upper().startswith('SELECT') or RETURNING_CLAUSE.search(query) is not None
+
+
+class Transaction:
+    """
+        Unit of work pinned to one pooled connection, see RdsClient.transaction().
+    """
+
+    def __init__(self, rds_client, conn):
+        self.rds_client = rds_client
+        self.conn = conn
+
+    def execute(self, query, params=None, prepare=False, timeout_ms=None):
+        return self.rds_client.execute(query, params, conn=self.conn, commit=False, prepare=prepare,
+                                       timeout_ms=timeout_ms)
+
+    def execute_values(self, query, params_list, template=None, page_size=DEFAULT_BATCH_PAGE_SIZE):
+        return self.rds_client.execute_values(query, params_list, template, page_size, conn=self.conn, commit=False)
+
+    def copy_in(self, table, columns, rows, copy_format=COPY_FORMAT_CSV, buffer_size=DEFAULT_COPY_BUFFER_SIZE,
+                timeout_ms=None):
+        return self.rds_client.copy_in(table, columns, rows, copy_format, buffer_size, conn=self.conn, commit=False,
+                                       timeout_ms=timeout_ms)
+
+
 class RdsClient:
 
-    def __init__(self):
+    def __init__(self, secret_provider: SecretProvider = None, metrics: QueryMetrics = None,
+                 statement_timeout_ms: int = None):
+        self.secret_provider = secret_provider if secret_provider else get_secret_provider()
+        self.metrics = metrics if metrics else query_metrics
+        self.statement_timeout_ms = int(statement_timeout_ms if statement_timeout_ms is not None
+                                        else os.environ.get('DB_STATEMENT_TIMEOUT_MS', DEFAULT_DB_STATEMENT_TIMEOUT_MS))
+        self.statement_timeout_count = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.prepared_statements = PreparedStatementCache(
+            int(os.environ.get('DB_MAX_PREPARED_STATEMENTS', DEFAULT_MAX_PREPARED_STATEMENTS)))
         try:
-            secret_string = self.pull_rds_secret_string()
-            secret_dict = json.loads(secret_string)
-            username = secret_dict.get("username")
-            password = secret_dict.get("password")
-            from psycopg2 import pool
-            self.connection_pool = pool.SimpleConnectionPool(
-                os.environ.get('MIN_DB_CONNECTIONS', DEFAULT_MIN_DB_CONNECTIONS),
-                os.environ.get('MAX_DB_CONNECTIONS', DEFAULT_MAX_DB_CONNECTIONS),
-                host=os.environ['DB_HOST'],
-                port=os.environ.get('DB_PORT', '5432'),
-                database=os.environ['DB_NAME'],
-                user=username,
-                password=password
+            from common.clients.connection_pool import ConnectionPool
+            self.connection_pool = ConnectionPool(
+                int(os.environ.get('MIN_DB_CONNECTIONS', DEFAULT_MIN_DB_CONNECTIONS)),
+                int(os.environ.get('MAX_DB_CONNECTIONS', DEFAULT_MAX_DB_CONNECTIONS)),
+                timeout=float(os.environ.get('DB_POOL_TIMEOUT_SECONDS', DEFAULT_DB_POOL_TIMEOUT_SECONDS)),
+                health_check_interval=float(
+                    os.environ.get('DB_HEALTH_CHECK_INTERVAL_SECONDS', DEFAULT_DB_HEALTH_CHECK_INTERVAL_SECONDS)),
+                connection_factory=self._connect
             )
         except Exception as e:
             logging.error(f"Failed to connect to DB: {e}")
             raise e
+        self.replica_router = self._create_replica_router()
+        self.metrics.register_client(type(self).__name__, self)
 
     def start_transaction(self):
         return self.connection_pool.getconn()
@@ -53,22 +111,90 @@ class RdsClient:
         finally:
             self.connection_pool.putconn(conn)
 
-    def execute(self, query, params=None, conn=None, commit=True):
-        is_conn_from_pool = False
+    @contextmanager
+    def transaction(self):
+        """
+            Pins one pooled connection for every statement run through this client in the block,
+            including plain execute() calls, and commits once on exit or rolls back on error.
+            Nested blocks join the outer transaction.
+        """
+        active_transaction = self.active_transaction()
+        if active_transaction is not None:
+            yield active_transaction
+            return
 
+        conn = self.connection_pool.getconn()
+        self._local.transaction = Transaction(self, conn)
         try:
-            if conn is None:
-                conn = self.connection_pool.getconn()
-                is_conn_from_pool = True
+            yield self._local.transaction
+            self.commit_transaction(conn)
+        except Exception as e:
+            logging.error(f"Transaction rolled back: {e}")
+            if not conn.closed:
+                conn.rollback()
+            raise e
+        finally:
+            self._local.transaction = None
+            self.connection_pool.putconn(conn)
+
+    def active_transaction(self):
+        return getattr(self._local, 'transaction', None)
+
+    @contextmanager
+    def pipeline(self, max_queued=DEFAULT_PIPELINE_MAX_QUEUED, raise_on_error=True, timeout_ms=None):
+        """
+            Runs the block in one transaction and queues every statement executed through this client
+            that returns no rows, sending them in as few round trips as possible. execute() returns a
+            PipelineResult for queued statements and ignores `prepare` for them. SELECTs and RETURNING
+            writes flush the queue and run directly, so they still return their rows. Queued statements
+            run under `timeout_ms` (default: the client's statement timeout) or the one passed to execute().
+            With `raise_on_error` the first failed statement is raised and the block rolled back.
+        """
+        active_pipeline = self.active_pipeline()
+        if active_pipeline is not None:
+            yield active_pipeline
+            return
+
+        with self.transaction() as transaction:
+            self._local.pipeline = Pipeline(transaction.conn, max_queued, raise_on_error,
+                                            self.statement_timeout_ms if timeout_ms is None else timeout_ms)
+            try:
+                yield self._local.pipeline
+                self._local.pipeline.flush()
+            finally:
+                self._local.pipeline = None
+
+    def active_pipeline(self):
+        return getattr(self._local, 'pipeline', None)
 
+    def execute(self, query, params=None, conn=None, commit=True, prepare=False, timeout_ms=None):
+        """
+            With `prepare`, the query is prepared once per pooled connection and run through EXECUTE,
+            so Postgres skips parsing and planning it on later calls. `timeout_ms` overrides the
+            client's statement timeout for this call, 0 disables it.
+        """
+        active_pipeline = self.active_pipeline() if conn is None else None
+        if active_pipeline is not None and not returns_rows(query):
+            return active_pipeline.execute(query, params, timeout_ms)
+
+        conn, commit, pool, pool_wait = self._acquire_connection(conn, commit, read_only=is_read_only(query))
+        timeout_ms = self.statement_timeout_ms if timeout_ms is None else timeout_ms
+        setup = self._statement_timeout_setup(timeout_ms)
+        started_at = time.perf_counter()
+        result = None
+        error = None
+
+        try:
             with conn.cursor() as cur:
                 logger.debug(f"Executing query: {query}")
-                if params:
-                    cur.execute(query, params)
+                if prepare:
+                    self.prepared_statements.execute(cur, query, params, setup=setup)
+                elif params:
+                    cur.execute(setup + query, params)
                 else:
-                    cur.execute(query)
+                    cur.execute(setup + query)
 
-                if query.strip().upper().startswith('SELECT'):
+                if returns_rows(query):
                     result = cur.fetchall()
                 else:
                     result = cur.rowcount
@@ -78,22 +204,261 @@ class RdsClient:
 
         except Exception as e:
             logging.error(f"Query execution failed: {e}")
-            self.rollback_transaction(conn)
-            raise e
+            error = self._translate_error(e, timeout_ms)
+            if pool is not None and not conn.closed:
+                conn.rollback()
+            raise error
 
         finally:
-            if is_conn_from_pool:
-                self.connection_pool.putconn(conn)
+            if pool is not None:
+                pool.putconn(conn)
+            self.metrics.record(query, time.perf_counter() - started_at, result, pool_wait, error)
 
         return result
 
-    def pull_rds_secret_string(self):
-        secret_name = os.environ.get("DB_SECRET_NAME")
-        client = boto3.client('secretsmanager')
+    def iterate(self, query, params=None, chunk_size=DEFAULT_STREAM_CHUNK_SIZE, timeout_ms=None):
+        """
+            Streams the rows of a SELECT through a server-side cursor, fetching `chunk_size` rows
+            per round trip. The connection goes back to the pool once the generator is exhausted or closed.
+        """
+        conn, _, pool, pool_wait = self._acquire_connection(None, False, read_only=is_read_only(query))
+        timeout_ms = self.statement_timeout_ms if timeout_ms is None else timeout_ms
+        started_at = time.perf_counter()
+        row_count = 0
+        error = None
+
         try:
-            response = client.get_secret_value(SecretId=secret_name)
+            self._apply_statement_timeout(conn, timeout_ms)
+            with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cur:
+                logger.debug(f"Streaming query: {query}")
+                cur.execute(query, params)
+                rows = cur.fetchmany(chunk_size)
+                while rows:
+                    row_count += len(rows)
+                    yield from rows
+                    rows = cur.fetchmany(chunk_size)
+
         except Exception as e:
-            print(f"Error retrieving secret: {e}")
-            raise e
-        secret_string = response['SecretString']
-        return secret_string
+            logging.error(f"Streaming query failed: {e}")
+            error = self._translate_error(e, timeout_ms)
+            raise error
+
+        finally:
+            if pool is not None:
+                pool.putconn(conn)
+            self.metrics.record(query, time.perf_counter() - started_at, row_count, pool_wait, error)
+
+    def execute_values(self, query, params_list, template=None, page_size=DEFAULT_BATCH_PAGE_SIZE, conn=None,
+                       commit=True, timeout_ms=None):
+        """
+            Inserts many rows with multi-row statements, `query` must contain a single `VALUES %s`
+            placeholder. Every page of `page_size` rows is one round trip. Returns the affected row count.
+        """
+        from psycopg2.extras import execute_values
+
+        conn, commit, pool, pool_wait = self._acquire_connection(conn, commit)
+        timeout_ms = self.statement_timeout_ms if timeout_ms is None else timeout_ms
+        started_at = time.perf_counter()
+        affected_rows = 0
+        error = None
+        params_iterator = iter(params_list)
+
+        try:
+            self._apply_statement_timeout(conn, timeout_ms)
+            with conn.cursor() as cur:
+                logger.debug(f"Executing batched query: {query}")
+                page = list(islice(params_iterator, page_size))
+                while page:
+                    execute_values(cur, query, page, template=template, page_size=len(page))
+                    affected_rows += cur.rowcount
+                    page = list(islice(params_iterator, page_size))
+
+            if commit:
+                self.commit_transaction(conn)
+
+        except Exception as e:
+            logging.error(f"Batched query execution failed: {e}")
+            error = self._translate_error(e, timeout_ms)
+            if pool is not None and not conn.closed:
+                conn.rollback()
+            raise error
+
+        finally:
+            if pool is not None:
+                pool.putconn(conn)
+            self.metrics.record(query, time.perf_counter() - started_at, affected_rows, pool_wait, error)
+
+        return affected_rows
+
+    def copy_in(self, table, columns, rows, copy_format=COPY_FORMAT_CSV, buffer_size=DEFAULT_COPY_BUFFER_SIZE,
+                conn=None, commit=True, timeout_ms=None):
+        """
+            Bulk loads `rows` into `table` (optionally schema qualified) through COPY ... FROM STDIN.
+            Rows are encoded lazily, so at most about `buffer_size` bytes are held in memory. With the
+            binary format `rows` are raw COPY BINARY chunks, e.g. written by copy_out. Returns the row count.
+            `timeout_ms` overrides the client's statement timeout for the copy, 0 disables it.
+        """
+        from psycopg2 import sql
+
+        statement = sql.SQL("COPY {} ({}) FROM STDIN WITH " + copy_options(copy_format)).format(
+            sql.Identifier(*split_identifier(table)),
+            sql.SQL(', ').join(sql.Identifier(column) for column in columns))
+        conn, commit, pool, pool_wait = self._acquire_connection(conn, commit)
+        query = statement.as_string(conn)
+        timeout_ms = self.statement_timeout_ms if timeout_ms is None else timeout_ms
+        started_at = time.perf_counter()
+        row_count = 0
+        error = None
+
+        try:
+            self._apply_statement_timeout(conn, timeout_ms)
+            with conn.cursor() as cur:
+                logger.debug(f"Copying into {table}")
+                cur.copy_expert(statement, CopyInStream(rows, copy_format, buffer_size), size=buffer_size)
+                row_count = cur.rowcount
+
+            if commit:
+                self.commit_transaction(conn)
+
+        except Exception as e:
+            logging.error(f"COPY into {table} failed: {e}")
+            error = self._translate_error(e, timeout_ms)
+            if pool is not None and not conn.closed:
+                conn.rollback()
+            raise error
+
+        finally:
+            if pool is not None:
+                pool.putconn(conn)
+            self.metrics.record(query, time.perf_counter() - started_at, row_count, pool_wait, error)
+
+        return row_count
+
+    def copy_out(self, query, sink, params=None, copy_format=COPY_FORMAT_CSV, header=False,
+                 buffer_size=DEFAULT_COPY_BUFFER_SIZE, timeout_ms=None):
+        """
+            Streams the result of a SELECT to `sink` through COPY ... TO STDOUT. `sink` is any object
+            with write(), it receives str for text files and bytes otherwise. Returns the row count.
+            `timeout_ms` overrides the client's statement timeout for the copy, 0 disables it.
+        """
+        conn, _, pool, pool_wait = self._acquire_connection(None, False, read_only=is_read_only(query))
+        timeout_ms = self.statement_timeout_ms if timeout_ms is None else timeout_ms
+        started_at = time.perf_counter()
+        row_count = 0
+        error = None
+
+        try:
+            self._apply_statement_timeout(conn, timeout_ms)
+            with conn.cursor() as cur:
+                bound_query = cur.mogrify(query, params).decode('utf-8') if params else query
+                logger.debug(f"Copying out: {query}")
+                writer = CopyOutBuffer(sink, buffer_size)
+                cur.copy_expert(f"COPY ({bound_query}) TO STDOUT WITH {copy_options(copy_format, header)}", writer,
+                                size=buffer_size)
+                writer.flush()
+                row_count = cur.rowcount
+
+        except Exception as e:
+            logging.error(f"COPY out failed: {e}")
+            error = self._translate_error(e, timeout_ms)
+            raise error
+
+        finally:
+            if pool is not None:
+                pool.putconn(conn)
+            self.metrics.record(query, time.perf_counter() - started_at, row_count, pool_wait, error)
+
+        return row_count
+
+    @staticmethod
+    def _statement_timeout_setup(timeout_ms):
+        # SET LOCAL only lasts until the end of the transaction, so a pooled connection never keeps it. Inside a
+        # transaction it outlives the statement, so it is sent every time, 0 included, to replace an earlier value
+        return f"SET LOCAL statement_timeout = {int(timeout_ms)}; "
+
+    def _apply_statement_timeout(self, conn, timeout_ms):
+        with conn.cursor() as cur:
+            cur.execute(self._statement_timeout_setup(timeout_ms))
+
+    def _translate_error(self, error, timeout_ms):
+        """
+            Postgres cancels a statement that runs past statement_timeout itself, which surfaces as
+            QueryCanceled. That is turned into StatementTimeoutException and counted.
+        """
+        if getattr(error, 'pgcode', None) != QUERY_CANCELED_PG_CODE:
+            return error
+        with self._lock:
+            self.statement_timeout_count += 1
+        timeout_error = StatementTimeoutException(f"Statement cancelled after {timeout_ms} ms")
+        timeout_error.__cause__ = error
+        return timeout_error
+
+    def _acquire_connection(self, conn, commit, read_only=False):
+        """
+            Returns (conn, commit, pool, pool_wait), `pool` is the pool the connection must go back to
+            or None when the caller does not own it. Reads outside a transaction go to a replica when one
+            is configured and fresh enough, everything else to the primary.
+        """
+        if conn is not None:
+            return conn, commit, None, 0.0
+        if self.active_pipeline() is not None:
+            self.active_pipeline().flush()
+        active_transaction = self.active_transaction()
+        if active_transaction is not None:
+            return active_transaction.conn, False, None, 0.0
+        started_at = time.perf_counter()
+        if read_only:
+            pool, conn = self.replica_router.acquire()
+            if conn is not None:
+                return conn, commit, pool, time.perf_counter() - started_at
+        conn = self.connection_pool.getconn()
+        return conn, commit, self.connection_pool, time.perf_counter() - started_at
+
+    def _create_replica_router(self):
+        from common.clients.connection_pool import ConnectionPool
+        replica_hosts = parse_replica_hosts(os.environ.get('DB_REPLICA_HOSTS'), os.environ.get('DB_PORT', '5432'))
+        endpoints = [
+            ReplicaEndpoint(f"{host}:{port}", ConnectionPool(
+                0,
+                int(os.environ.get('MAX_DB_CONNECTIONS', DEFAULT_MAX_DB_CONNECTIONS)),
+                timeout=float(os.environ.get('DB_POOL_TIMEOUT_SECONDS', DEFAULT_DB_POOL_TIMEOUT_SECONDS)),
+                health_check_interval=float(
+                    os.environ.get('DB_HEALTH_CHECK_INTERVAL_SECONDS', DEFAULT_DB_HEALTH_CHECK_INTERVAL_SECONDS)),
+                connection_factory=partial(self._connect, host, port)
+            ))
+            for host, port in replica_hosts
+        ]
+        return ReplicaRouter(
+            endpoints,
+            max_lag_seconds=float(os.environ.get('DB_REPLICA_MAX_LAG_SECONDS', DEFAULT_REPLICA_MAX_LAG_SECONDS)),
+            lag_check_interval=float(
+                os.environ.get('DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS', DEFAULT_REPLICA_LAG_CHECK_INTERVAL_SECONDS))
+        )
+
+    def pool_stats(self):
+        return self.connection_pool.stats()
+
+    def replica_stats(self):
+        return self.replica_router.stats()
+
+    def prepared_statement_stats(self):
+        return self.prepared_statements.stats()
+
+    def connect(self):
+        """
+            Opens a dedicated connection outside the pool, e.g. for LISTEN. The caller closes it.
+        """
+        return self._connect()
+
+    def pull_rds_secret_string(self):
+        return self.secret_provider.get_secret_string()
+
+    def _connect(self, host=None, port=None):
+        import psycopg2
+        return self.secret_provider.with_credentials(lambda credentials: psycopg2.connect(
+            host=host or os.environ['DB_HOST'],
+            port=port or os.environ.get('DB_PORT', '5432'),
+            database=os.environ['DB_NAME'],
+            user=credentials.get("username"),
+            password=credentials.get("password")
+        ))
@@ -0,0 +1,2 @@
+class PoolExhaustedException(Exception):
+    pass
@@ -3,9 +3,12 @@ from aws_cdk import (
     aws_lambda as _lambda,
     aws_lambda_python_alpha,
     aws_ec2 as ec2,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_s3 as s3,
     Stack,
     aws_rds as rds,
-    aws_secretsmanager as secretsmanager, Duration)
+    aws_secretsmanager as secretsmanager, Duration, RemovalPolicy)
 from constructs import Construct
 
 from lib.vpc_stack import RdsVpcStack
@@ -15,6 +18,8 @@ class RdsStack(Stack):
     def __init__(self, scope: Construct, vpc: RdsVpcStack, id: str, **kwargs) -> None:
         super().__init__(scope, id, **kwargs)
         self.db_name = "stock_mate_main_db"
+        # Months of events kept in the database, older partitions are archived to the bucket and dropped
+        self.events_retention_months = "24"
         self.db_secret = secretsmanager.Secret(
             self, "DBSecret",
             generate_secret_string=secretsmanager.SecretStringGenerator(
@@ -141,6 +146,42 @@ class RdsStack(Stack):
             timeout=Duration.minutes(5),
         )
 
+        events_archive_bucket = s3.Bucket(
+            self, "EventsArchiveBucket",
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            enforce_ssl=True,
+            removal_policy=RemovalPolicy.RETAIN,
+        )
+
+        events_partition_maintenance_lambda = aws_lambda_python_alpha.PythonFunction(
+            self, "EventsPartitionMaintenance",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            entry="../db_initializer",
+            index="app.py",
+            handler="maintenance_handler",
+            vpc=vpc.custom_vpc,
+            role=db_initializer_lambda_role,
+            environment={
+                "DB_HOST": self.db_instance.db_instance_endpoint_address,
+                "DB_PORT": self.db_instance.db_instance_endpoint_port,
+                "DB_SECRET_NAME": self.db_secret.secret_name,
+                "DB_NAME": self.db_name,
+                "EVENTS_ARCHIVE_BUCKET": events_archive_bucket.bucket_name,
+                "EVENTS_RETENTION_MONTHS": self.events_retention_months,
+            },
+            security_groups=[vpc.lambda_security_group],
+
+            timeout=Duration.minutes(5),
+        )
+        events_archive_bucket.grant_write(events_partition_maintenance_lambda)
+
+        events.Rule(
+            self, "EventsPartitionMaintenanceSchedule",
+            schedule=events.Schedule.rate(Duration.days(1)),
+            targets=[targets.LambdaFunction(events_partition_maintenance_lambda)],
+        )
+
         # rds_instance_check_resource = cfn.CustomResource(
         #     self, 'RdsInitResource',
         #     provider=cfn.CustomResourceProvider.from_lambda(db_initializer_lambda),
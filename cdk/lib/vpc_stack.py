@@ -64,3 +64,9 @@ class RdsVpcStack(Stack):
             private_dns_enabled=True,
             security_groups=[self.lambda_security_group],
         )
+
+        # The isolated subnets reach S3 only through this, e.g. for the events archive of RdsStack
+        self.custom_vpc.add_gateway_endpoint(
+            'S3Endpoint',
+            service=ec2.GatewayVpcEndpointAwsService.S3,
+        )
@@ -1,17 +1,48 @@
-import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import List, Tuple
 
 import boto3
 
 from common.api_responses import FAILED_TO_PUBLISH_TO_SNS_RESPONSE
 from common.utils.logger import get_logger
 
+# PublishBatch limits: 10 entries and 256 KiB of payload per call
+MAX_SNS_BATCH_ENTRIES = 10
+MAX_SNS_BATCH_BYTES = 256 * 1024
+DEFAULT_SNS_BATCH_MAX_AGE_SECONDS = 1.0
+DEFAULT_SNS_PUBLISH_WORKERS = 4
+
 logger = get_logger(__name__)
 
 
+@dataclass
+class PublishFailure:
+    topic_arn: str
+    message: str
+    code: str
+    error_message: str
+    sender_fault: bool = False
+    entry_id: str = None
+
+
 class SnsClient:
+    # Shared by all instances, so warm Lambda invocations reuse the publisher threads
+    _executor = None
+    _executor_lock = threading.Lock()
 
-    def __init__(self, sns_client=None):
+    def __init__(self, sns_client=None, max_batch_age_seconds=None):
         self.sns_client = sns_client if sns_client else boto3.client('sns')
+        self.max_batch_age_seconds = float(max_batch_age_seconds if max_batch_age_seconds is not None
+                                           else os.environ.get('SNS_BATCH_MAX_AGE_SECONDS',
+                                                               DEFAULT_SNS_BATCH_MAX_AGE_SECONDS))
+        self._buffer = {}
+        self._buffered_since = None
+        self._pending = []
+        self._lock = threading.Lock()
 
     def send_sns_message(self, topic_arn, message:str):
         try:
@@ -22,3 +53,123 @@ class SnsClient:
         except Exception as e:
             logger.error(f"Error publishing to SNS: {e}")
             return FAILED_TO_PUBLISH_TO_SNS_RESPONSE
+
+    def publish_async(self, topic_arn, message: str) -> Future:
+        """
+            Publishes on a background thread and returns the future of the MessageId. Every publish
+            started here must be awaited with drain() or flush() before the Lambda invocation returns.
+        """
+        future = self._get_executor().submit(self._publish_message, topic_arn, message)
+        with self._lock:
+            self._pending.append((topic_arn, message, future))
+        return future
+
+    def drain(self, timeout=None) -> List[PublishFailure]:
+        """
+            Waits for the background publishes, returns the failed ones and those still running after `timeout`.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        wait([future for _, _, future in pending], timeout=timeout)
+
+        failures = []
+        for topic_arn, message, future in pending:
+            if not future.done():
+                failures.append(
+                    PublishFailure(topic_arn, message, 'Timeout', f"Publish not finished after {timeout}s"))
+            elif future.exception() is not None:
+                error = future.exception()
+                failures.append(PublishFailure(topic_arn, message, type(error).__name__, str(error)))
+        self._log_failures(failures)
+        return failures
+
+    def queue_sns_message(self, topic_arn, message: str) -> List[PublishFailure]:
+        """
+            Buffers the message per topic and sends it with PublishBatch once the topic holds a full
+            batch or the oldest buffered message is older than `max_batch_age_seconds`. Returns the
+            failures of any batch sent by this call; whatever is still buffered goes out on flush().
+        """
+        with self._lock:
+            messages = self._buffer.setdefault(topic_arn, [])
+            messages.append(message)
+            if self._buffered_since is None:
+                self._buffered_since = time.monotonic()
+            if time.monotonic() - self._buffered_since >= self.max_batch_age_seconds:
+                batches, self._buffer, self._buffered_since = self._buffer, {}, None
+            elif len(messages) >= MAX_SNS_BATCH_ENTRIES:
+                batches = {topic_arn: self._buffer.pop(topic_arn)}
+                if not self._buffer:
+                    self._buffered_since = None
+            else:
+                return []
+        return self._publish(batches)
+
+    def flush(self) -> List[PublishFailure]:
+        """
+            Sends every buffered message and waits for the background publishes, must run before the
+            Lambda invocation returns.
+        """
+        with self._lock:
+            batches, self._buffer, self._buffered_since = self._buffer, {}, None
+        return self._publish(batches) + self.drain()
+
+    def publish_entries(self, topic_arn, entries: List[Tuple[str, str]]) -> List[PublishFailure]:
+        """
+            Publishes (entry_id, message) pairs with as few PublishBatch calls as possible and returns the
+            failures, identified by entry_id. Ids must be unique, alphanumeric, "-" or "_", at most 80 characters.
+        """
+        failures = []
+        for batch in self._split(entries):
+            failures += self._publish_batch(topic_arn, batch)
+        self._log_failures(failures)
+        return failures
+
+    def _publish(self, batches) -> List[PublishFailure]:
+        failures = []
+        for topic_arn, messages in batches.items():
+            failures += self.publish_entries(topic_arn, list(enumerate(messages)))
+        return failures
+
+    @staticmethod
+    def _log_failures(failures):
+        for failure in failures:
+            logger.error(f"Error publishing to SNS topic {failure.topic_arn}: {failure.code} {failure.error_message}")
+
+    def _publish_message(self, topic_arn, message):
+        return self.sns_client.publish(TopicArn=topic_arn, Message=message)['MessageId']
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=int(os.environ.get('SNS_PUBLISH_WORKERS', DEFAULT_SNS_PUBLISH_WORKERS)),
+                    thread_name_prefix='sns-publisher')
+            return cls._executor
+
+    @staticmethod
+    def _split(entries):
+        batch, batch_bytes = [], 0
+        for entry_id, message in entries:
+            message_bytes = len(message.encode('utf-8'))
+            if batch and (len(batch) == MAX_SNS_BATCH_ENTRIES or batch_bytes + message_bytes > MAX_SNS_BATCH_BYTES):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append((str(entry_id), message))
+            batch_bytes += message_bytes
+        if batch:
+            yield batch
+
+    def _publish_batch(self, topic_arn, entries) -> List[PublishFailure]:
+        try:
+            response = self.sns_client.publish_batch(
+                TopicArn=topic_arn,
+                PublishBatchRequestEntries=[{'Id': entry_id, 'Message': message} for entry_id, message in entries]
+            )
+        except Exception as e:
+            return [PublishFailure(topic_arn, message, type(e).__name__, str(e), entry_id=entry_id)
+                    for entry_id, message in entries]
+        messages = dict(entries)
+        return [PublishFailure(topic_arn, messages[failed['Id']], failed.get('Code', ''),
+                               failed.get('Message', ''), failed.get('SenderFault', False), entry_id=failed['Id'])
+                for failed in response.get('Failed', [])]
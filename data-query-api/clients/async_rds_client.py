@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import os
+
+from clients.rds_client import DEFAULT_MIN_DB_CONNECTIONS, DEFAULT_MAX_DB_CONNECTIONS, \
+    DEFAULT_DB_STATEMENT_TIMEOUT_MS, QUERY_CANCELED_PG_CODE
+from exceptions.query_not_allowed_exception import QueryNotAllowedException
+from exceptions.statement_timeout_exception import StatementTimeoutException
+
+
+class AsyncRdsClient:
+    """
+        asyncio counterpart of RdsClient on psycopg 3 and its AsyncConnectionPool, for independent SELECTs
+        of one request that can run at the same time. The pool is bound to the event loop it was opened on,
+        so the client keeps its own loop across warm invocations and select_concurrently() drives it
+        from the synchronous handler.
+    """
+
+    def __init__(self, statement_timeout_ms=None):
+        self.statement_timeout_ms = int(statement_timeout_ms if statement_timeout_ms is not None
+                                        else os.environ.get('DB_STATEMENT_TIMEOUT_MS', DEFAULT_DB_STATEMENT_TIMEOUT_MS))
+        self.connection_pool = None
+        self.loop = asyncio.new_event_loop()
+
+    def select_concurrently(self, statements, timeout_ms=None):
+        """
+            Runs every (query, params) of `statements` on its own pooled connection concurrently and
+            returns their rows in the same order. Waits for all of them before raising the first error.
+        """
+        for query, _ in statements:
+            self._check_select(query)
+        results = self.loop.run_until_complete(self._gather(statements, timeout_ms))
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+
+    async def _gather(self, statements, timeout_ms):
+        await self.open()
+        return await asyncio.gather(*(self.execute_select(query, params, timeout_ms) for query, params in statements),
+                                    return_exceptions=True)
+
+    async def open(self):
+        if self.connection_pool is not None:
+            return self
+        try:
+            from psycopg_pool import AsyncConnectionPool
+            self.connection_pool = AsyncConnectionPool(
+                kwargs={
+                    'host': os.environ['DB_HOST'],
+                    'dbname': os.environ['DB_NAME'],
+                    'user': os.environ['DB_USER'],
+                    'password': os.environ['DB_PASSWORD'],
+                },
+                min_size=int(os.environ.get('MIN_DB_CONNECTIONS', DEFAULT_MIN_DB_CONNECTIONS)),
+                max_size=int(os.environ.get('MAX_DB_CONNECTIONS', DEFAULT_MAX_DB_CONNECTIONS)),
+                check=AsyncConnectionPool.check_connection,
+                open=False
+            )
+            await self.connection_pool.open(wait=True)
+        except Exception as e:
+            logging.error(f"Failed to connect to DB: {e}")
+            self.connection_pool = None
+            raise e
+        return self
+
+    async def close(self):
+        if self.connection_pool is not None:
+            await self.connection_pool.close()
+            self.connection_pool = None
+
+    async def execute_select(self, query, params=None, timeout_ms=None):
+        """
+            `timeout_ms` overrides the client's statement timeout for this call, 0 disables it.
+            The pool ends the read's transaction when the connection is returned.
+        """
+        self._check_select(query)
+        timeout_ms = self.statement_timeout_ms if timeout_ms is None else timeout_ms
+        try:
+            async with self.connection_pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+                    await cur.execute(query, params)
+                    return await cur.fetchall()
+        except Exception as e:
+            logging.error(f"Query execution failed: {e}")
+            if getattr(e, 'sqlstate', None) == QUERY_CANCELED_PG_CODE:
+                raise StatementTimeoutException(f"Statement cancelled after {timeout_ms} ms") from e
+            raise e
+
+    @staticmethod
+    def _check_select(query):
+        if not query.strip().upper().startswith('SELECT'):
+            raise QueryNotAllowedException("Only SELECT queries are allowed.")
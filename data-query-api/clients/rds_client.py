@@ -1,18 +1,31 @@
 import logging
 import os
+import threading
+import uuid
 
 import psycopg2
 from psycopg2 import pool
 
+from clients.replica_router import ReplicaEndpoint, ReplicaRouter, is_read_only, parse_replica_hosts, \
+    DEFAULT_REPLICA_MAX_LAG_SECONDS, DEFAULT_REPLICA_LAG_CHECK_INTERVAL_SECONDS
 from exceptions.query_not_allowed_exception import QueryNotAllowedException
+from exceptions.statement_timeout_exception import StatementTimeoutException
 
 DEFAULT_MIN_DB_CONNECTIONS = 1
 DEFAULT_MAX_DB_CONNECTIONS = 10
+DEFAULT_STREAM_CHUNK_SIZE = 1000
+# Below the Lambda timeout, so a runaway query is cancelled while the invocation can still return its connection
+DEFAULT_DB_STATEMENT_TIMEOUT_MS = 25000
+QUERY_CANCELED_PG_CODE = '57014'
 
 
 class RdsClient:
 
-    def __init__(self):
+    def __init__(self, statement_timeout_ms=None):
+        self.statement_timeout_ms = int(statement_timeout_ms if statement_timeout_ms is not None
+                                        else os.environ.get('DB_STATEMENT_TIMEOUT_MS', DEFAULT_DB_STATEMENT_TIMEOUT_MS))
+        self.statement_timeout_count = 0
+        self._lock = threading.Lock()
         try:
             self.connection_pool = psycopg2.pool.SimpleConnectionPool(
                 os.environ.get('MIN_DB_CONNECTIONS', DEFAULT_MIN_DB_CONNECTIONS),
@@ -25,26 +38,133 @@ class RdsClient:
         except Exception as e:
             logging.error(f"Failed to connect to DB: {e}")
             raise e
+        self.replica_router = self._create_replica_router()
 
-    def execute_select(self, query, params=None):
+    def execute_select(self, query, params=None, timeout_ms=None):
+        """
+            `timeout_ms` overrides the client's statement timeout for this call, 0 disables it.
+            A statement cancelled by the timeout raises StatementTimeoutException, other errors are re-raised.
+        """
         conn = None
         result = None
 
         if not query.strip().upper().startswith('SELECT'):
             raise QueryNotAllowedException("Only SELECT queries are allowed.")
 
+        connection_pool = None
         try:
-            conn = self.connection_pool.getconn()
+            connection_pool, conn = self._getconn(query)
+            setup = self._statement_timeout_setup(timeout_ms)
             with conn.cursor() as cur:
                 if params:
-                    cur.execute(query, params)
+                    cur.execute(setup + query, params)
                 else:
-                    cur.execute(query)
+                    cur.execute(setup + query)
                 result = cur.fetchall()
         except Exception as e:
             logging.error(f"Query execution failed: {e}")
+            if self._is_statement_timeout(e):
+                raise self._statement_timeout_error(e, timeout_ms)
+            raise e
         finally:
             if conn:
-                self.connection_pool.putconn(conn)
+                self._rollback(conn)
+                connection_pool.putconn(conn)
 
         return result
+
+    def iterate_select(self, query, params=None, chunk_size=DEFAULT_STREAM_CHUNK_SIZE, timeout_ms=None):
+        """
+            Streams the rows of a SELECT through a server-side cursor, fetching `chunk_size` rows
+            per round trip. The connection goes back to the pool once the generator is exhausted or closed.
+        """
+        if not query.strip().upper().startswith('SELECT'):
+            raise QueryNotAllowedException("Only SELECT queries are allowed.")
+        return self._iterate(query, params, chunk_size, timeout_ms)
+
+    def _iterate(self, query, params, chunk_size, timeout_ms):
+        conn = None
+        connection_pool = None
+        try:
+            connection_pool, conn = self._getconn(query)
+            with conn.cursor() as cur:
+                cur.execute(self._statement_timeout_setup(timeout_ms))
+            with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cur:
+                cur.execute(query, params)
+                rows = cur.fetchmany(chunk_size)
+                while rows:
+                    yield from rows
+                    rows = cur.fetchmany(chunk_size)
+        except Exception as e:
+            logging.error(f"Query execution failed: {e}")
+            if self._is_statement_timeout(e):
+                raise self._statement_timeout_error(e, timeout_ms)
+            raise e
+        finally:
+            if conn:
+                self._rollback(conn)
+                connection_pool.putconn(conn)
+
+    def _statement_timeout_setup(self, timeout_ms):
+        # SET LOCAL only lasts until the end of the transaction, so a pooled connection never keeps it
+        timeout_ms = self.statement_timeout_ms if timeout_ms is None else timeout_ms
+        # Always sent, so 0 switches off a timeout set for the role or database
+        return f"SET LOCAL statement_timeout = {int(timeout_ms)}; "
+
+    @staticmethod
+    def _is_statement_timeout(error):
+        return getattr(error, 'pgcode', None) == QUERY_CANCELED_PG_CODE
+
+    def _statement_timeout_error(self, error, timeout_ms):
+        with self._lock:
+            self.statement_timeout_count += 1
+        timeout_ms = self.statement_timeout_ms if timeout_ms is None else timeout_ms
+        timeout_error = StatementTimeoutException(f"Statement cancelled after {timeout_ms} ms")
+        timeout_error.__cause__ = error
+        return timeout_error
+
+    @staticmethod
+    def _rollback(conn):
+        # Ends the read's transaction before the connection goes back to the pool, so neither an idle open
+        # transaction nor the aborted state of a failed statement is handed to the next borrower
+        try:
+            if conn and not conn.closed:
+                conn.rollback()
+        except Exception as e:
+            logging.error(f"Rollback failed: {e}")
+
+    def replica_stats(self):
+        return self.replica_router.stats()
+
+    def _getconn(self, query):
+        """
+            Borrows a replica connection for read-only statements when a replica is fresh enough,
+            otherwise a primary one. Returns (pool, connection).
+        """
+        if is_read_only(query):
+            replica_pool, conn = self.replica_router.acquire()
+            if conn is not None:
+                return replica_pool, conn
+        return self.connection_pool, self.connection_pool.getconn()
+
+    @staticmethod
+    def _create_replica_router():
+        replica_hosts = parse_replica_hosts(os.environ.get('DB_REPLICA_HOSTS'), os.environ.get('DB_PORT', '5432'))
+        endpoints = [
+            ReplicaEndpoint(f"{host}:{port}", psycopg2.pool.SimpleConnectionPool(
+                0,
+                os.environ.get('MAX_DB_CONNECTIONS', DEFAULT_MAX_DB_CONNECTIONS),
+                host=host,
+                port=port,
+                database=os.environ['DB_NAME'],
+                user=os.environ['DB_USER'],
+                password=os.environ['DB_PASSWORD']
+            ))
+            for host, port in replica_hosts
+        ]
+        return ReplicaRouter(
+            endpoints,
+            max_lag_seconds=float(os.environ.get('DB_REPLICA_MAX_LAG_SECONDS', DEFAULT_REPLICA_MAX_LAG_SECONDS)),
+            lag_check_interval=float(
+                os.environ.get('DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS', DEFAULT_REPLICA_LAG_CHECK_INTERVAL_SECONDS))
+        )
@@ -0,0 +1,129 @@
+import itertools
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+DEFAULT_REPLICA_MAX_LAG_SECONDS = 5.0
+DEFAULT_REPLICA_LAG_CHECK_INTERVAL_SECONDS = 10.0
+
+# A caught-up standby replays nothing while the primary is idle, so the replay timestamp alone
+# overstates its lag. Treat "received == replayed" as no lag.
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_LOCKING_READ = re.compile(r"\bFOR\s+(UPDATE|SHARE|NO\s+KEY\s+UPDATE|KEY\s+SHARE)\b", re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+
+def is_read_only(query: str) -> bool:
+    """
+        True for statements a replica can answer: plain SELECTs without a locking clause.
+    """
+    return query.strip().upper().startswith('SELECT') and not _LOCKING_READ.search(query)
+
+
+def parse_replica_hosts(value: Optional[str], default_port: str) -> List[Tuple[str, str]]:
+    """
+        Parses "host[:port],host[:port]" into (host, port) pairs.
+    """
+    endpoints = []
+    for entry in (value or '').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.partition(':')
+        endpoints.append((host, port or default_port))
+    return endpoints
+
+
+@dataclass
+class ReplicaEndpoint:
+    name: str
+    pool: Any
+    lag_seconds: float = 0.0
+    healthy: bool = True
+    checked_at: Optional[float] = None
+
+
+class ReplicaRouter:
+    """
+        Round-robins read-only statements over replica pools. A replica is skipped while its replay lag
+        exceeds `max_lag_seconds` or it cannot be reached; lag is re-checked at most every
+        `lag_check_interval` seconds. acquire() returns (None, None) when no replica qualifies, callers
+        then fall back to the primary.
+    """
+
+    def __init__(self, endpoints: List[ReplicaEndpoint], max_lag_seconds=DEFAULT_REPLICA_MAX_LAG_SECONDS,
+                 lag_check_interval=DEFAULT_REPLICA_LAG_CHECK_INTERVAL_SECONDS):
+        self.endpoints = endpoints
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_interval = lag_check_interval
+        self._next_index = itertools.count()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+            Returns (pool, connection) of the next usable replica, the connection must be handed back
+            with pool.putconn().
+        """
+        if not self.endpoints:
+            return None, None
+        with self._lock:
+            start = next(self._next_index)
+
+        for offset in range(len(self.endpoints)):
+            endpoint = self.endpoints[(start + offset) % len(self.endpoints)]
+            if not self._is_usable(endpoint):
+                continue
+            try:
+                return endpoint.pool, endpoint.pool.getconn()
+            except Exception as e:
+                logger.warning(f"Replica {endpoint.name} unavailable, skipping it: {e}")
+                self._mark(endpoint, healthy=False)
+        return None, None
+
+    def stats(self):
+        return [{'name': endpoint.name, 'lag_seconds': endpoint.lag_seconds, 'healthy': endpoint.healthy}
+                for endpoint in self.endpoints]
+
+    def closeall(self):
+        for endpoint in self.endpoints:
+            endpoint.pool.closeall()
+
+    def _is_usable(self, endpoint: ReplicaEndpoint) -> bool:
+        if endpoint.checked_at is None or time.monotonic() - endpoint.checked_at >= self.lag_check_interval:
+            self._check_lag(endpoint)
+        return endpoint.healthy and endpoint.lag_seconds <= self.max_lag_seconds
+
+    def _check_lag(self, endpoint: ReplicaEndpoint):
+        conn = None
+        try:
+            conn = endpoint.pool.getconn()
+            with conn.cursor() as cur:
+                cur.execute(REPLICA_LAG_QUERY)
+                lag_seconds = float(cur.fetchone()[0])
+            conn.rollback()
+            self._mark(endpoint, healthy=True, lag_seconds=lag_seconds)
+            if lag_seconds > self.max_lag_seconds:
+                logger.warning(f"Replica {endpoint.name} lags {lag_seconds:.1f}s behind, routing reads elsewhere")
+        except Exception as e:
+            logger.warning(f"Replica {endpoint.name} lag check failed: {e}")
+            self._mark(endpoint, healthy=False)
+        finally:
+            if conn is not None:
+                endpoint.pool.putconn(conn)
+
+    @staticmethod
+    def _mark(endpoint: ReplicaEndpoint, healthy: bool, lag_seconds: float = None):
+        endpoint.healthy = healthy
+        if lag_seconds is not None:
+            endpoint.lag_seconds = lag_seconds
+        endpoint.checked_at = time.monotonic()
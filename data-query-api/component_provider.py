@@ -1,3 +1,4 @@
+from clients.async_rds_client import AsyncRdsClient
 from clients.rds_client import RdsClient
 from request_router import RequestRouter
 from services.db_service import DbService
@@ -6,6 +7,7 @@ from services.db_service import DbService
 class ComponentProvider:
     def __init__(self):
         self._db_client = None
+        self._async_db_client = None
         self._db_service = None
         self._request_router = None
 
@@ -14,9 +16,14 @@ class ComponentProvider:
             self._db_client = RdsClient()
         return self._db_client
 
+    def get_async_db_client(self):
+        if self._async_db_client is None:
+            self._async_db_client = AsyncRdsClient()
+        return self._async_db_client
+
     def get_db_service(self):
         if self._db_service is None:
-            self._db_service = DbService(self.get_db_client())
+            self._db_service = DbService(self.get_db_client(), self.get_async_db_client())
         return self._db_service
 
     def get_request_router(self):
@@ -27,6 +34,9 @@ class ComponentProvider:
     def set_db_client(self, db_client):
         self._db_client = db_client
 
+    def set_async_db_client(self, async_db_client):
+        self._async_db_client = async_db_client
+
     def set_db_service(self, db_service):
         self._db_service = db_service
 
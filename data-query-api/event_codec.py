@@ -0,0 +1,64 @@
+import os
+import zlib
+from typing import Any, Optional, Tuple
+
+import json_codec
+
+EVENT_MESSAGE_FORMAT_JSON = 'json'
+EVENT_MESSAGE_FORMAT_COMPACT = 'compact'
+EVENT_MESSAGE_FORMATS = (EVENT_MESSAGE_FORMAT_JSON, EVENT_MESSAGE_FORMAT_COMPACT)
+
+# First byte of events.message_data, tells the decoder how the rest was written
+ZLIB_V1_FORMAT_TAG = 1
+
+# Preset dictionary for ZLIB_V1_FORMAT_TAG. Event messages are short, so most of the saving comes from not
+# spelling out the envelope, event type and field names in every row. Rows written with it can only be
+# decoded with exactly these bytes: never edit it, add a new tag and dictionary instead.
+_ZLIB_V1_DICTIONARY = ''.join((
+    '"comments":"', '"updated_by":"', '"created_by":"', '"received_at":"', '"purchase_order_position_id":"op_',
+    '"quantity_received":', '"quantity_ordered":', '"delivery_date":"', '"price":', '"product_id":"prod_',
+    '"order_positions":[{', '"customer_id":"cus_', '"supplier_id":"sup_', '"created_at":"',
+    '"max_stock":', '"safety_stock":', '"description":"', '"name":"', '"id":"inv_', '"id":"so_', '"id":"po_',
+    '"claim_check":{"key":"', '"encoding":"zlib","size":',
+    'NewDispatchRequested', 'NewDeliveryScheduled', 'NewDeliveryPersisted',
+    'NewSalesOrderScheduled', 'NewSalesOrderPersisted', 'NewPurchaseOrderScheduled', 'NewPurchaseOrderPersisted',
+    'NewCustomerScheduled', 'NewCustomerPersisted', 'NewSupplierScheduled', 'NewSupplierPersisted',
+    'NewProductScheduled', 'NewProductPersisted', '"id":"op_', '"id":"prod_',
+    '{"event_type":"', '","payload":{',
+)).encode('utf-8')
+
+
+def get_event_message_format() -> str:
+    message_format = os.environ.get('EVENT_MESSAGE_FORMAT', EVENT_MESSAGE_FORMAT_JSON)
+    if message_format not in EVENT_MESSAGE_FORMATS:
+        raise ValueError(f"Unsupported event message format: {message_format}")
+    return message_format
+
+
+def encode_event_message(message_json: str, message_format=EVENT_MESSAGE_FORMAT_JSON) \
+        -> Tuple[Optional[str], Optional[bytes]]:
+    """
+        Returns the (message, message_data) column values. JSON rows keep the text in `message`, compact
+        rows leave it NULL and store the tagged, dictionary compressed JSON in `message_data`.
+    """
+    if message_format == EVENT_MESSAGE_FORMAT_JSON:
+        return message_json, None
+    if message_format != EVENT_MESSAGE_FORMAT_COMPACT:
+        raise ValueError(f"Unsupported event message format: {message_format}")
+    compressor = zlib.compressobj(level=9, zdict=_ZLIB_V1_DICTIONARY)
+    data = compressor.compress(message_json.encode('utf-8')) + compressor.flush()
+    return None, bytes([ZLIB_V1_FORMAT_TAG]) + data
+
+
+def decode_event_message(message: Any, message_data: Optional[bytes] = None) -> Optional[str]:
+    """
+        Returns the JSON text of an events row, whichever format it was written in. `message` is the
+        JSONB column as the driver returns it, already parsed, or its text.
+    """
+    if message_data is None:
+        return message if message is None or isinstance(message, str) else json_codec.dumps(message)
+    message_data = bytes(message_data)
+    if message_data[0] == ZLIB_V1_FORMAT_TAG:
+        decompressor = zlib.decompressobj(zdict=_ZLIB_V1_DICTIONARY)
+        return (decompressor.decompress(message_data[1:]) + decompressor.flush()).decode('utf-8')
+    raise ValueError(f"Unknown event message format tag: {message_data[0]}")
@@ -0,0 +1,115 @@
+import base64
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import json_codec
+
+DEFAULT_EVENT_PAGE_SIZE = 500
+MAX_EVENT_PAGE_SIZE = 5000
+
+EVENT_COLUMNS = ("event_id", "event_type", "emitter", "message", "message_data", "created_at", "status",
+                 "published_at")
+
+# Pages follow (created_at, event_id), each filter has a matching (..., created_at, event_id) index on events
+SELECT_EVENTS_PAGE_QUERY = (
+    "SELECT " + ", ".join(EVENT_COLUMNS) + " FROM stock_management.events WHERE TRUE {filters}"
+    "ORDER BY created_at, event_id LIMIT %s"
+)
+# Served by the GIN index on message -> 'payload', rows stored compact or behind a claim check never match
+PAYLOAD_FILTER = "AND message -> 'payload' @> %s::jsonb "
+# The plain created_at bound lets Postgres skip the monthly partitions before the cursor
+AFTER_CURSOR_FILTER = "AND created_at >= %s AND (created_at, event_id) > (%s, %s) "
+
+
+@dataclass
+class EventPage:
+    events: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+
+
+def event_from_row(row: Sequence[Any], load_message: Callable[[Optional[str], Optional[bytes]], Any]) \
+        -> Dict[str, Any]:
+    """
+        The row as a dict, its message and message_data columns replaced by `load_message`(message, message_data).
+    """
+    event = dict(zip(EVENT_COLUMNS, row))
+    event["message"] = load_message(event["message"], event.pop("message_data"))
+    return event
+
+
+def encode_cursor(created_at: datetime, event_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{event_id}".encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        created_at, event_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at), event_id
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid events cursor: {cursor}") from e
+
+
+@dataclass(frozen=True)
+class EventQuery:
+    """
+        Filters for a page of stock_management.events, `created_from` is inclusive and `created_to`
+        exclusive. `payload` matches events whose payload contains it, e.g. {"product_id": "prod_1"} or
+        {"order_positions": [{"product_id": "prod_1"}]}. `after` is the cursor of the previous page.
+    """
+    event_type: Optional[str] = None
+    emitter: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    after: Optional[str] = None
+    limit: int = DEFAULT_EVENT_PAGE_SIZE
+    payload: Optional[Dict[str, Any]] = None
+
+    def __post_init__(self):
+        if not 0 < self.limit <= MAX_EVENT_PAGE_SIZE:
+            raise ValueError(f"Events page size must be between 1 and {MAX_EVENT_PAGE_SIZE}")
+        if self.payload is not None and not isinstance(self.payload, dict):
+            raise ValueError("Events payload filter must be a JSON object")
+
+    @staticmethod
+    def from_params(params: Optional[Dict[str, str]]) -> 'EventQuery':
+        """
+            Reads the query string parameters event_type, emitter, from, to, after, limit and payload,
+            the latter a JSON object.
+        """
+        params = params or {}
+        return EventQuery(
+            event_type=params.get('event_type'),
+            emitter=params.get('emitter'),
+            created_from=datetime.fromisoformat(params['from']) if params.get('from') else None,
+            created_to=datetime.fromisoformat(params['to']) if params.get('to') else None,
+            after=params.get('after'),
+            limit=int(params.get('limit', DEFAULT_EVENT_PAGE_SIZE)),
+            payload=json_codec.loads(params['payload']) if params.get('payload') else None,
+        )
+
+    def to_sql(self) -> Tuple[str, List[Any]]:
+        filters, params = "", []
+        for condition, value in (("AND event_type = %s ", self.event_type), ("AND emitter = %s ", self.emitter),
+                                 ("AND created_at >= %s ", self.created_from),
+                                 ("AND created_at < %s ", self.created_to)):
+            if value is not None:
+                filters += condition
+                params.append(value)
+        if self.payload:
+            filters += PAYLOAD_FILTER
+            params.append(json_codec.dumps(self.payload))
+        if self.after:
+            created_at, event_id = decode_cursor(self.after)
+            filters += AFTER_CURSOR_FILTER
+            params += [created_at, created_at, event_id]
+        return SELECT_EVENTS_PAGE_QUERY.format(filters=filters), params + [self.limit]
+
+    def next_cursor(self, rows: Sequence[Sequence[Any]]) -> Optional[str]:
+        """
+            Cursor of the page after `rows`, None once a page comes back short.
+        """
+        if len(rows) < self.limit:
+            return None
+        last = dict(zip(EVENT_COLUMNS, rows[-1]))
+        return encode_cursor(last["created_at"], last["event_id"])
@@ -1,6 +1,6 @@
-import json
 import logging
 
+import json_codec
 from component_provider import ComponentProvider
 
 logging.basicConfig(level=logging.INFO)
@@ -15,11 +15,11 @@ def lambda_handler(event, context):
         response = request_router.handle_request(event)
         return {
             'statusCode': 200,
-            'body': json.dumps(response)
+            'body': json_codec.dumps(response)
         }
     except Exception as e:
         logging.error(f"An error occurred: {e}")
         return {
             'statusCode': 500,
-            'body': json.dumps('Internal Server Error')
+            'body': json_codec.dumps('Internal Server Error')
         }
@@ -1,7 +1,8 @@
-import json
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Iterator
 
+import json_codec
+from exceptions.statement_timeout_exception import StatementTimeoutException
 from services.db_service import DbService
 
 
@@ -13,7 +14,9 @@ class RequestRouter:
         self.routing_table = {
             '/products': self.db_service.fetch_products,
             '/sales_orders': self.db_service.fetch_sales_orders,
-            '/purchase_orders': self.db_service.fetch_purchase_orders
+            '/purchase_orders': self.db_service.fetch_purchase_orders,
+            '/product_overview': self.db_service.fetch_product_overview,
+            '/events': self.db_service.fetch_events
         }
 
     def handle_request(self, event: Dict[str, Any]) -> Dict[str, Any]:
@@ -27,6 +30,12 @@ class RequestRouter:
                 return self._successful_response(result)
             else:
                 return self._error_response(404, 'Not Found')
+        except ValueError as e:
+            logging.error(f"Invalid request: {e}")
+            return self._error_response(400, 'Bad Request')
+        except StatementTimeoutException as e:
+            logging.error(f"Query timed out: {e}")
+            return self._error_response(504, 'Query Timed Out')
         except Exception as e:
             logging.error(f"An error occurred: {e}")
             return self._error_response(500, 'Internal Server Error')
@@ -34,11 +43,15 @@ class RequestRouter:
     def _error_response(self, status_code: int, body: str) -> Dict[str, Any]:
         return {
             'statusCode': status_code,
-            'body': json.dumps({'error': body})
+            'body': json_codec.dumps({'error': body})
         }
 
     def _successful_response(self, body: Any) -> Dict[str, Any]:
         return {
             'statusCode': 200,
-            'body': json.dumps(body)
+            'body': self._encode_rows(body) if isinstance(body, Iterator) else json_codec.dumps(body)
         }
+
+    def _encode_rows(self, rows: Iterator[Any]) -> str:
+        # Encodes row by row, so only the JSON text of a streamed result is ever held in memory
+        return '[' + ','.join(json_codec.dumps(row) for row in rows) + ']'
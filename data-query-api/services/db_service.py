@@ -1,32 +1,72 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Iterator
 
+import json_codec
+from clients.async_rds_client import AsyncRdsClient
 from clients.rds_client import RdsClient
+from event_codec import decode_event_message
+from event_query import EventPage, EventQuery, event_from_row
 
 
 class DbService:
 
-    def __init__(self, rds_client: RdsClient):
+    def __init__(self, rds_client: RdsClient, async_rds_client: AsyncRdsClient = None):
         self.rds_client = rds_client
+        self.async_rds_client = async_rds_client
         self.products_table_name = "products"
         self.sales_orders_table_name = "sales_orders"
         self.purchase_orders_table_name = "purchase_orders"
         self.query_pattern = "SELECT * FROM {} WHERE 1=1"
 
-    def fetch_products(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def fetch_products(self, params: Dict[str, Any]) -> Iterator[tuple]:
         base_query = self.query_pattern.format(self.products_table_name)
         return self.fetch(base_query, params)
 
-    def fetch_sales_orders(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def fetch_sales_orders(self, params: Dict[str, Any]) -> Iterator[tuple]:
         base_query = self.query_pattern.format(self.sales_orders_table_name)
         return self.fetch(base_query, params)
 
-    def fetch_purchase_orders(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def fetch_purchase_orders(self, params: Dict[str, Any]) -> Iterator[tuple]:
         base_query = self.query_pattern.format(self.purchase_orders_table_name)
         return self.fetch(base_query, params)
 
-    def fetch(self, base_query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def fetch_product_overview(self, params: Dict[str, Any]) -> Dict[str, List[tuple]]:
+        """
+            The product row with its sales and purchase orders, read with three concurrent SELECTs.
+            Requires `product_id`, further parameters filter the orders.
+        """
+        filters = dict(params or {})
+        product_id = filters.pop('product_id', None)
+        if not product_id:
+            raise ValueError("product_id is required")
+        statements = [
+            self._build_query(self.query_pattern.format(self.products_table_name), {'id': product_id}),
+            self._build_query(self.query_pattern.format(self.sales_orders_table_name),
+                              {'product_id': product_id, **filters}),
+            self._build_query(self.query_pattern.format(self.purchase_orders_table_name),
+                              {'product_id': product_id, **filters}),
+        ]
+        product, sales_orders, purchase_orders = self.async_rds_client.select_concurrently(statements)
+        return {'product': product, 'sales_orders': sales_orders, 'purchase_orders': purchase_orders}
+
+    def fetch_events(self, params: Dict[str, Any]) -> EventPage:
+        """
+            One keyset page of stock_management.events, see EventQuery.from_params() for the parameters.
+            Claim-checked messages are returned as their reference.
+        """
+        event_query = EventQuery.from_params(params)
+        query, query_params = event_query.to_sql()
+        rows = self.rds_client.execute_select(query, query_params)
+        return EventPage([event_from_row(row, self._load_message) for row in rows], event_query.next_cursor(rows))
+
+    @staticmethod
+    def _load_message(message, message_data):
+        if message_data is None and isinstance(message, dict):
+            return message
+        return json_codec.loads(decode_event_message(message, message_data))
+
+    def fetch(self, base_query: str, params: Dict[str, Any]) -> Iterator[tuple]:
         query, query_params = self._build_query(base_query, params)
-        return self.rds_client.execute_select(query, query_params)
+        return self.rds_client.iterate_select(query, query_params)
 
     def _build_query(self, base_query: str, params: Dict[str, Any]) -> (str, List[Any]):
         query = base_query
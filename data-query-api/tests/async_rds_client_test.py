@@ -0,0 +1,86 @@
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from clients.async_rds_client import AsyncRdsClient
+from exceptions.query_not_allowed_exception import QueryNotAllowedException
+from exceptions.statement_timeout_exception import StatementTimeoutException
+
+
+class QueryCanceled(Exception):
+    sqlstate = '57014'
+
+
+def new_mock_connection(rows):
+    conn = MagicMock()
+    cur = MagicMock()
+    cur.execute = AsyncMock()
+    cur.fetchall = AsyncMock(return_value=rows)
+    conn.cursor.return_value.__aenter__ = AsyncMock(return_value=cur)
+    conn.cursor.return_value.__aexit__ = AsyncMock(return_value=False)
+    return conn, cur
+
+
+class TestAsyncRdsClient(unittest.TestCase):
+
+    def setUp(self):
+        self.connections = []
+        self.client = AsyncRdsClient(statement_timeout_ms=100)
+        self.client.connection_pool = MagicMock()
+        self.client.connection_pool.connection = self.borrow
+
+    def tearDown(self):
+        self.client.loop.close()
+
+    @asynccontextmanager
+    async def borrow(self):
+        conn, cur = new_mock_connection([(f"row{len(self.connections)}",)])
+        self.connections.append((conn, cur))
+        yield conn
+
+    def test_select_concurrently_returns_rows_in_order(self):
+        result = self.client.select_concurrently([("SELECT * FROM a", None), ("SELECT * FROM b WHERE id = %s", ['1'])])
+
+        self.assertEqual(result, [[('row0',)], [('row1',)]])
+        self.assertEqual(len(self.connections), 2)
+        _, cur = self.connections[1]
+        cur.execute.assert_any_await("SET LOCAL statement_timeout = 100")
+        cur.execute.assert_any_await("SELECT * FROM b WHERE id = %s", ['1'])
+
+    def test_select_concurrently_sends_disabled_timeout(self):
+        self.client.select_concurrently([("SELECT * FROM a", None)], timeout_ms=0)
+
+        _, cur = self.connections[0]
+        cur.execute.assert_any_await("SET LOCAL statement_timeout = 0")
+
+    def test_select_concurrently_rejects_writes(self):
+        with self.assertRaises(QueryNotAllowedException):
+            self.client.select_concurrently([("SELECT * FROM a", None), ("DELETE FROM a", None)])
+        self.assertEqual(self.connections, [])
+
+    def test_select_concurrently_waits_for_all_before_raising(self):
+        @asynccontextmanager
+        async def borrow():
+            conn, cur = new_mock_connection([('row',)])
+            if not self.connections:
+                cur.execute.side_effect = QueryCanceled("canceling statement due to statement timeout")
+            self.connections.append((conn, cur))
+            yield conn
+        self.client.connection_pool.connection = borrow
+
+        with self.assertRaises(StatementTimeoutException):
+            self.client.select_concurrently([("SELECT * FROM a", None), ("SELECT * FROM b", None)])
+        self.connections[1][1].fetchall.assert_awaited_once()
+
+    @patch.dict('os.environ', {'DB_HOST': 'host', 'DB_NAME': 'db', 'DB_USER': 'user', 'DB_PASSWORD': 'pw'})
+    @patch('psycopg_pool.AsyncConnectionPool')
+    def test_open_creates_pool_once(self, mock_pool_class):
+        mock_pool_class.return_value.open = AsyncMock()
+        client = AsyncRdsClient()
+
+        client.loop.run_until_complete(client.open())
+        client.loop.run_until_complete(client.open())
+
+        mock_pool_class.assert_called_once()
+        self.assertEqual(mock_pool_class.call_args.kwargs['kwargs']['dbname'], 'db')
+        client.loop.close()
@@ -1,5 +1,9 @@
 import unittest
-from unittest.mock import patch
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from event_codec import EVENT_MESSAGE_FORMAT_COMPACT, encode_event_message
+from event_query import decode_cursor
 
 from services.db_service import DbService
 
@@ -12,28 +16,45 @@ class TestDbService(unittest.TestCase):
         self.db_service = DbService(self.mock_rds_client)
 
     def test_fetch_products(self):
-        self.mock_rds_client.execute_select.return_value = [{"product": "apple"}]
+        self.mock_rds_client.iterate_select.return_value = iter([{"product": "apple"}])
 
         params = {'id': '1'}
         result = self.db_service.fetch_products(params)
 
-        self.assertEqual(result, [{"product": "apple"}])
+        self.assertEqual(list(result), [{"product": "apple"}])
 
     def test_fetch_sales_orders(self):
-        self.mock_rds_client.execute_select.return_value = [{"order": "1234"}]
+        self.mock_rds_client.iterate_select.return_value = iter([{"order": "1234"}])
 
         params = {'id': '1'}
         result = self.db_service.fetch_sales_orders(params)
 
-        self.assertEqual(result, [{"order": "1234"}])
+        self.assertEqual(list(result), [{"order": "1234"}])
 
     def test_fetch_purchase_orders(self):
-        self.mock_rds_client.execute_select.return_value = [{"purchase_order": "5678"}]
+        self.mock_rds_client.iterate_select.return_value = iter([{"purchase_order": "5678"}])
 
         params = {'id': '1'}
         result = self.db_service.fetch_purchase_orders(params)
 
-        self.assertEqual(result, [{"purchase_order": "5678"}])
+        self.assertEqual(list(result), [{"purchase_order": "5678"}])
+
+    def test_fetch_product_overview_reads_concurrently(self):
+        async_rds_client = MagicMock()
+        async_rds_client.select_concurrently.return_value = [[('prod_1',)], [('so_1',)], []]
+        db_service = DbService(self.mock_rds_client, async_rds_client)
+
+        overview = db_service.fetch_product_overview({'product_id': 'prod_1', 'status': 'open'})
+
+        self.assertEqual(overview, {'product': [('prod_1',)], 'sales_orders': [('so_1',)], 'purchase_orders': []})
+        statements = async_rds_client.select_concurrently.call_args.args[0]
+        self.assertEqual(statements[0], ("SELECT * FROM products WHERE 1=1 AND id = %s", ['prod_1']))
+        self.assertEqual(statements[2], ("SELECT * FROM purchase_orders WHERE 1=1 AND product_id = %s AND status = %s",
+                                         ['prod_1', 'open']))
+
+    def test_fetch_product_overview_requires_product_id(self):
+        with self.assertRaises(ValueError):
+            DbService(self.mock_rds_client, MagicMock()).fetch_product_overview({})
 
     def test_build_query(self):
         base_query = "SELECT * FROM products WHERE 1=1"
@@ -45,3 +66,34 @@ class TestDbService(unittest.TestCase):
 
         self.assertEqual(query, expected_query)
         self.assertEqual(query_params, expected_query_params)
+
+    def test_fetch_events(self):
+        message, message_data = encode_event_message('{"event_type": "NewDeliveryPersisted", "payload": {}}',
+                                                     EVENT_MESSAGE_FORMAT_COMPACT)
+        self.mock_rds_client.execute_select.return_value = [
+            ('evnt_1', 'NewDeliveryPersisted', 'persistence-service', message, message_data,
+             datetime(2024, 5, 1), 'Processed', None),
+        ]
+
+        page = self.db_service.fetch_events({'event_type': 'NewDeliveryPersisted', 'limit': '1'})
+
+        self.assertEqual(page.events[0]['message'], {"event_type": "NewDeliveryPersisted", "payload": {}})
+        self.assertEqual(decode_cursor(page.next_cursor), (datetime(2024, 5, 1), 'evnt_1'))
+        query, query_params = self.mock_rds_client.execute_select.call_args.args
+        self.assertIn('ORDER BY created_at, event_id LIMIT %s', query)
+        self.assertEqual(query_params, ['NewDeliveryPersisted', 1])
+
+    def test_fetch_events_by_payload(self):
+        message = {"event_type": "NewDeliveryPersisted", "payload": {"product_id": "prod_1"}}
+        self.mock_rds_client.execute_select.return_value = [
+            ('evnt_1', 'NewDeliveryPersisted', 'persistence-service', message, None, datetime(2024, 5, 1),
+             'Processed', None),
+        ]
+
+        page = self.db_service.fetch_events({'payload': '{"product_id": "prod_1"}'})
+
+        self.assertEqual(page.events[0]['message'], message)
+        self.assertIsNone(page.next_cursor)
+        query, query_params = self.mock_rds_client.execute_select.call_args.args
+        self.assertIn("message -> 'payload' @> %s::jsonb", query)
+        self.assertEqual(query_params, ['{"product_id":"prod_1"}', 500])
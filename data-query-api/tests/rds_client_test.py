@@ -4,13 +4,15 @@ from unittest.mock import patch, MagicMock
 
 from clients.rds_client import RdsClient
 from exceptions.query_not_allowed_exception import QueryNotAllowedException
+from exceptions.statement_timeout_exception import StatementTimeoutException
 
 
 @patch.dict(os.environ, {
     'DB_HOST': 'localhost',
     'DB_NAME': 'test_db',
     'DB_USER': 'test_user',
-    'DB_PASSWORD': 'test_password'
+    'DB_PASSWORD': 'test_password',
+    'DB_STATEMENT_TIMEOUT_MS': '0'
 })
 class TestRdsClient(unittest.TestCase):
 
@@ -32,6 +34,7 @@ class TestRdsClient(unittest.TestCase):
 
         mock_pool.getconn.return_value = mock_conn
         mock_conn.cursor.return_value.__enter__.return_value = mock_cur
+        mock_conn.closed = 0
         mock_cur.fetchall.return_value = [('result1',), ('result2',)]
 
         client = RdsClient()
@@ -41,7 +44,10 @@ class TestRdsClient(unittest.TestCase):
         self.assertEqual(result, [('result1',), ('result2',)])
         mock_pool.getconn.assert_called_once()
         mock_conn.cursor.assert_called_once()
-        mock_cur.execute.assert_called_once_with("SELECT * FROM table")
+        mock_cur.execute.assert_called_once_with("SET LOCAL statement_timeout = 0; SELECT * FROM table")
+        # The read's transaction ends before the connection is returned
+        mock_conn.rollback.assert_called_once()
+        mock_pool.putconn.assert_called_once_with(mock_conn)
 
     @patch('psycopg2.pool.SimpleConnectionPool')
     def test_constructor_exception(self, mock_pool):
@@ -61,7 +67,7 @@ class TestRdsClient(unittest.TestCase):
         client.connection_pool = mock_pool
         client.execute_select("SELECT * FROM table WHERE column = %s", params=['value'])
 
-        mock_cur.execute.assert_called_once_with("SELECT * FROM table WHERE column = %s", ['value'])
+        mock_cur.execute.assert_called_once_with("SET LOCAL statement_timeout = 0; SELECT * FROM table WHERE column = %s", ['value'])
 
     @patch('psycopg2.pool.SimpleConnectionPool')
     def test_execute_select_exception(self, mock_pool):
@@ -70,13 +76,149 @@ class TestRdsClient(unittest.TestCase):
 
         mock_pool.getconn.return_value = mock_conn
         mock_conn.cursor.return_value.__enter__.return_value = mock_cur
-        mock_cur.fetchall.side_effect = Exception("Query failed")
+        error = Exception("Query failed")
+        mock_cur.fetchall.side_effect = error
 
         client = RdsClient()
         client.connection_pool = mock_pool
-        result = client.execute_select("SELECT * FROM table")
+        with self.assertRaises(Exception) as context:
+            client.execute_select("SELECT * FROM table")
+
+        self.assertIs(context.exception, error)
 
-        self.assertEqual(result, None)
         mock_pool.getconn.assert_called_once()
         mock_conn.cursor.assert_called_once()
-        mock_cur.execute.assert_called_once_with("SELECT * FROM table")
+        mock_cur.execute.assert_called_once_with("SET LOCAL statement_timeout = 0; SELECT * FROM table")
+
+    @patch('psycopg2.pool.SimpleConnectionPool')
+    def test_iterate_select_streams_in_chunks(self, mock_pool):
+        mock_conn = MagicMock()
+        mock_cur = MagicMock()
+
+        mock_pool.getconn.return_value = mock_conn
+        mock_conn.cursor.return_value.__enter__.return_value = mock_cur
+        mock_cur.fetchmany.side_effect = [[('result1',), ('result2',)], [('result3',)], []]
+
+        client = RdsClient()
+        client.connection_pool = mock_pool
+        rows = client.iterate_select("SELECT * FROM table", chunk_size=2)
+
+        mock_pool.getconn.assert_not_called()
+        self.assertEqual(list(rows), [('result1',), ('result2',), ('result3',)])
+        self.assertIsNotNone(mock_conn.cursor.call_args.kwargs['name'])
+        mock_cur.fetchmany.assert_called_with(2)
+        mock_pool.putconn.assert_called_once_with(mock_conn)
+
+    @patch('psycopg2.pool.SimpleConnectionPool')
+    def test_iterate_select_releases_connection_when_closed(self, mock_pool):
+        mock_conn = MagicMock()
+        mock_pool.getconn.return_value = mock_conn
+        mock_conn.cursor.return_value.__enter__.return_value.fetchmany.return_value = [('result1',)]
+
+        client = RdsClient()
+        client.connection_pool = mock_pool
+        rows = client.iterate_select("SELECT * FROM table")
+        next(rows)
+        rows.close()
+
+        mock_pool.putconn.assert_called_once_with(mock_conn)
+
+    @patch('psycopg2.pool.SimpleConnectionPool')
+    def test_iterate_select_query_not_allowed(self, mock_pool):
+        client = RdsClient()
+        with self.assertRaises(QueryNotAllowedException):
+            client.iterate_select("DELETE FROM table")
+
+    @patch.dict(os.environ, {'DB_REPLICA_HOSTS': 'replica-1:5433,replica-2'})
+    @patch('psycopg2.pool.SimpleConnectionPool')
+    def test_select_routed_to_replicas_round_robin(self, mock_pool_class):
+        primary, replica_1, replica_2 = MagicMock(), MagicMock(), MagicMock()
+        mock_pool_class.side_effect = [primary, replica_1, replica_2]
+        for replica in (replica_1, replica_2):
+            replica.getconn.return_value.cursor.return_value.__enter__.return_value.fetchone.return_value = (0,)
+
+        client = RdsClient()
+        client.execute_select("SELECT 1")
+        client.execute_select("SELECT 2")
+        client.execute_select("SELECT 1 FOR UPDATE")
+
+        self.assertEqual(mock_pool_class.call_args_list[1].kwargs['port'], '5433')
+        self.assertEqual(mock_pool_class.call_args_list[2].kwargs['port'], '5432')
+        # lag check + query on each replica, the locking read goes to the primary
+        self.assertEqual(replica_1.getconn.call_count, 2)
+        self.assertEqual(replica_2.getconn.call_count, 2)
+        primary.getconn.assert_called_once()
+
+    @patch.dict(os.environ, {'DB_REPLICA_HOSTS': 'replica-1', 'DB_REPLICA_MAX_LAG_SECONDS': '5'})
+    @patch('psycopg2.pool.SimpleConnectionPool')
+    def test_select_falls_back_to_primary_when_replica_lags(self, mock_pool_class):
+        primary, replica = MagicMock(), MagicMock()
+        mock_pool_class.side_effect = [primary, replica]
+        replica.getconn.return_value.cursor.return_value.__enter__.return_value.fetchone.return_value = (30.0,)
+
+        client = RdsClient()
+        client.execute_select("SELECT 1")
+
+        primary.getconn.assert_called_once()
+        replica.putconn.assert_called_once()
+        self.assertEqual(client.replica_stats(), [{'name': 'replica-1:5432', 'lag_seconds': 30.0, 'healthy': True}])
+
+    @patch('psycopg2.pool.SimpleConnectionPool')
+    def test_execute_select_applies_statement_timeout(self, mock_pool):
+        mock_cur = mock_pool.return_value.getconn.return_value.cursor.return_value.__enter__.return_value
+
+        RdsClient(statement_timeout_ms=3000).execute_select("SELECT * FROM table")
+        RdsClient().execute_select("SELECT * FROM table", timeout_ms=500)
+
+        self.assertEqual(mock_cur.execute.call_args_list[0].args,
+                         ("SET LOCAL statement_timeout = 3000; SELECT * FROM table",))
+        self.assertEqual(mock_cur.execute.call_args_list[1].args,
+                         ("SET LOCAL statement_timeout = 500; SELECT * FROM table",))
+
+    @patch('psycopg2.pool.SimpleConnectionPool')
+    def test_execute_select_statement_timeout(self, mock_pool):
+        mock_conn = mock_pool.return_value.getconn.return_value
+        mock_conn.closed = 0
+        cancelled = Exception("canceling statement due to statement timeout")
+        cancelled.pgcode = '57014'
+        mock_conn.cursor.return_value.__enter__.return_value.execute.side_effect = cancelled
+
+        client = RdsClient(statement_timeout_ms=100)
+        with self.assertRaises(StatementTimeoutException):
+            client.execute_select("SELECT pg_sleep(10)")
+
+        self.assertEqual(client.statement_timeout_count, 1)
+        mock_conn.rollback.assert_called_once()
+        mock_pool.return_value.putconn.assert_called_once_with(mock_conn)
+
+    @patch('psycopg2.pool.SimpleConnectionPool')
+    def test_iterate_select_statement_timeout(self, mock_pool):
+        mock_conn = mock_pool.return_value.getconn.return_value
+        mock_conn.closed = 0
+        cancelled = Exception("canceling statement due to statement timeout")
+        cancelled.pgcode = '57014'
+        mock_cur = mock_conn.cursor.return_value.__enter__.return_value
+        mock_cur.fetchmany.side_effect = cancelled
+
+        client = RdsClient(statement_timeout_ms=100)
+        with self.assertRaises(StatementTimeoutException):
+            list(client.iterate_select("SELECT pg_sleep(10)"))
+
+        mock_cur.execute.assert_any_call("SET LOCAL statement_timeout = 100; ")
+        self.assertEqual(client.statement_timeout_count, 1)
+        mock_conn.rollback.assert_called_once()
+        mock_pool.return_value.putconn.assert_called_once_with(mock_conn)
+
+    @patch('psycopg2.pool.SimpleConnectionPool')
+    def test_iterate_select_sends_disabled_timeout_and_ends_transaction(self, mock_pool):
+        mock_conn = mock_pool.return_value.getconn.return_value
+        mock_conn.closed = 0
+        mock_cur = mock_conn.cursor.return_value.__enter__.return_value
+        mock_cur.fetchmany.side_effect = [[('row',)], []]
+
+        rows = list(RdsClient(statement_timeout_ms=100).iterate_select("SELECT * FROM table", timeout_ms=0))
+
+        self.assertEqual(rows, [('row',)])
+        mock_cur.execute.assert_any_call("SET LOCAL statement_timeout = 0; ")
+        mock_conn.rollback.assert_called_once()
+        mock_pool.return_value.putconn.assert_called_once_with(mock_conn)
@@ -0,0 +1,85 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from clients.replica_router import ReplicaEndpoint, ReplicaRouter, is_read_only, parse_replica_hosts
+
+
+def _replica_pool(lag_seconds=0.0):
+    pool = MagicMock()
+    pool.getconn.return_value.cursor.return_value.__enter__.return_value.fetchone.return_value = (lag_seconds,)
+    return pool
+
+
+class TestReplicaRouter(unittest.TestCase):
+
+    def test_is_read_only(self):
+        self.assertTrue(is_read_only("  select * from events"))
+        self.assertFalse(is_read_only("SELECT * FROM events FOR UPDATE SKIP LOCKED"))
+        self.assertFalse(is_read_only("SELECT * FROM events for no key update"))
+        self.assertFalse(is_read_only("UPDATE events SET emitter = 'x'"))
+
+    def test_parse_replica_hosts(self):
+        self.assertEqual(parse_replica_hosts("a:5433, b ,", "5432"), [("a", "5433"), ("b", "5432")])
+        self.assertEqual(parse_replica_hosts(None, "5432"), [])
+
+    def test_acquire_without_replicas(self):
+        self.assertEqual(ReplicaRouter([]).acquire(), (None, None))
+
+    def test_acquire_round_robin(self):
+        pool_a, pool_b = _replica_pool(), _replica_pool()
+        router = ReplicaRouter([ReplicaEndpoint("a", pool_a), ReplicaEndpoint("b", pool_b)])
+
+        self.assertIs(router.acquire()[0], pool_a)
+        self.assertIs(router.acquire()[0], pool_b)
+        self.assertIs(router.acquire()[0], pool_a)
+
+    def test_acquire_skips_lagging_replica(self):
+        lagging, fresh = _replica_pool(lag_seconds=60), _replica_pool()
+        router = ReplicaRouter([ReplicaEndpoint("a", lagging), ReplicaEndpoint("b", fresh)], max_lag_seconds=5)
+
+        self.assertIs(router.acquire()[0], fresh)
+        self.assertIs(router.acquire()[0], fresh)
+        self.assertEqual(router.stats()[0], {'name': 'a', 'lag_seconds': 60.0, 'healthy': True})
+
+    def test_acquire_skips_unreachable_replica(self):
+        broken = MagicMock()
+        broken.getconn.side_effect = Exception("connection refused")
+        router = ReplicaRouter([ReplicaEndpoint("a", broken)])
+
+        self.assertEqual(router.acquire(), (None, None))
+        self.assertFalse(router.stats()[0]['healthy'])
+
+        router.acquire()
+        broken.getconn.assert_called_once()
+
+    def test_acquire_skips_replica_when_borrow_fails(self):
+        pool = _replica_pool()
+        router = ReplicaRouter([ReplicaEndpoint("a", pool)])
+        router.acquire()
+        pool.getconn.side_effect = Exception("pool exhausted")
+
+        self.assertEqual(router.acquire(), (None, None))
+        self.assertFalse(router.stats()[0]['healthy'])
+
+    @patch('clients.replica_router.time.monotonic')
+    def test_lag_rechecked_after_interval(self, mock_monotonic):
+        pool = _replica_pool(lag_seconds=60)
+        router = ReplicaRouter([ReplicaEndpoint("a", pool)], max_lag_seconds=5, lag_check_interval=10)
+
+        mock_monotonic.return_value = 100.0
+        self.assertEqual(router.acquire(), (None, None))
+
+        pool.getconn.return_value.cursor.return_value.__enter__.return_value.fetchone.return_value = (1.0,)
+        mock_monotonic.return_value = 105.0
+        self.assertEqual(router.acquire(), (None, None))
+        mock_monotonic.return_value = 111.0
+        self.assertIs(router.acquire()[0], pool)
+
+    def test_closeall(self):
+        pool = _replica_pool()
+        ReplicaRouter([ReplicaEndpoint("a", pool)]).closeall()
+        pool.closeall.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,11 @@
 import json
 import unittest
+from datetime import datetime
+from decimal import Decimal
 from unittest.mock import patch
 
+from event_query import EventPage
+from exceptions.statement_timeout_exception import StatementTimeoutException
 from request_router import RequestRouter
 
 
@@ -29,6 +33,19 @@ class TestRequestRouter(unittest.TestCase):
         self.assertEqual(result['statusCode'], 200)
         self.assertEqual(json.loads(result['body']), {"order": "1234"})
 
+    def test_handle_request_streamed_rows(self):
+        self.mock_db_service.fetch_products.return_value = iter([('prod_1', 'apple'), ('prod_2', 'pear')])
+        event = {'path': '/products', 'queryStringParameters': {}}
+        result = self.router.handle_request(event)
+        self.assertEqual(result['statusCode'], 200)
+        self.assertEqual(json.loads(result['body']), [['prod_1', 'apple'], ['prod_2', 'pear']])
+
+    def test_handle_request_encodes_numeric_and_timestamp_columns(self):
+        self.mock_db_service.fetch_products.return_value = iter([('prod_1', Decimal('2.50'), datetime(2024, 1, 1))])
+        event = {'path': '/products', 'queryStringParameters': {}}
+        result = self.router.handle_request(event)
+        self.assertEqual(json.loads(result['body']), [['prod_1', '2.50', '2024-01-01T00:00:00']])
+
     def test_handle_request_invalid_path(self):
         event = {'path': '/invalid', 'queryStringParameters': {'id': '1'}}
         result = self.router.handle_request(event)
@@ -41,3 +58,27 @@ class TestRequestRouter(unittest.TestCase):
         result = self.router.handle_request(event)
         self.assertEqual(result['statusCode'], 500)
         self.assertEqual(json.loads(result['body']), {"error": "Internal Server Error"})
+
+    def test_handle_request_statement_timeout(self):
+        self.mock_db_service.fetch_products.side_effect = StatementTimeoutException("Statement cancelled")
+        event = {'path': '/products', 'queryStringParameters': {'id': '1'}}
+        result = self.router.handle_request(event)
+        self.assertEqual(result['statusCode'], 504)
+        self.assertEqual(json.loads(result['body']), {"error": "Query Timed Out"})
+
+    def test_handle_request_events(self):
+        self.mock_db_service.fetch_events.return_value = EventPage(
+            [{'event_id': 'evnt_1', 'created_at': datetime(2024, 5, 1), 'message': {'payload': {}}}], 'cursor')
+        event = {'path': '/events', 'queryStringParameters': {'event_type': 'NewProductPersisted'}}
+        result = self.router.handle_request(event)
+        self.assertEqual(result['statusCode'], 200)
+        self.assertEqual(json.loads(result['body']), {
+            'events': [{'event_id': 'evnt_1', 'created_at': '2024-05-01T00:00:00', 'message': {'payload': {}}}],
+            'next_cursor': 'cursor'})
+
+    def test_handle_request_invalid_parameters(self):
+        self.mock_db_service.fetch_events.side_effect = ValueError("Invalid events cursor")
+        event = {'path': '/events', 'queryStringParameters': {'after': 'x'}}
+        result = self.router.handle_request(event)
+        self.assertEqual(result['statusCode'], 400)
+        self.assertEqual(json.loads(result['body']), {"error": "Bad Request"})
@@ -1,15 +1,18 @@
-import json
 import logging
 import os
 import sys
 import traceback
 from datetime import datetime
 
-import boto3
 import psycopg2
 
+from common.clients.rds_client import RdsClient
+from common.clients.secret_provider import get_secret_provider
+from common.events.event_partitions import EventPartitionManager
+
 now = datetime.now()
 timestamp = datetime.timestamp(now)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
 formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
 def database_exists(conn, db_name):
@@ -63,18 +66,13 @@ def get_logger(name):
 
 logger = get_logger(__name__)
 
+secret_provider = get_secret_provider(os.environ.get("DB_SECRET_NAME", "DBSecretD58955BC-UVVkK4RmuFL7"))
+
 
 def lambda_handler(event, context):
     try:
         logger.info("Starting lambda")
-        secret_string = pull_secret_string()
-        secret_dict = json.loads(secret_string)
-        username = secret_dict.get("username")
-        password = secret_dict.get("password")
-        logger.info("Successfully pulled db credentials")
-
-        create_db_if_not_exists(password, username)
-        run_sql_statements(password, username)
+        secret_provider.with_credentials(initialize_schema)
         return {
             'statusCode': 200,
             'body': 'RDS schema initialization successful!'
@@ -87,18 +85,31 @@ def lambda_handler(event, context):
         }
 
 
-def pull_secret_string():
-    secret_name = os.environ.get("DB_SECRET_NAME", "DBSecretD58955BC-UVVkK4RmuFL7")
-    client = boto3.client('secretsmanager')
-    logger.info(f"Pulling secret: {secret_name}")
+def maintenance_handler(event, context):
+    """
+        Runs on a schedule: creates the upcoming events partitions and archives the expired ones.
+    """
     try:
-        response = client.get_secret_value(SecretId=secret_name)
-        logger.info("received response from secret manager")
+        created, archived = EventPartitionManager.from_environment(RdsClient(secret_provider)).maintain()
+        return {
+            'statusCode': 200,
+            'body': f'Created {len(created)} events partitions, archived {len(archived)}'
+        }
     except Exception as e:
-        print(f"Error retrieving secret: {e}")
-        raise e
-    secret_string = response['SecretString']
-    return secret_string
+        logger.error(f"Events partition maintenance failed: {e}")
+        return {
+            'statusCode': 500,
+            'body': f'Events partition maintenance failed. Error: {str(e)}'
+        }
+
+
+def initialize_schema(credentials):
+    username = credentials.get("username")
+    password = credentials.get("password")
+    logger.info("Successfully pulled db credentials")
+
+    create_db_if_not_exists(password, username)
+    run_sql_statements(password, username)
 
 
 def run_sql_statements(password, username):
@@ -112,16 +123,50 @@ def run_sql_statements(password, username):
     )
     logger.info(f"Connected to db on {os.environ['DB_HOST']}")
     cursor = conn.cursor()
+    if events_table_exists(cursor):
+        for migration in sorted(os.listdir(MIGRATIONS_DIR)):
+            run_sql_file(cursor, os.path.join(MIGRATIONS_DIR, migration))
+    run_sql_file(cursor, sql_file_path)
+    logger.info("Executing commands")
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def events_table_exists(cursor):
+    """
+        An existing schema is upgraded by the migrations before schema.sql runs, schema.sql only creates what is missing.
+    """
+    cursor.execute("SELECT to_regclass('stock_management.events') IS NOT NULL;")
+    return cursor.fetchone()[0]
+
+
+def run_sql_file(cursor, sql_file_path):
     with open(sql_file_path, "r") as sql_file:
-        sql_commands = sql_file.read().split(";")
+        sql_commands = split_sql_statements(sql_file.read())
         for command in sql_commands:
             logger.info(f"Executing {command}")
             if command.strip():
                 cursor.execute(command)
-    logger.info("Executing commands")
-    conn.commit()
-    cursor.close()
-    conn.close()
+
+
+def split_sql_statements(sql_text):
+    """
+        Splits on ";" except inside $$-quoted function bodies.
+    """
+    statements = []
+    current = ''
+    for index, part in enumerate(sql_text.split('$$')):
+        if index % 2:
+            current += f"$${part}$$"
+            continue
+        pieces = part.split(';')
+        current += pieces[0]
+        for piece in pieces[1:]:
+            statements.append(current)
+            current = piece
+    statements.append(current)
+    return statements
 
 
 def create_db_if_not_exists(password, username):
@@ -0,0 +1,132 @@
+import logging
+import os
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from common.clients.rds_client import DEFAULT_MIN_DB_CONNECTIONS, DEFAULT_MAX_DB_CONNECTIONS, \
+    DEFAULT_DB_POOL_TIMEOUT_SECONDS
+from common.clients.secret_provider import SecretProvider, get_secret_provider
+from common.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AsyncTransaction:
+    """
+        Unit of work pinned to one pooled connection, see AsyncRdsClient.transaction().
+    """
+
+    def __init__(self, rds_client, conn):
+        self.rds_client = rds_client
+        self.conn = conn
+
+    async def execute(self, query, params=None):
+        return await self.rds_client.execute(query, params, conn=self.conn, commit=False)
+
+
+class AsyncRdsClient:
+    """
+        asyncio counterpart of RdsClient on psycopg 3 and its AsyncConnectionPool, taking the same
+        %s-style queries. Independent statements can run concurrently, e.g.
+        `await asyncio.gather(client.execute(q1, p1), client.execute(q2, p2))`.
+        The pool has to be opened from a running event loop, with `await client.open()` or
+        `async with AsyncRdsClient() as client:`. Needs psycopg[binary] and psycopg-pool>=3.3.
+    """
+
+    def __init__(self, secret_provider: SecretProvider = None):
+        self.secret_provider = secret_provider if secret_provider else get_secret_provider()
+        self.connection_pool = None
+        self._transaction = ContextVar(f"async_rds_transaction_{id(self)}", default=None)
+
+    async def open(self):
+        if self.connection_pool is not None:
+            return self
+        try:
+            from psycopg_pool import AsyncConnectionPool
+            self.connection_pool = AsyncConnectionPool(
+                kwargs=self._connection_kwargs,
+                min_size=int(os.environ.get('MIN_DB_CONNECTIONS', DEFAULT_MIN_DB_CONNECTIONS)),
+                max_size=int(os.environ.get('MAX_DB_CONNECTIONS', DEFAULT_MAX_DB_CONNECTIONS)),
+                timeout=float(os.environ.get('DB_POOL_TIMEOUT_SECONDS', DEFAULT_DB_POOL_TIMEOUT_SECONDS)),
+                check=AsyncConnectionPool.check_connection,
+                open=False
+            )
+            await self.connection_pool.open(wait=True)
+        except Exception as e:
+            logging.error(f"Failed to connect to DB: {e}")
+            self.connection_pool = None
+            raise e
+        return self
+
+    async def close(self):
+        if self.connection_pool is not None:
+            await self.connection_pool.close()
+            self.connection_pool = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+            Pins one pooled connection for every statement run through this client in the block
+            (within the current task and the tasks it starts), commits once on exit or rolls back on error.
+            Nested blocks join the outer transaction.
+        """
+        active_transaction = self._transaction.get()
+        if active_transaction is not None:
+            yield active_transaction
+            return
+
+        async with self.connection_pool.connection() as conn:
+            token = self._transaction.set(AsyncTransaction(self, conn))
+            try:
+                yield self._transaction.get()
+                await conn.commit()
+            except Exception as e:
+                logging.error(f"Transaction rolled back: {e}")
+                await conn.rollback()
+                raise e
+            finally:
+                self._transaction.reset(token)
+
+    async def execute(self, query, params=None, conn=None, commit=True):
+        if conn is None and self._transaction.get() is not None:
+            conn, commit = self._transaction.get().conn, False
+
+        if conn is None:
+            async with self.connection_pool.connection() as pooled_conn:
+                return await self._execute(pooled_conn, query, params, commit)
+        return await self._execute(conn, query, params, commit)
+
+    async def _execute(self, conn, query, params, commit):
+        is_select = query.strip().upper().startswith('SELECT')
+        try:
+            async with conn.cursor() as cur:
+                logger.debug(f"Executing query: {query}")
+                await cur.execute(query, params)
+                result = await cur.fetchall() if is_select else cur.rowcount
+
+            if commit and not is_select:
+                await conn.commit()
+        except Exception as e:
+            logging.error(f"Query execution failed: {e}")
+            raise e
+
+        return result
+
+    def pool_stats(self):
+        return self.connection_pool.get_stats()
+
+    def _connection_kwargs(self):
+        credentials = self.secret_provider.get_secret_dict()
+        return {
+            'host': os.environ['DB_HOST'],
+            'port': os.environ.get('DB_PORT', '5432'),
+            'dbname': os.environ['DB_NAME'],
+            'user': credentials.get("username"),
+            'password': credentials.get("password"),
+        }
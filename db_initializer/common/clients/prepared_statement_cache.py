@@ -0,0 +1,101 @@
+import hashlib
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+from common.utils.logger import get_logger
+
+DEFAULT_MAX_PREPARED_STATEMENTS = 50
+INVALID_STATEMENT_NAME_PG_CODE = '26000'
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class PreparedStatementStats:
+    hits: int
+    misses: int
+    evictions: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@lru_cache(maxsize=256)
+def _describe(query):
+    placeholder_count = 0
+
+    def to_positional(match):
+        nonlocal placeholder_count
+        if match.group() == '%%':
+            return '%'
+        placeholder_count += 1
+        return f"${placeholder_count}"
+
+    if re.search(r'%\(\w+\)s', query):
+        raise ValueError("Prepared statements support only positional %s placeholders")
+    positional_query = re.sub(r'%%|%s', to_positional, query.strip().rstrip(';'))
+    name = f"stmt_{hashlib.sha1(query.encode()).hexdigest()[:16]}"
+    execute_query = f"EXECUTE {name} ({', '.join(['%s'] * placeholder_count)})" if placeholder_count \
+        else f"EXECUTE {name}"
+    return name, positional_query, execute_query
+
+
+class PreparedStatementCache:
+    """
+        Keeps up to `max_size` server-side prepared statements per connection, evicting the least
+        recently used one with DEALLOCATE. Statements are named after a hash of their text,
+        so the same query shares one plan per session.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_PREPARED_STATEMENTS):
+        self.max_size = int(max_size)
+        self._statements = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def execute(self, cur, query, params=None, setup=''):
+        """
+            `setup` is sent in the same round trip ahead of the EXECUTE, e.g. a SET LOCAL.
+        """
+        name, positional_query, execute_query = _describe(query)
+        statements = self._statements.setdefault(cur.connection, OrderedDict())
+
+        if name in statements:
+            statements.move_to_end(name)
+            self._count(hit=True)
+        else:
+            self._count(hit=False)
+            if len(statements) >= self.max_size:
+                evicted_name, _ = statements.popitem(last=False)
+                cur.execute(f"DEALLOCATE {evicted_name}")
+                with self._lock:
+                    self._evictions += 1
+            cur.execute(f"PREPARE {name} AS {positional_query}")
+            statements[name] = None
+
+        try:
+            cur.execute(setup + execute_query, params)
+        except Exception as e:
+            if getattr(e, 'pgcode', None) == INVALID_STATEMENT_NAME_PG_CODE:
+                logger.warning(f"Prepared statement {name} is gone from the session, it will be prepared again")
+                statements.pop(name, None)
+            raise e
+
+    def stats(self) -> PreparedStatementStats:
+        with self._lock:
+            return PreparedStatementStats(hits=self._hits, misses=self._misses, evictions=self._evictions)
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
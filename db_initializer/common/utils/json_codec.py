@@ -0,0 +1,92 @@
+import dataclasses
+import json
+import os
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the stdlib backend is the fallback
+    orjson = None
+
+JSON_BACKEND_ORJSON = 'orjson'
+JSON_BACKEND_STDLIB = 'json'
+
+
+def _default(value):
+    """
+        Types neither backend encodes natively. Decimals become strings, so a NUMERIC column keeps every
+        digit instead of being rounded to a float; dates use ISO 8601.
+    """
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class _OrjsonBackend:
+    name = JSON_BACKEND_ORJSON
+
+    @staticmethod
+    def dumps(value) -> str:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+
+class _StdlibBackend:
+    name = JSON_BACKEND_STDLIB
+
+    @staticmethod
+    def dumps(value) -> str:
+        return json.dumps(value, default=_default, separators=(',', ':'))
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data)
+
+
+def _select_backend(name=None):
+    name = name or os.environ.get('JSON_CODEC_BACKEND', JSON_BACKEND_ORJSON)
+    if name == JSON_BACKEND_ORJSON and orjson is not None:
+        return _OrjsonBackend
+    return _StdlibBackend
+
+
+_backend = _select_backend()
+
+
+def set_backend(name: str):
+    """
+        Switches the process wide backend, falls back to the stdlib when orjson is not installed.
+    """
+    global _backend
+    _backend = _select_backend(name)
+
+
+def backend_name() -> str:
+    return _backend.name
+
+
+def dumps(value) -> str:
+    """
+        Compact JSON text; also encodes Decimal, date, datetime, UUID, set and dataclass values.
+    """
+    return _backend.dumps(value)
+
+
+def loads(data):
+    """
+        Accepts str, bytes or bytearray.
+    """
+    return _backend.loads(data)
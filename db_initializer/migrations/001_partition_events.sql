@@ -0,0 +1,29 @@
+-- Converts an events table from before the monthly partitioning into the partitioned table of schema.sql.
+-- The rows are copied into a new partitioned table, with a partition for every month they cover, which
+-- then takes the name of the old table. schema.sql recreates the indexes and the trigger afterwards.
+DO $$
+DECLARE
+    month DATE;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('stock_management.events')) IS DISTINCT FROM 'r' THEN
+        RETURN;
+    END IF;
+    -- Writers wait for the swap, readers keep the old table until then
+    LOCK TABLE stock_management.events IN EXCLUSIVE MODE;
+    CREATE TABLE stock_management.events_partitioned (
+        LIKE stock_management.events INCLUDING DEFAULTS,
+        PRIMARY KEY (event_id, created_at)
+    ) PARTITION BY RANGE (created_at);
+    FOR month IN SELECT DISTINCT date_trunc('month', created_at)::DATE FROM stock_management.events
+                 WHERE created_at IS NOT NULL LOOP
+        EXECUTE format('CREATE TABLE stock_management.%I PARTITION OF stock_management.events_partitioned '
+                       'FOR VALUES FROM (%L) TO (%L)', 'events_p' || to_char(month, 'YYYYMM'),
+                       month, (month + INTERVAL '1 month')::DATE);
+    END LOOP;
+    CREATE TABLE stock_management.events_default PARTITION OF stock_management.events_partitioned DEFAULT;
+    INSERT INTO stock_management.events_partitioned SELECT * FROM stock_management.events;
+    DROP TABLE stock_management.events;
+    ALTER TABLE stock_management.events_partitioned RENAME TO events;
+    ALTER INDEX stock_management.events_partitioned_pkey RENAME TO events_pkey;
+END;
+$$;
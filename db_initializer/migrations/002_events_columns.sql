@@ -0,0 +1,28 @@
+-- Brings the columns of an events table from before the outbox relay and the JSONB messages up to schema.sql,
+-- then creates its indexes, the new tables and the trigger follow in schema.sql.
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_schema = 'stock_management' AND table_name = 'events' AND column_name = 'message') = 'text' THEN
+        ALTER TABLE stock_management.events ALTER COLUMN message TYPE jsonb USING message::jsonb;
+    END IF;
+END;
+$$;
+
+ALTER TABLE stock_management.events
+    ADD COLUMN IF NOT EXISTS message_data BYTEA,
+    ADD COLUMN IF NOT EXISTS status VARCHAR(20) NOT NULL DEFAULT 'Processed',
+    ADD COLUMN IF NOT EXISTS published_at TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS publish_attempts INT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS next_publish_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS events_pending_idx ON stock_management.events (created_at) WHERE status = 'Pending';
+
+CREATE INDEX IF NOT EXISTS events_created_idx ON stock_management.events (created_at, event_id);
+CREATE INDEX IF NOT EXISTS events_type_created_idx ON stock_management.events (event_type, created_at, event_id);
+CREATE INDEX IF NOT EXISTS events_emitter_created_idx ON stock_management.events (emitter, created_at, event_id);
+
+CREATE INDEX IF NOT EXISTS events_payload_idx ON stock_management.events
+    USING GIN ((message -> 'payload') jsonb_path_ops);
+CREATE INDEX IF NOT EXISTS events_opaque_payload_idx ON stock_management.events (created_at, event_id)
+    WHERE message -> 'payload' IS NULL;
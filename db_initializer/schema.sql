@@ -1,7 +1,5 @@
 
 
-DROP SCHEMA IF EXISTS stock_management CASCADE;
-
 CREATE SCHEMA IF NOT EXISTS stock_management;
 
 CREATE TABLE IF NOT EXISTS stock_management.product (
@@ -103,10 +101,101 @@ CREATE TABLE IF NOT EXISTS stock_management.issue (
     severity VARCHAR(50)
 );
 
+-- Monthly partitions on created_at, kept ahead and retired by common/events/event_partitions.py
 CREATE TABLE IF NOT EXISTS stock_management.events (
-    event_id VARCHAR(20) PRIMARY KEY,
+    event_id VARCHAR(20),
     event_type VARCHAR(255),
     emitter VARCHAR(255),
-    message TEXT,
-    created_at TIMESTAMP
+    message JSONB,
+    -- Set instead of message for rows written with EVENT_MESSAGE_FORMAT=compact, see common/events/event_codec.py
+    message_data BYTEA,
+    created_at TIMESTAMP,
+    status VARCHAR(20) NOT NULL DEFAULT 'Processed',
+    published_at TIMESTAMP,
+    -- Retryable publish failures of Pending rows, see common/events/outbox_relay.py
+    publish_attempts INT NOT NULL DEFAULT 0,
+    next_publish_at TIMESTAMP,
+    PRIMARY KEY (event_id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Catches rows no monthly partition covers yet, so an event insert never fails for a missing month
+CREATE TABLE IF NOT EXISTS stock_management.events_default PARTITION OF stock_management.events DEFAULT;
+
+CREATE INDEX IF NOT EXISTS events_pending_idx ON stock_management.events (created_at) WHERE status = 'Pending';
+
+-- Keyset pages of common/events/event_query.py, one index per filter, each ending in the page order
+CREATE INDEX IF NOT EXISTS events_created_idx ON stock_management.events (created_at, event_id);
+CREATE INDEX IF NOT EXISTS events_type_created_idx ON stock_management.events (event_type, created_at, event_id);
+CREATE INDEX IF NOT EXISTS events_emitter_created_idx ON stock_management.events (emitter, created_at, event_id);
+
+-- Payload containment searches (message -> 'payload' @> ...), jsonb_path_ops keeps the index small
+CREATE INDEX IF NOT EXISTS events_payload_idx ON stock_management.events
+    USING GIN ((message -> 'payload') jsonb_path_ops);
+-- Rows the payload index cannot see, compact and claim-checked ones, for searches that must not miss them
+CREATE INDEX IF NOT EXISTS events_opaque_payload_idx ON stock_management.events (created_at, event_id)
+    WHERE message -> 'payload' IS NULL;
+
+-- Creates the partition of the month of `month` unless it exists, rows of that month are moved out of the
+-- default partition first. Returns whether it was created.
+CREATE OR REPLACE FUNCTION stock_management.create_events_partition(month DATE) RETURNS BOOLEAN AS $$
+DECLARE
+    month_start DATE := date_trunc('month', month);
+    month_end DATE := date_trunc('month', month) + INTERVAL '1 month';
+    partition_name TEXT := 'events_p' || to_char(month, 'YYYYMM');
+BEGIN
+    IF to_regclass('stock_management.' || partition_name) IS NOT NULL THEN
+        RETURN FALSE;
+    END IF;
+    EXECUTE format('CREATE TABLE stock_management.%I (LIKE stock_management.events INCLUDING DEFAULTS)',
+                   partition_name);
+    EXECUTE format('WITH moved AS (DELETE FROM stock_management.events_default '
+                   'WHERE created_at >= %L AND created_at < %L RETURNING *) '
+                   'INSERT INTO stock_management.%I SELECT * FROM moved', month_start, month_end, partition_name);
+    EXECUTE format('ALTER TABLE stock_management.events ATTACH PARTITION stock_management.%I '
+                   'FOR VALUES FROM (%L) TO (%L)', partition_name, month_start, month_end);
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- The current month and the next three, event_partitions.py keeps creating them ahead
+SELECT stock_management.create_events_partition((now() + make_interval(months => months_ahead))::DATE)
+FROM generate_series(0, 3) AS months_ahead;
+
+-- Progress of the event replay (persistence-service/replay.py), one row per phase and partition
+CREATE TABLE IF NOT EXISTS stock_management.replay_checkpoints (
+    replay_id VARCHAR(64),
+    phase VARCHAR(50),
+    partition_no INT,
+    partitions INT NOT NULL,
+    last_created_at TIMESTAMP,
+    last_event_id VARCHAR(20),
+    replayed_events BIGINT NOT NULL DEFAULT 0,
+    completed BOOLEAN NOT NULL DEFAULT FALSE,
+    snapshot_horizon TIMESTAMP,
+    updated_at TIMESTAMP,
+    PRIMARY KEY (replay_id, phase, partition_no)
+);
+
+-- Projection state per aggregate, each row covers the aggregate's events up to last_event_id
+CREATE TABLE IF NOT EXISTS stock_management.aggregate_snapshots (
+    aggregate_type VARCHAR(50),
+    aggregate_id VARCHAR(20),
+    event_count INT,
+    last_event_id VARCHAR(20) NOT NULL,
+    last_created_at TIMESTAMP,
+    state TEXT NOT NULL,
+    created_at TIMESTAMP,
+    PRIMARY KEY (aggregate_type, aggregate_id, event_count)
 );
+
+-- Wakes the outbox relay workers, notifications are sent on commit and collapse to one per transaction
+CREATE OR REPLACE FUNCTION stock_management.notify_pending_event() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('stock_management_events', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS events_pending_notify ON stock_management.events;
+CREATE TRIGGER events_pending_notify AFTER INSERT ON stock_management.events
+    FOR EACH ROW WHEN (NEW.status = 'Pending') EXECUTE FUNCTION stock_management.notify_pending_event();
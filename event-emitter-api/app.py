@@ -1,12 +1,12 @@
-import json
 import traceback
-from typing import Callable
+from typing import Any, Callable
 
 from common.api_responses import FAILED_TO_PUBLISH_TO_SNS_RESPONSE, SUCCESS_RESPONSE, INVALID_ENDPOINT_RESPONSE, \
     NOT_SUPPORTED_YET_RESPONSE
 from common.events.event_manager import EventManager
 from common.events.events import EventType
 from common.utils.logger import get_logger
+from common.utils.query_metrics import flushes_query_metrics
 from validation.validator import validate_request, validate_create_purchase_order_payload, \
     validate_create_sales_order_payload, \
     ValidationResult, validate_create_product_payload, validate_create_customer_payload, \
@@ -15,9 +15,9 @@ from validation.validator import validate_request, validate_create_purchase_orde
 
 class EventConfig():
     event_type: EventType
-    validator: Callable[[str], ValidationResult]
+    validator: Callable[[Any], ValidationResult]
 
-    def __init__(self, event_type: EventType, validator: Callable[[str], ValidationResult]):
+    def __init__(self, event_type: EventType, validator: Callable[[Any], ValidationResult]):
         self.event_type = event_type
         self.validator = validator
 
@@ -27,6 +27,7 @@ EMITTER_NAME = 'EVENT_EMITTER'
 logger = get_logger(__name__)
 
 
+@flushes_query_metrics
 def lambda_handler(event, context, event_manager=None):
     logger.info("Starting lambda_handler")
     logger.info(f"Received event: {event}")
@@ -34,6 +35,14 @@ def lambda_handler(event, context, event_manager=None):
     if event_manager is None:
         event_manager = EventManager()
 
+    try:
+        return _handle_event(event, event_manager)
+    finally:
+        # Background publishes must finish before the handler returns, a frozen Lambda would drop them
+        event_manager.flush()
+
+
+def _handle_event(event, event_manager):
     validation_result = validate_request(event)
     if not validation_result:
         logger.error(f"Invalid request, {validation_result.response}")
@@ -46,12 +55,12 @@ def lambda_handler(event, context, event_manager=None):
     if not event_config:
         logger.error(f"Endpoint not found: {path}")
         return INVALID_ENDPOINT_RESPONSE
-    is_event_valid_result = event_config.validator(event['body'])
+    is_event_valid_result = event_config.validator(validation_result.payload)
     if not is_event_valid_result:
         logger.error(f"Invalid event: {is_event_valid_result.response}")
         return is_event_valid_result.response
     logger.info(f"Event is valid: {is_event_valid_result}")
-    request_data = json.loads(event['body'])
+    request_data = validation_result.payload
     logger.info(f"Publishing to SNS:{event_config}: {request_data}")
     try:
         event_manager.send_event(request_data, event_config.event_type, EMITTER_NAME)
@@ -0,0 +1,91 @@
+import io
+from typing import Any, Iterable, Sequence
+
+from common.utils import json_codec
+
+COPY_FORMAT_CSV = 'csv'
+COPY_FORMAT_BINARY = 'binary'
+COPY_FORMATS = (COPY_FORMAT_CSV, COPY_FORMAT_BINARY)
+DEFAULT_COPY_BUFFER_SIZE = 64 * 1024
+
+
+def to_csv_field(value: Any) -> str:
+    """
+        NULL is written as an unquoted empty field, every other value quoted, so empty strings survive.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        value = json_codec.dumps(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class CopyInStream:
+    """
+        File-like reader feeding COPY ... FROM STDIN. Pulls from `source` only as fast as Postgres reads,
+        so at most about `buffer_size` bytes are held in memory. With the csv format `source` yields row
+        tuples, with the binary format it yields raw COPY BINARY chunks, e.g. from a binary copy_out.
+    """
+
+    def __init__(self, source: Iterable, copy_format=COPY_FORMAT_CSV, buffer_size=DEFAULT_COPY_BUFFER_SIZE):
+        if copy_format not in COPY_FORMATS:
+            raise ValueError(f"Unsupported COPY format: {copy_format}")
+        self._source = iter(source)
+        self._copy_format = copy_format
+        self._buffer_size = buffer_size
+        self._buffer = bytearray()
+
+    def read(self, size=-1):
+        size = self._buffer_size if size is None or size < 0 else size
+        while len(self._buffer) < size:
+            chunk = next(self._source, None)
+            if chunk is None:
+                break
+            self._buffer += self._encode(chunk)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+    def _encode(self, chunk) -> bytes:
+        if self._copy_format == COPY_FORMAT_BINARY:
+            return bytes(chunk)
+        return (','.join(to_csv_field(value) for value in chunk) + '\n').encode('utf-8')
+
+
+class CopyOutBuffer:
+    """
+        Collects the rows COPY ... TO STDOUT hands over one by one and passes them to `sink` in writes of
+        about `buffer_size` bytes. Text sinks (io.TextIOBase) receive str, anything else bytes.
+    """
+
+    def __init__(self, sink, buffer_size=DEFAULT_COPY_BUFFER_SIZE):
+        self._sink = sink
+        self._text = isinstance(sink, io.TextIOBase)
+        self._buffer_size = buffer_size
+        self._buffer = bytearray()
+
+    def write(self, data: bytes):
+        self._buffer += data
+        if len(self._buffer) >= self._buffer_size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self._buffer:
+            self._sink.write(self._buffer.decode('utf-8') if self._text else bytes(self._buffer))
+            self._buffer.clear()
+
+
+def copy_options(copy_format: str, header: bool = False) -> str:
+    if copy_format not in COPY_FORMATS:
+        raise ValueError(f"Unsupported COPY format: {copy_format}")
+    if copy_format == COPY_FORMAT_CSV and header:
+        return f"(FORMAT {copy_format}, HEADER true)"
+    return f"(FORMAT {copy_format})"
+
+
+def split_identifier(name: str) -> Sequence[str]:
+    return tuple(name.split('.'))
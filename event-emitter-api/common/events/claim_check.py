@@ -0,0 +1,98 @@
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from common.clients.blob_store import BlobStore, get_blob_store
+from common.events.event_codec import decode_event_message
+from common.utils import json_codec
+from common.utils.logger import get_logger
+
+DEFAULT_CLAIM_CHECK_THRESHOLD_BYTES = 64 * 1024
+DEFAULT_CLAIM_CHECK_CACHE_SIZE = 64
+CLAIM_CHECK_KEY = "claim_check"
+CLAIM_CHECK_ENCODING = "zlib"
+
+logger = get_logger(__name__)
+
+
+class ClaimCheck:
+    """
+        Moves messages above `threshold_bytes` into a blob store, zlib compressed and keyed by their
+        SHA-256, so identical payloads are stored once. The message is replaced by a reference that keeps
+        the event_type, so consumers can route before resolving it. Resolved messages are kept in a
+        small LRU cache.
+    """
+
+    def __init__(self, blob_store: BlobStore, threshold_bytes=DEFAULT_CLAIM_CHECK_THRESHOLD_BYTES,
+                 cache_size=DEFAULT_CLAIM_CHECK_CACHE_SIZE):
+        self.blob_store = blob_store
+        self.threshold_bytes = threshold_bytes
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def from_environment() -> Optional['ClaimCheck']:
+        blob_store = get_blob_store()
+        if blob_store is None:
+            return None
+        return ClaimCheck(
+            blob_store,
+            threshold_bytes=int(os.environ.get('CLAIM_CHECK_THRESHOLD_BYTES', DEFAULT_CLAIM_CHECK_THRESHOLD_BYTES)),
+            cache_size=int(os.environ.get('CLAIM_CHECK_CACHE_SIZE', DEFAULT_CLAIM_CHECK_CACHE_SIZE)))
+
+    def offload(self, message_json: str, event_type: str) -> str:
+        data = message_json.encode('utf-8')
+        if len(data) <= self.threshold_bytes:
+            return message_json
+        key = hashlib.sha256(data).hexdigest()
+        self.blob_store.put(key, zlib.compress(data))
+        self._remember(key, message_json)
+        logger.info(f"Offloaded {len(data)} byte {event_type} message to claim check {key}")
+        return json_codec.dumps({
+            "event_type": event_type,
+            CLAIM_CHECK_KEY: {"key": key, "encoding": CLAIM_CHECK_ENCODING, "size": len(data)}
+        })
+
+    def resolve(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+            Returns the original message for a claim check reference, any other message unchanged.
+        """
+        reference = message.get(CLAIM_CHECK_KEY)
+        if not reference:
+            return message
+        key = reference["key"]
+        with self._lock:
+            message_json = self._cache.get(key)
+            if message_json is not None:
+                self._cache.move_to_end(key)
+        if message_json is None:
+            message_json = zlib.decompress(self.blob_store.get(key)).decode('utf-8')
+            self._remember(key, message_json)
+        return json_codec.loads(message_json)
+
+    def _remember(self, key, message_json):
+        with self._lock:
+            self._cache[key] = message_json
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+def resolve_message(claim_check: Optional[ClaimCheck], message: Dict[str, Any]) -> Dict[str, Any]:
+    if claim_check is None and message.get(CLAIM_CHECK_KEY):
+        raise ValueError("Received a claim check reference but no blob store is configured")
+    return claim_check.resolve(message) if claim_check else message
+
+
+def load_event_message(message: Any, message_data: Optional[bytes] = None,
+                       claim_check: ClaimCheck = None) -> Dict[str, Any]:
+    """
+        Parses an events row into the message dict published for it, resolving claim checks.
+    """
+    if message_data is None and isinstance(message, dict):
+        return resolve_message(claim_check, message)
+    return resolve_message(claim_check, json_codec.loads(decode_event_message(message, message_data)))
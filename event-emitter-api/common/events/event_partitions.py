@@ -0,0 +1,148 @@
+import gzip
+import os
+import re
+import tempfile
+from datetime import date
+from typing import List, Optional
+
+from common.clients.blob_store import BlobStore, LocalBlobStore, S3BlobStore
+from common.clients.copy_stream import COPY_FORMAT_CSV
+from common.clients.rds_client import RdsClient
+from common.events.events import EventStatus
+from common.utils.logger import get_logger
+
+DEFAULT_EVENTS_PARTITION_MONTHS_AHEAD = 3
+DEFAULT_EVENTS_ARCHIVE_PREFIX = 'events-archive/'
+# Attaching and detaching wait for the readers of events, and every later statement on it waits behind them
+DEFAULT_EVENTS_PARTITION_LOCK_TIMEOUT_MS = 5000
+# The gzipped month stays in memory up to this size and spills to a temporary file beyond it
+DEFAULT_EVENTS_ARCHIVE_SPOOL_BYTES = 8 * 1024 * 1024
+
+# Monthly partitions are named after their first day, see stock_management.create_events_partition()
+EVENTS_PARTITION_NAME = re.compile(r'^events_p(\d{4})(\d{2})$')
+
+SET_LOCK_TIMEOUT_QUERY = "SET LOCAL lock_timeout = %s"
+CREATE_PARTITION_QUERY = "SELECT stock_management.create_events_partition(%s)"
+SELECT_PARTITIONS_QUERY = (
+    "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+    "WHERE pg_inherits.inhparent = 'stock_management.events'::regclass ORDER BY child.relname"
+)
+COUNT_PENDING_QUERY = "SELECT count(*) FROM stock_management.{partition} WHERE status = %s"
+ARCHIVE_PARTITION_QUERY = "SELECT * FROM stock_management.{partition} ORDER BY created_at, event_id"
+DETACH_PARTITION_QUERY = "ALTER TABLE stock_management.events DETACH PARTITION stock_management.{partition}"
+DROP_PARTITION_QUERY = "DROP TABLE stock_management.{partition}"
+
+logger = get_logger(__name__)
+
+
+def add_months(day: date, months: int) -> date:
+    """
+        First day of the month `months` after the month of `day`.
+    """
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_month(partition: str) -> Optional[date]:
+    match = EVENTS_PARTITION_NAME.match(partition)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+class EventPartitionManager:
+    """
+        Keeps the monthly partitions of stock_management.events ahead of the clock and, when
+        `retention_months` is set, archives the months that fell out of it to `archive_store` as
+        gzipped CSV before dropping them. Replays and snapshot rebuilds only see the retained months.
+    """
+
+    def __init__(self, rds_client: RdsClient, archive_store: BlobStore = None,
+                 months_ahead=DEFAULT_EVENTS_PARTITION_MONTHS_AHEAD, retention_months: int = None,
+                 lock_timeout_ms=DEFAULT_EVENTS_PARTITION_LOCK_TIMEOUT_MS):
+        if retention_months is not None and archive_store is None:
+            raise ValueError("Events retention needs an archive store, old partitions are never dropped unarchived")
+        self.rds_client = rds_client
+        self.archive_store = archive_store
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.lock_timeout_ms = lock_timeout_ms
+
+    @classmethod
+    def from_environment(cls, rds_client: RdsClient) -> 'EventPartitionManager':
+        """
+            EVENTS_ARCHIVE_BUCKET (or EVENTS_ARCHIVE_DIR) selects the archive, EVENTS_RETENTION_MONTHS
+            enables retention. Without it every month is kept.
+        """
+        if os.environ.get('EVENTS_ARCHIVE_BUCKET'):
+            archive_store = S3BlobStore(os.environ['EVENTS_ARCHIVE_BUCKET'],
+                                        os.environ.get('EVENTS_ARCHIVE_PREFIX', DEFAULT_EVENTS_ARCHIVE_PREFIX))
+        elif os.environ.get('EVENTS_ARCHIVE_DIR'):
+            archive_store = LocalBlobStore(os.environ['EVENTS_ARCHIVE_DIR'])
+        else:
+            archive_store = None
+        retention_months = os.environ.get('EVENTS_RETENTION_MONTHS')
+        return cls(rds_client, archive_store,
+                   int(os.environ.get('EVENTS_PARTITION_MONTHS_AHEAD', DEFAULT_EVENTS_PARTITION_MONTHS_AHEAD)),
+                   int(retention_months) if retention_months else None)
+
+    def maintain(self, today: date = None):
+        today = today if today else date.today()
+        return self.create_partitions(today), self.apply_retention(today)
+
+    def create_partitions(self, today: date = None) -> List[date]:
+        """
+            Creates the partitions of the current month and the `months_ahead` next ones that are
+            missing, returns their months. Creating ahead leaves later runs time to retry one that
+            timed out waiting for its locks.
+        """
+        today = today if today else date.today()
+        created = []
+        for months in range(self.months_ahead + 1):
+            month = add_months(today, months)
+            # Runs on the primary, a bare SELECT would be routed to a replica
+            with self.rds_client.transaction() as transaction:
+                transaction.execute(SET_LOCK_TIMEOUT_QUERY, (self.lock_timeout_ms,))
+                if transaction.execute(CREATE_PARTITION_QUERY, (month,))[0][0]:
+                    created.append(month)
+        if created:
+            logger.info(f"Created events partitions for {', '.join(str(month) for month in created)}")
+        return created
+
+    def apply_retention(self, today: date = None) -> List[str]:
+        """
+            Archives and drops the partitions whose whole month is older than `retention_months`.
+            Partitions still holding Pending events wait until the outbox relay published them.
+            Returns the archived partitions.
+        """
+        if self.retention_months is None:
+            return []
+        cutoff = add_months(today if today else date.today(), -self.retention_months)
+        with self.rds_client.transaction() as transaction:
+            partitions = [row[0] for row in transaction.execute(SELECT_PARTITIONS_QUERY)]
+        archived = []
+        for partition in partitions:
+            month = partition_month(partition)
+            if month is not None and add_months(month, 1) <= cutoff and self._archive(partition):
+                archived.append(partition)
+        return archived
+
+    def _archive(self, partition: str) -> bool:
+        # The copy runs before the detach, the lock on events is only held for detaching and dropping
+        with self.rds_client.transaction() as transaction:
+            pending = transaction.execute(COUNT_PENDING_QUERY.format(partition=partition),
+                                          (EventStatus.Pending.name,))[0][0]
+            if pending:
+                logger.warning(f"Keeping events partition {partition}, {pending} events are still pending")
+                return False
+            with tempfile.SpooledTemporaryFile(max_size=DEFAULT_EVENTS_ARCHIVE_SPOOL_BYTES) as archive:
+                with gzip.GzipFile(fileobj=archive, mode='wb') as archive_file:
+                    # Copying a whole month outlasts the client's statement timeout
+                    row_count = self.rds_client.copy_out(ARCHIVE_PARTITION_QUERY.format(partition=partition),
+                                                         archive_file, copy_format=COPY_FORMAT_CSV, header=True,
+                                                         timeout_ms=0)
+                archive.seek(0)
+                self.archive_store.put_file(f"{partition}.csv.gz", archive)
+            transaction.execute(SET_LOCK_TIMEOUT_QUERY, (self.lock_timeout_ms,))
+            transaction.execute(DETACH_PARTITION_QUERY.format(partition=partition))
+            transaction.execute(DROP_PARTITION_QUERY.format(partition=partition))
+        logger.info(f"Archived events partition {partition}, {row_count} events")
+        return True
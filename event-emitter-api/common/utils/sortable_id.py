@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List
+
+# Lowercase Crockford base32, ascending in ASCII and in the usual database collations
+ALPHABET = '0123456789abcdefghjkmnpqrstvwxyz'
+TIMESTAMP_CHARS = 9
+RANDOM_CHARS = 6
+# Fits the VARCHAR(20) keys with the longest prefixes ("prod_", "evnt_")
+ID_LENGTH = TIMESTAMP_CHARS + RANDOM_CHARS
+
+_RANDOM_BITS = 5 * RANDOM_CHARS
+_RANDOM_LIMIT = 1 << _RANDOM_BITS
+# A fresh millisecond starts in the lower half, so increments within it practically never overflow
+_RANDOM_START_LIMIT = _RANDOM_LIMIT >> 1
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        chars.append(ALPHABET[index])
+    return ''.join(reversed(chars))
+
+
+class SortableIdGenerator:
+    """
+        ULID-style identifiers: 9 characters of millisecond timestamp (good until the year 3084) followed
+        by 6 characters of randomness. Ids of one generator are strictly increasing: within a millisecond
+        the random part is incremented instead of redrawn, and if the clock goes backwards the last
+        timestamp is reused. Across processes ids are ordered by time to the millisecond.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._last_random = 0
+
+    def new_id(self, prefix: str = '') -> str:
+        return self.new_ids(prefix, 1)[0]
+
+    def new_ids(self, prefix: str, count: int) -> List[str]:
+        """
+            Reserves `count` consecutive ids under one lock, e.g. for the positions of an order.
+        """
+        ids = []
+        with self._lock:
+            for _ in range(count):
+                ms, random_part = self._next()
+                ids.append(prefix + _encode(ms, TIMESTAMP_CHARS) + _encode(random_part, RANDOM_CHARS))
+        return ids
+
+    def _next(self):
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > self._last_ms:
+            self._last_ms = now_ms
+            self._last_random = int.from_bytes(os.urandom(4), 'big') % _RANDOM_START_LIMIT
+        else:
+            self._last_random += 1
+            if self._last_random == _RANDOM_LIMIT:
+                # Borrow the next millisecond, the generator catches up with the clock shortly
+                self._last_ms += 1
+                self._last_random = int.from_bytes(os.urandom(4), 'big') % _RANDOM_START_LIMIT
+        return self._last_ms, self._last_random
+
+
+_generator = SortableIdGenerator()
+
+
+def new_id(prefix: str = '') -> str:
+    return _generator.new_id(prefix)
+
+
+def new_ids(prefix: str, count: int) -> List[str]:
+    return _generator.new_ids(prefix, count)
+
+
+def id_timestamp(identifier: str) -> datetime:
+    """
+        The creation time encoded in an id, for range scans on the key. Only valid for ids of this module.
+    """
+    encoded = identifier[-ID_LENGTH:][:TIMESTAMP_CHARS]
+    ms = 0
+    for char in encoded:
+        ms = ms * 32 + ALPHABET.index(char)
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
@@ -74,6 +74,18 @@ class TestLambdaHandler(unittest.TestCase):
         response = lambda_handler(event, None, event_manager=event_manager_mock)
         self.assertEqual(response, SUCCESS_RESPONSE)
         event_manager_mock.send_event.assert_called()
+        event_manager_mock.flush.assert_called_once()
+
+    def test_background_publishes_drained_when_send_event_fails(self, event_manager_mock):
+        event_manager_mock.send_event.side_effect = Exception("DB down")
+        event = {
+            'httpMethod': 'POST',
+            'path': '/product',
+            'body': json.dumps({"name": "test_product"})
+        }
+        response = lambda_handler(event, None, event_manager=event_manager_mock)
+        self.assertEqual(500, response['statusCode'])
+        event_manager_mock.flush.assert_called_once()
 
     def test_valid_request_create_product(self, event_manager_mock):
         product_request_payload = {
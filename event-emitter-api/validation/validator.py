@@ -1,4 +1,3 @@
-import json
 from datetime import datetime, timezone
 
 import jsonschema
@@ -8,6 +7,7 @@ from jsonschema.validators import Draft7Validator
 
 from common.api_responses import INVALID_REQUEST_METHOD_RESPONSE, INVALID_JSON_PAYLOAD_RESPONSE, \
     response_with_custom_message
+from common.utils import json_codec
 from common.utils.logger import get_logger
 from validation.payload_schemas import product_schema, purchase_order_schema, supplier_schema, inventory_schema
 
@@ -16,9 +16,11 @@ logger = get_logger(__name__)
 
 class ValidationResult:
 
-    def __init__(self, is_valid, response):
+    def __init__(self, is_valid, response, payload=None):
         self.is_valid = is_valid
         self.response = response
+        # The parsed request body, so the handler and the payload validators do not decode it again
+        self.payload = payload
         logger.info(f"Validation result: {self}")
 
     def __str__(self):
@@ -45,13 +47,20 @@ def is_future_datetime(date):
     return date > current_time
 
 
+def parse_payload(payload):
+    """
+        Validators accept the raw JSON body or the body validate_request already parsed.
+    """
+    return json_codec.loads(payload) if isinstance(payload, (str, bytes, bytearray)) else payload
+
+
 def validate_payload(payload_json, schema):
     if not payload_json:
         return ValidationResult(False, INVALID_JSON_PAYLOAD_RESPONSE)
     try:
-        payload = json.loads(payload_json)
+        payload = parse_payload(payload_json)
         jsonschema.validate(payload, schema)
-        return ValidationResult(True, None)
+        return ValidationResult(True, None, payload)
     except ValidationError as e:
         return ValidationResult(False, response_with_custom_message(str(e)))
 
@@ -69,18 +78,18 @@ def validate_create_supplier_payload(payload):
 
 
 def validate_purchase_order_positions_delivery_dates(payload_json):
-    payload = json.loads(payload_json)
+    payload = parse_payload(payload_json)
     for order_position in payload['order_positions']:
         date_object = parser.isoparse(order_position["delivery_date"])
         if not is_future_datetime(date_object):
             return ValidationResult(False, response_with_custom_message("Delivery date must be in future"))
-    return ValidationResult(True, None)
+    return ValidationResult(True, None, payload)
 
 
 def validate_create_purchase_order_payload(payload_json):
     purchase_order_validation = validate_payload(payload_json, purchase_order_schema)
     if purchase_order_validation.is_valid:
-        return validate_purchase_order_positions_delivery_dates(payload_json)
+        return validate_purchase_order_positions_delivery_dates(purchase_order_validation.payload)
     return purchase_order_validation
 
 
@@ -99,9 +108,9 @@ def validate_request(event) -> ValidationResult:
         return ValidationResult(False, INVALID_REQUEST_METHOD_RESPONSE)
 
     try:
-        json.loads(event.get('body', None))
+        payload = json_codec.loads(event.get('body', None))
     except Exception as e:
         logger.error(f"Failed to parse JSON payload: {str(e)}")
         return ValidationResult(False, INVALID_JSON_PAYLOAD_RESPONSE)
 
-    return ValidationResult(True, None)
+    return ValidationResult(True, None, payload)
@@ -5,9 +5,10 @@ import sys
 import traceback
 from datetime import datetime
 
-import boto3
 import psycopg2
 
+from common.clients.secret_provider import get_secret_provider
+
 now = datetime.now()
 timestamp = datetime.timestamp(now)
 formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -38,26 +39,17 @@ def get_logger(name):
 
 logger = get_logger(__name__)
 
+secret_provider = get_secret_provider(os.environ.get("DB_SECRET_NAME", "DBSecretD58955BC-UVVkK4RmuFL7"))
+
 
 def lambda_handler(event, context):
     try:
         logger.info("Starting lambda")
-        secret_string = pull_secret_string()
-        secret_dict = json.loads(secret_string)
-        username = secret_dict.get("username")
-        password = secret_dict.get("password")
-        logger.info("Successfully pulled db credentials")
         table_name = event['table_name']
         limit = event.get("limit", 10)
         query = f"SELECT * FROM stock_management.{table_name} LIMIT {limit}"
 
-        conn = psycopg2.connect(
-            host=os.environ['DB_HOST'],
-            port=os.environ.get('DB_PORT', '5432'),
-            user=username,
-            password=password,
-            database=os.environ['DB_NAME']
-        )
+        conn = secret_provider.with_credentials(connect)
         logger.info(f"Connected to db on {os.environ['DB_HOST']}")
         cursor = conn.cursor()
         cursor.execute(query)
@@ -84,15 +76,12 @@ def lambda_handler(event, context):
         }
 
 
-def pull_secret_string():
-    secret_name = os.environ.get("DB_SECRET_NAME", "DBSecretD58955BC-UVVkK4RmuFL7")
-    client = boto3.client('secretsmanager')
-    logger.info(f"Pulling secret: {secret_name}")
-    try:
-        response = client.get_secret_value(SecretId=secret_name)
-        logger.info("received response from secret manager")
-    except Exception as e:
-        print(f"Error retrieving secret: {e}")
-        raise e
-    secret_string = response['SecretString']
-    return secret_string
+def connect(credentials):
+    logger.info("Successfully pulled db credentials")
+    return psycopg2.connect(
+        host=os.environ['DB_HOST'],
+        port=os.environ.get('DB_PORT', '5432'),
+        user=credentials.get("username"),
+        password=credentials.get("password"),
+        database=os.environ['DB_NAME']
+    )
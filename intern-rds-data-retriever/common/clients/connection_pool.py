@@ -0,0 +1,187 @@
+import threading
+import time
+from dataclasses import dataclass
+
+import psycopg2
+from psycopg2 import extensions
+
+from common.exceptions.pool_exhausted_exception import PoolExhaustedException
+from common.utils.logger import get_logger
+
+DEFAULT_BORROW_TIMEOUT_SECONDS = 5.0
+DEFAULT_HEALTH_CHECK_INTERVAL_SECONDS = 30.0
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class PoolStats:
+    size: int
+    idle: int
+    in_use: int
+    max_size: int
+    borrow_count: int
+    exhausted_count: int
+    reconnect_count: int
+    total_wait_seconds: float
+    max_wait_seconds: float
+
+    @property
+    def avg_wait_seconds(self) -> float:
+        return self.total_wait_seconds / self.borrow_count if self.borrow_count else 0.0
+
+
+class ConnectionPool:
+    """
+        Thread-safe drop-in for psycopg2's SimpleConnectionPool.
+        Idle connections are checked before being handed out and re-opened when stale
+        (e.g. after a Lambda freeze/thaw), and borrowers wait up to `timeout` seconds
+        for a free connection instead of failing straight away.
+    """
+
+    def __init__(self, minconn, maxconn, timeout=DEFAULT_BORROW_TIMEOUT_SECONDS,
+                 health_check_interval=DEFAULT_HEALTH_CHECK_INTERVAL_SECONDS, connection_factory=None,
+                 **connect_kwargs):
+        self.minconn = int(minconn)
+        self.maxconn = int(maxconn)
+        self.timeout = float(timeout)
+        self.health_check_interval = float(health_check_interval)
+        self._connect_kwargs = connect_kwargs
+        self._connection_factory = connection_factory if connection_factory else self._default_connection_factory
+        self._condition = threading.Condition()
+        self._idle = []
+        self._in_use = {}
+        self._size = 0
+        self._closed = False
+
+        self._borrow_count = 0
+        self._exhausted_count = 0
+        self._reconnect_count = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+        for _ in range(self.minconn):
+            self._idle.append((self._connection_factory(), time.monotonic()))
+            self._size += 1
+
+    def getconn(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        started_at = time.monotonic()
+        deadline = started_at + timeout
+        conn, last_used_at = self._reserve(deadline)
+        reconnected = False
+
+        try:
+            if conn is None:
+                conn = self._connection_factory()
+            elif not self._is_usable(conn, last_used_at):
+                logger.info("Replacing stale DB connection")
+                self._close_quietly(conn)
+                conn = self._connection_factory()
+                reconnected = True
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        waited = time.monotonic() - started_at
+        with self._condition:
+            self._in_use[id(conn)] = conn
+            self._borrow_count += 1
+            self._reconnect_count += int(reconnected)
+            self._total_wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+        return conn
+
+    def putconn(self, conn, close=False):
+        with self._condition:
+            if self._in_use.pop(id(conn), None) is None:
+                logger.warning("Trying to return a connection that is not borrowed from this pool")
+                return
+
+        if not close and not conn.closed:
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                close = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception as e:
+                    logger.warning(f"Failed to reset returned DB connection: {e}")
+                    close = True
+
+        with self._condition:
+            if close or self._closed or conn.closed:
+                self._close_quietly(conn)
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+
+    def closeall(self):
+        with self._condition:
+            self._closed = True
+            connections = [conn for conn, _ in self._idle] + list(self._in_use.values())
+            self._idle.clear()
+            self._in_use.clear()
+            self._size = 0
+            self._condition.notify_all()
+        for conn in connections:
+            self._close_quietly(conn)
+
+    def stats(self) -> PoolStats:
+        with self._condition:
+            return PoolStats(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+                max_size=self.maxconn,
+                borrow_count=self._borrow_count,
+                exhausted_count=self._exhausted_count,
+                reconnect_count=self._reconnect_count,
+                total_wait_seconds=self._total_wait_seconds,
+                max_wait_seconds=self._max_wait_seconds,
+            )
+
+    def _reserve(self, deadline):
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolExhaustedException("Connection pool is closed")
+                if self._idle:
+                    # LIFO keeps the most recently used connections warm and lets the rest go stale
+                    return self._idle.pop()
+                if self._size < self.maxconn:
+                    self._size += 1
+                    return None, None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._exhausted_count += 1
+                    raise PoolExhaustedException(
+                        f"No DB connection available within timeout, all {self.maxconn} are in use")
+                self._condition.wait(remaining)
+
+    def _is_usable(self, conn, last_used_at):
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used_at < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"DB connection health check failed: {e}")
+            return False
+
+    def _default_connection_factory(self):
+        return psycopg2.connect(**self._connect_kwargs)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
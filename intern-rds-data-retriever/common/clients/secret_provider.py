@@ -0,0 +1,161 @@
+import json
+import os
+import re
+import threading
+import time
+
+import boto3
+
+from common.utils.logger import get_logger
+
+DEFAULT_SECRET_TTL_SECONDS = 900
+DEFAULT_SECRET_REFRESH_AHEAD_SECONDS = 60
+AUTH_FAILURE_PG_CODES = ('28000', '28P01')
+AUTH_FAILURE_MESSAGES = ('password authentication failed', 'authentication failed')
+
+logger = get_logger(__name__)
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def is_auth_failure(error) -> bool:
+    if getattr(error, 'pgcode', None) in AUTH_FAILURE_PG_CODES:
+        return True
+    message = str(error).lower()
+    return any(auth_message in message for auth_message in AUTH_FAILURE_MESSAGES)
+
+
+def get_secret_provider(secret_name=None):
+    """
+        Returns the process-wide provider for `secret_name` (DB_SECRET_NAME by default),
+        so the cache survives across warm Lambda invocations.
+    """
+    secret_name = secret_name if secret_name else os.environ.get("DB_SECRET_NAME")
+    with _providers_lock:
+        if secret_name not in _providers:
+            _providers[secret_name] = SecretProvider(secret_name)
+        return _providers[secret_name]
+
+
+class SecretProvider:
+    """
+        Caches a Secrets Manager secret in memory for `ttl_seconds` and, when SECRET_CACHE_DIR
+        is set, in a file there so a new process in the same sandbox can skip the fetch.
+        Reads within `refresh_ahead_seconds` of expiry return the cached value and refresh it
+        on a background thread.
+    """
+
+    def __init__(self, secret_name, ttl_seconds=None, refresh_ahead_seconds=None, cache_dir=None,
+                 secrets_manager_client=None):
+        self.secret_name = secret_name
+        self.ttl_seconds = float(ttl_seconds if ttl_seconds is not None
+                                 else os.environ.get('SECRET_CACHE_TTL_SECONDS', DEFAULT_SECRET_TTL_SECONDS))
+        self.refresh_ahead_seconds = float(
+            refresh_ahead_seconds if refresh_ahead_seconds is not None
+            else os.environ.get('SECRET_REFRESH_AHEAD_SECONDS', DEFAULT_SECRET_REFRESH_AHEAD_SECONDS))
+        cache_dir = cache_dir if cache_dir else os.environ.get('SECRET_CACHE_DIR')
+        self.cache_file = os.path.join(cache_dir, self._cache_file_name(secret_name)) if cache_dir else None
+        self._secrets_manager_client = secrets_manager_client
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._secret_string = None
+        self._fetched_at = 0.0
+
+    def get_secret_string(self, force_refresh=False) -> str:
+        if force_refresh:
+            return self._refresh()
+
+        if self._secret_string is None:
+            self._load_cache_file()
+
+        age = time.time() - self._fetched_at
+        if self._secret_string is None or age >= self.ttl_seconds:
+            return self._refresh()
+        if age >= self.ttl_seconds - self.refresh_ahead_seconds:
+            self._refresh_in_background()
+        return self._secret_string
+
+    def get_secret_dict(self, force_refresh=False) -> dict:
+        return json.loads(self.get_secret_string(force_refresh))
+
+    def invalidate(self):
+        with self._lock:
+            self._secret_string = None
+            self._fetched_at = 0.0
+        if self.cache_file and os.path.exists(self.cache_file):
+            os.remove(self.cache_file)
+
+    def with_credentials(self, operation):
+        """
+            Calls `operation` with the secret as a dict. If it fails authenticating, the
+            secret may have been rotated, so it is called once more with a freshly fetched one.
+        """
+        try:
+            return operation(self.get_secret_dict())
+        except Exception as e:
+            if not is_auth_failure(e):
+                raise e
+            logger.warning(f"Authentication failed, retrying with refreshed secret {self.secret_name}")
+            return operation(self.get_secret_dict(force_refresh=True))
+
+    def _refresh(self) -> str:
+        with self._lock:
+            secret_string = self._fetch()
+            self._secret_string = secret_string
+            self._fetched_at = time.time()
+            self._write_cache_file()
+            return secret_string
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def refresh():
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.warning(f"Background refresh of secret {self.secret_name} failed: {e}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _fetch(self) -> str:
+        if self._secrets_manager_client is None:
+            self._secrets_manager_client = boto3.client('secretsmanager')
+        logger.info(f"Pulling secret: {self.secret_name}")
+        try:
+            response = self._secrets_manager_client.get_secret_value(SecretId=self.secret_name)
+        except Exception as e:
+            logger.error(f"Error retrieving secret: {e}")
+            raise e
+        return response['SecretString']
+
+    def _load_cache_file(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r") as cache_file:
+                cached = json.load(cache_file)
+            with self._lock:
+                self._secret_string = cached['secret_string']
+                self._fetched_at = float(cached['fetched_at'])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable secret cache file {self.cache_file}: {e}")
+
+    def _write_cache_file(self):
+        if not self.cache_file:
+            return
+        try:
+            fd = os.open(self.cache_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as cache_file:
+                json.dump({'secret_string': self._secret_string, 'fetched_at': self._fetched_at}, cache_file)
+        except Exception as e:
+            logger.warning(f"Failed to write secret cache file {self.cache_file}: {e}")
+
+    @staticmethod
+    def _cache_file_name(secret_name):
+        return f"secret-{re.sub(r'[^A-Za-z0-9_.-]', '_', str(secret_name))}.json"
@@ -0,0 +1,141 @@
+import logging
+import os
+
+from datetime import datetime
+
+from common.clients.rds_client import RdsClient
+from common.clients.sns_client import SnsClient
+from common.events.claim_check import ClaimCheck, load_event_message
+from common.events.event_codec import encode_event_message, get_event_message_format
+from common.events.event_query import EventPage, EventQuery, event_from_row
+from common.events.events import EventType, EventStatus
+from common.events.outbox_relay import OutboxRelay
+from common.exceptions.failed_to_retrieve_event_exception import FailedToRetrieveEventException
+from common.exceptions.failed_to_save_event_exception import FailedToSaveEventException
+from common.utils import json_codec
+from common.utils.sortable_id import new_id
+
+EVENT_ID_PREFIX = "evnt_"
+
+
+def sns_topic_map():
+    return {
+        EventType.NewProductScheduled: os.environ.get("NEW_PRODUCT_SCHEDULED_SNS_ARN"),
+        EventType.NewProductPersisted: os.environ.get("NEW_PRODUCT_PERSISTED_SNS_ARN"),
+        EventType.NewSalesOrderScheduled: os.environ.get("NEW_SALES_ORDER_SCHEDULED_SNS_ARN"),
+        EventType.NewDeliveryScheduled: os.environ.get("NEW_DELIVERY_SCHEDULED_SNS_ARN"),
+        EventType.NewDeliveryPersisted: os.environ.get("NEW_DELIVERY_PERSISTED_SNS_ARN"),
+        EventType.NewDispatchRequested: os.environ.get("DISPATCH_REQUESTED_SNS_ARN"),
+        EventType.UsageUpdateScheduled: os.environ.get("USAGE_UPDATE_SNS_ARN"),
+        EventType.NewPurchaseOrderScheduled: os.environ.get("NEW_PURCHASE_ORDER_SCHEDULED_SNS_ARN"),
+        EventType.NewPurchaseOrderPersisted: os.environ.get("NEW_PURCHASE_ORDER_PERSISTED_SNS_ARN"),
+        EventType.NewSupplierScheduled: os.environ.get("NEW_SUPPLIER_SCHEDULED_SNS_ARN"),
+        EventType.NewSupplierPersisted: os.environ.get("NEW_SUPPLIER_PERSISTED_SNS_ARN"),
+        EventType.NewCustomerScheduled: os.environ.get("NEW_CUSTOMER_SCHEDULED_SNS_ARN"),
+    }
+
+
+class EventManager:
+
+    def __init__(self, rds_client: RdsClient = None, sns_client: SnsClient = None, batch_publishing=False,
+                 background_publishing=None, outbox=False, claim_check: ClaimCheck = None, message_format=None):
+        """
+            With `batch_publishing`, events are buffered and published with PublishBatch. With
+            `background_publishing` (default: SNS_BACKGROUND_PUBLISHING=false), send_event writes the event row and
+            then starts the publish on the SnsClient's threads and returns its future, so the publish overlaps with
+            the rest of the invocation until flush() waits for it. With `outbox`, send_event only writes
+            a Pending event row, inside the caller's transaction(), and flush() relays it unless
+            OUTBOX_RELAY_ON_FLUSH=false leaves that to the standalone outbox relay worker.
+            In all three modes flush() must run before the Lambda invocation returns.
+            Messages above the claim check threshold (default: configured from the environment) are
+            stored in the blob store and only referenced in SNS and the events table.
+            `message_format` (default: EVENT_MESSAGE_FORMAT=json) selects how events rows are stored, see
+            event_codec; SNS always receives JSON.
+        """
+        self.rds_client = rds_client if rds_client else RdsClient()
+        self.sns_client = sns_client if sns_client else SnsClient()
+        self.batch_publishing = batch_publishing
+        self.background_publishing = background_publishing if background_publishing is not None \
+            else os.environ.get('SNS_BACKGROUND_PUBLISHING', 'false').lower() == 'true'
+        self.outbox = outbox
+        self.claim_check = claim_check if claim_check else ClaimCheck.from_environment()
+        self.message_format = message_format if message_format else get_event_message_format()
+        self.relay_outbox_on_flush = os.environ.get('OUTBOX_RELAY_ON_FLUSH', 'true').lower() == 'true'
+        self._outbox_event_ids = []
+        self.sns_map = sns_topic_map()
+        self.outbox_relay = OutboxRelay(self.rds_client, self.sns_client, self.sns_map)
+
+    def transaction(self):
+        """
+            Commits the domain writes and the events sent in the block at once, see RdsClient.transaction().
+        """
+        return self.rds_client.transaction()
+
+    def send_event(self, payload, event_type: EventType, emitter: str):
+        try:
+            message = {
+                "event_type": event_type.name,
+                "payload": payload
+            }
+            message_json = json_codec.dumps(message)
+            if self.claim_check:
+                message_json = self.claim_check.offload(message_json, event_type.name)
+            if self.outbox:
+                event_id = self.persist_event(emitter, event_type, message_json, EventStatus.Pending)
+                if self.relay_outbox_on_flush:
+                    self._outbox_event_ids.append(event_id)
+                return
+            sns_arn = self.sns_map.get(event_type)
+            self.persist_event(emitter, event_type, message_json)
+            if self.background_publishing:
+                return self.sns_client.publish_async(sns_arn, message_json)
+            if self.batch_publishing:
+                self.sns_client.queue_sns_message(sns_arn, message_json)
+            else:
+                self.sns_client.send_sns_message(sns_arn, message_json)
+        except Exception as e:
+            logging.error(f"Failed to insert event: {e}")
+            raise FailedToSaveEventException(e)
+
+    def flush(self):
+        """
+            Publishes the outbox rows and buffered events, waits for the background publishes and returns the failures.
+        """
+        failures = []
+        if self._outbox_event_ids:
+            event_ids, self._outbox_event_ids = self._outbox_event_ids, []
+            failures += self.outbox_relay.publish_pending(event_ids)
+        if self.batch_publishing or self.background_publishing:
+            failures += self.sns_client.flush()
+        return failures
+
+    def persist_event(self, emitter, event_type, message, status: EventStatus = EventStatus.Processed):
+        event_id = self._generate_unique_event_id()
+        message, message_data = encode_event_message(message, self.message_format)
+        insert_query = (
+            "INSERT INTO stock_management.events "
+            "(event_id, event_type, emitter, message, message_data, created_at, status) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s)"
+        )
+        params = (event_id, event_type.name, emitter, message, message_data, datetime.now(), status.name)
+        self.rds_client.execute(insert_query, params, prepare=True)
+        return event_id
+
+    def query_events(self, query: EventQuery) -> EventPage:
+        """
+            One page of the events matching `query`, oldest first, with decoded messages. Pass the page's
+            next_cursor as `after` of the next query to continue; plain reads may be served by a replica.
+        """
+        sql, params = query.to_sql()
+        try:
+            rows = self.rds_client.execute(sql, params)
+        except Exception as e:
+            logging.error(f"Failed to query events: {e}")
+            raise FailedToRetrieveEventException(e)
+        return EventPage([event_from_row(row, self._load_message) for row in rows], query.next_cursor(rows))
+
+    def _load_message(self, message, message_data):
+        return load_event_message(message, message_data, self.claim_check)
+
+    def _generate_unique_event_id(self):
+        return new_id(EVENT_ID_PREFIX)
@@ -0,0 +1,32 @@
+import os
+import signal
+
+from common.clients.rds_client import RdsClient
+from common.clients.sns_client import SnsClient
+from common.events.event_manager import sns_topic_map
+from common.events.outbox_relay import OutboxRelay, DEFAULT_OUTBOX_BATCH_SIZE
+from common.utils.logger import get_logger
+from relay_worker import OutboxRelayWorker, DEFAULT_POLL_INTERVAL_SECONDS
+
+logger = get_logger(__name__)
+
+
+def create_worker(rds_client: RdsClient = None, sns_client: SnsClient = None) -> OutboxRelayWorker:
+    rds_client = rds_client if rds_client else RdsClient()
+    relay = OutboxRelay(rds_client, sns_client if sns_client else SnsClient(), sns_topic_map(),
+                        batch_size=int(os.environ.get('OUTBOX_BATCH_SIZE', DEFAULT_OUTBOX_BATCH_SIZE)))
+    return OutboxRelayWorker(relay, rds_client.connect,
+                             poll_interval=float(os.environ.get('OUTBOX_POLL_INTERVAL_SECONDS',
+                                                                DEFAULT_POLL_INTERVAL_SECONDS)))
+
+
+def main():
+    worker = create_worker()
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+    worker.run()
+    logger.info("Outbox relay stopped")
+
+
+if __name__ == '__main__':
+    main()
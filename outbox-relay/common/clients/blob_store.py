@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO
+
+import boto3
+
+
+class BlobStore(ABC):
+    """
+        Write-once key/value store for large binary objects.
+    """
+
+    @abstractmethod
+    def put(self, key: str, data: bytes):
+        pass
+
+    @abstractmethod
+    def put_file(self, key: str, blob_file: BinaryIO):
+        """
+            Stores the rest of `blob_file` without reading it into memory.
+        """
+        pass
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        pass
+
+
+class LocalBlobStore(BlobStore):
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write and rename, so a concurrent reader never sees a partial blob
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as blob_file:
+            blob_file.write(data)
+        os.replace(blob_file.name, path)
+
+    def put_file(self, key, blob_file):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as stored_file:
+            shutil.copyfileobj(blob_file, stored_file)
+        os.replace(stored_file.name, path)
+
+    def get(self, key):
+        with open(self._path(key), 'rb') as blob_file:
+            return blob_file.read()
+
+    def _path(self, key):
+        return os.path.join(self.root_dir, key[:2], key)
+
+
+class S3BlobStore(BlobStore):
+
+    def __init__(self, bucket, prefix='', s3_client=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.s3_client = s3_client if s3_client else boto3.client('s3')
+
+    def put(self, key, data):
+        self.s3_client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def put_file(self, key, blob_file):
+        # Managed transfer, large files go up as a multipart upload one part at a time
+        self.s3_client.upload_fileobj(blob_file, self.bucket, self.prefix + key)
+
+    def get(self, key):
+        return self.s3_client.get_object(Bucket=self.bucket, Key=self.prefix + key)['Body'].read()
+
+
+def get_blob_store():
+    """
+        S3 when CLAIM_CHECK_BUCKET is set, the local filesystem when CLAIM_CHECK_DIR is set, else None.
+    """
+    if os.environ.get('CLAIM_CHECK_BUCKET'):
+        return S3BlobStore(os.environ['CLAIM_CHECK_BUCKET'], os.environ.get('CLAIM_CHECK_PREFIX', 'claim-checks/'))
+    if os.environ.get('CLAIM_CHECK_DIR'):
+        return LocalBlobStore(os.environ['CLAIM_CHECK_DIR'])
+    return None
@@ -0,0 +1,96 @@
+from common.utils.logger import get_logger
+
+DEFAULT_PIPELINE_MAX_QUEUED = 100
+
+logger = get_logger(__name__)
+
+
+class PipelineResult:
+
+    def __init__(self, query, params, timeout_ms=None):
+        self.query = query
+        self.params = params
+        self.timeout_ms = timeout_ms
+        self.done = False
+        self.rowcount = None
+        self.error = None
+
+    @property
+    def succeeded(self):
+        return self.done and self.error is None
+
+    def __str__(self):
+        return f"PipelineResult(query={self.query!r}, done={self.done}, error={self.error})"
+
+
+class Pipeline:
+    """
+        Queues statements and sends them to Postgres together, see RdsClient.pipeline().
+        psycopg2 has no libpq pipeline mode, so a flush joins the queued statements into one
+        multi-statement round trip behind a savepoint. If that fails, the statements are replayed
+        one by one so each result carries its own error; row counts are known only after a replay.
+        Each statement runs under its own statement timeout, `timeout_ms` unless execute() overrides it.
+    """
+
+    def __init__(self, conn, max_queued=DEFAULT_PIPELINE_MAX_QUEUED, raise_on_error=True, timeout_ms=None):
+        self.conn = conn
+        self.max_queued = max_queued
+        self.raise_on_error = raise_on_error
+        self.timeout_ms = timeout_ms
+        self._queue = []
+
+    def execute(self, query, params=None, timeout_ms=None) -> PipelineResult:
+        result = PipelineResult(query, params, self.timeout_ms if timeout_ms is None else timeout_ms)
+        self._queue.append(result)
+        if len(self._queue) >= self.max_queued:
+            self.flush()
+        return result
+
+    def flush(self):
+        queued, self._queue = self._queue, []
+        if not queued:
+            return queued
+
+        with self.conn.cursor() as cur:
+            statements = [cur.mogrify(result.query, result.params) for result in queued]
+            logger.debug(f"Flushing {len(queued)} pipelined statements")
+            batch = [b"SAVEPOINT pipeline"]
+            timeout_ms = None
+            for result, statement in zip(queued, statements):
+                # SET LOCAL holds for the rest of the transaction, so it is only repeated when the timeout changes
+                if result.timeout_ms is not None and result.timeout_ms != timeout_ms:
+                    timeout_ms = result.timeout_ms
+                    batch.append(self._statement_timeout_setup(timeout_ms))
+                batch.append(statement)
+            try:
+                cur.execute(b";\n".join(batch + [b"RELEASE SAVEPOINT pipeline"]))
+                for result in queued:
+                    result.done = True
+            except Exception as e:
+                logger.warning(f"Pipelined batch failed, replaying statements one by one: {e}")
+                cur.execute("ROLLBACK TO SAVEPOINT pipeline")
+                cur.execute("RELEASE SAVEPOINT pipeline")
+                for result, statement in zip(queued, statements):
+                    self._execute_one(cur, result, statement)
+
+        failed = [result for result in queued if result.error is not None]
+        if failed and self.raise_on_error:
+            raise failed[0].error
+        return queued
+
+    @staticmethod
+    def _statement_timeout_setup(timeout_ms):
+        return f"SET LOCAL statement_timeout = {int(timeout_ms)}".encode()
+
+    def _execute_one(self, cur, result, statement):
+        cur.execute("SAVEPOINT pipeline_statement")
+        try:
+            if result.timeout_ms is not None:
+                cur.execute(self._statement_timeout_setup(result.timeout_ms))
+            cur.execute(statement)
+            result.rowcount = cur.rowcount
+            cur.execute("RELEASE SAVEPOINT pipeline_statement")
+        except Exception as e:
+            result.error = e
+            cur.execute("ROLLBACK TO SAVEPOINT pipeline_statement")
+        result.done = True
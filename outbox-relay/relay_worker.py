@@ -0,0 +1,78 @@
+import select
+import threading
+
+from common.events.outbox_relay import OutboxRelay, OUTBOX_NOTIFY_CHANNEL
+from common.utils.logger import get_logger
+from common.utils.query_metrics import flush_query_metrics
+
+DEFAULT_POLL_INTERVAL_SECONDS = 10.0
+DEFAULT_RECONNECT_DELAY_SECONDS = 5.0
+
+logger = get_logger(__name__)
+
+
+class OutboxRelayWorker:
+    """
+        Long-running relay: drains the outbox, then sleeps on LISTEN until a Pending event is committed.
+        The poll interval is only a safety net for retryable failures and missed notifications.
+        Any number of workers can run side by side, FOR UPDATE SKIP LOCKED hands each row to one of them.
+    """
+
+    def __init__(self, relay: OutboxRelay, connection_factory, poll_interval=DEFAULT_POLL_INTERVAL_SECONDS,
+                 reconnect_delay=DEFAULT_RECONNECT_DELAY_SECONDS, channel=OUTBOX_NOTIFY_CHANNEL):
+        self.relay = relay
+        self.connection_factory = connection_factory
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+        self.channel = channel
+        self.stop_event = threading.Event()
+        self._listen_conn = None
+
+    def run(self):
+        logger.info(f"Outbox relay listening on {self.channel}")
+        while not self.stop_event.is_set():
+            try:
+                if self._listen_conn is None:
+                    self._listen_conn = self._listen()
+                self.drain()
+                self.wait_for_notification()
+            except Exception as e:
+                logger.error(f"Outbox relay failed, reconnecting in {self.reconnect_delay}s: {e}")
+                self._close_listen_connection()
+                self.stop_event.wait(self.reconnect_delay)
+        self._close_listen_connection()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def drain(self):
+        failures = self.relay.publish_pending()
+        if failures:
+            logger.warning(f"{len(failures)} outbox events not published in this round")
+        flush_query_metrics()
+        return failures
+
+    def wait_for_notification(self):
+        """
+            Blocks until a notification arrives or the poll interval passes. Several notifications are
+            collapsed, one drain covers them all.
+        """
+        ready, _, _ = select.select([self._listen_conn], [], [], self.poll_interval)
+        if ready:
+            self._listen_conn.poll()
+            self._listen_conn.notifies.clear()
+
+    def _listen(self):
+        conn = self.connection_factory()
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {self.channel}")
+        return conn
+
+    def _close_listen_connection(self):
+        if self._listen_conn is not None:
+            try:
+                self._listen_conn.close()
+            except Exception as e:
+                logger.warning(f"Failed to close LISTEN connection: {e}")
+            self._listen_conn = None
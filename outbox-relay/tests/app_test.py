@@ -0,0 +1,36 @@
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+import app
+
+
+class TestApp(unittest.TestCase):
+
+    @patch.dict(os.environ, {'OUTBOX_BATCH_SIZE': '25', 'OUTBOX_POLL_INTERVAL_SECONDS': '2',
+                             'NEW_PRODUCT_PERSISTED_SNS_ARN': 'product-topic'})
+    def test_create_worker(self):
+        rds_client, sns_client = MagicMock(), MagicMock()
+
+        worker = app.create_worker(rds_client, sns_client)
+
+        self.assertEqual(worker.relay.batch_size, 25)
+        self.assertEqual(worker.poll_interval, 2)
+        self.assertIs(worker.connection_factory, rds_client.connect)
+        self.assertIn('product-topic', worker.relay.sns_map.values())
+
+    @patch('app.signal.signal')
+    @patch('app.create_worker')
+    def test_main_stops_worker_on_sigterm(self, mock_create_worker, mock_signal):
+        worker = mock_create_worker.return_value
+
+        app.main()
+
+        worker.run.assert_called_once()
+        handler = mock_signal.call_args_list[0].args[1]
+        handler(None, None)
+        worker.stop.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
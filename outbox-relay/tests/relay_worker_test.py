@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from relay_worker import OutboxRelayWorker
+
+
+class TestOutboxRelayWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.relay = MagicMock()
+        self.relay.publish_pending.return_value = []
+        self.conn = MagicMock()
+        self.connection_factory = MagicMock(return_value=self.conn)
+        self.worker = OutboxRelayWorker(self.relay, self.connection_factory, poll_interval=5, reconnect_delay=0)
+
+    @patch('relay_worker.select.select')
+    def test_run_listens_and_drains_on_every_notification(self, mock_select):
+        def notify_twice_then_stop(*args):
+            if mock_select.call_count == 2:
+                self.worker.stop()
+            return [self.conn], [], []
+
+        mock_select.side_effect = notify_twice_then_stop
+
+        self.worker.run()
+
+        self.assertTrue(self.conn.autocommit)
+        self.conn.cursor.return_value.__enter__.return_value.execute.assert_called_once_with(
+            "LISTEN stock_management_events")
+        self.assertEqual(self.relay.publish_pending.call_count, 2)
+        mock_select.assert_called_with([self.conn], [], [], 5)
+        self.conn.notifies.clear.assert_called()
+        self.connection_factory.assert_called_once()
+        self.conn.close.assert_called_once()
+
+    @patch('relay_worker.select.select')
+    def test_run_reconnects_after_failure(self, mock_select):
+        self.relay.publish_pending.side_effect = [Exception("connection lost"), []]
+
+        def stop(*args):
+            self.worker.stop()
+            return [], [], []
+
+        mock_select.side_effect = stop
+
+        self.worker.run()
+
+        self.assertEqual(self.connection_factory.call_count, 2)
+        self.assertEqual(self.conn.close.call_count, 2)
+        self.assertEqual(self.relay.publish_pending.call_count, 2)
+
+    @patch('relay_worker.select.select', return_value=([], [], []))
+    def test_poll_timeout_does_not_read_notifications(self, mock_select):
+        self.worker._listen_conn = self.conn
+
+        self.worker.wait_for_notification()
+
+        self.conn.poll.assert_not_called()
+
+    def test_drain_reports_failures(self):
+        self.relay.publish_pending.return_value = [MagicMock()]
+        self.assertEqual(len(self.worker.drain()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
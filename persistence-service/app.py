@@ -1,8 +1,10 @@
+from common.utils.query_metrics import flushes_query_metrics
 from utils.component_provider import ComponentProvider
 
 component_provider = ComponentProvider()
 
 
+@flushes_query_metrics
 def lambda_handler(event, context):
     topic_router = component_provider.get_topic_router()
     return topic_router.route(event)
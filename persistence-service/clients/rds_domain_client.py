@@ -14,7 +14,7 @@ class RdsDomainClient(RdsClient):
         """
         params = (
             product.id, product.name, product.description, product.safety_stock, product.max_stock)
-        self.execute(query, params)
+        self.execute(query, params, prepare=True)
 
     def insert_supplier(self, supplier: Supplier):
         query = """
@@ -22,7 +22,7 @@ class RdsDomainClient(RdsClient):
         VALUES (%s, %s)
         """
         params = (supplier.id, supplier.name)
-        self.execute(query, params)
+        self.execute(query, params, prepare=True)
 
     def insert_customer(self, customer: Customer):
         query = """
@@ -30,7 +30,7 @@ class RdsDomainClient(RdsClient):
         VALUES (%s, %s)
         """
         params = (customer.id, customer.name)
-        self.execute(query, params)
+        self.execute(query, params, prepare=True)
 
     def insert_purchase_order(self, purchase_order: PurchaseOrder):
         try:
@@ -40,16 +40,12 @@ class RdsDomainClient(RdsClient):
             """
             params = (
                 purchase_order.id, purchase_order.supplier_id, purchase_order.created_at)
-            self.execute(query, params)
-
-            for position in purchase_order.order_positions:
-                self.insert_purchase_order_position(position, purchase_order.id)
-
-            self.commit_transaction(self.connection_pool.getconn())
+            with self.transaction():
+                self.execute(query, params, prepare=True)
+                self.insert_purchase_order_positions(purchase_order.order_positions, purchase_order.id)
 
         except Exception as e:
             logger.error(f"Failed to insert purchase order: {e}")
-            self.rollback_transaction(self.connection_pool.getconn())
             raise e
 
     def insert_purchase_order_position(self, position, purchase_order_id):
@@ -60,7 +56,18 @@ class RdsDomainClient(RdsClient):
         params = (
             position.id, position.product_id, purchase_order_id, position.quantity_ordered, position.quantity_received,
             position.price, position.delivery_date)
-        self.execute(query, params)
+        self.execute(query, params, prepare=True)
+
+    def insert_purchase_order_positions(self, positions, purchase_order_id):
+        query = """
+        INSERT INTO stock_management.purchase_order_position (id, product_id, purchase_order_header_id, quantity_ordered, quantity_received, price, delivery_date) 
+        VALUES %s
+        """
+        params_list = [
+            (position.id, position.product_id, purchase_order_id, position.quantity_ordered,
+             position.quantity_received, position.price, position.delivery_date)
+            for position in positions]
+        return self.execute_values(query, params_list)
 
     def insert_sales_order(self, sales_order: SalesOrder):
         query = """
@@ -68,7 +75,7 @@ class RdsDomainClient(RdsClient):
         VALUES (%s, %s, %s)
         """
         params = (sales_order.id, sales_order.customer_id, sales_order.created_at)
-        self.execute(query, params)
+        self.execute(query, params, prepare=True)
 
     def insert_inventory(self, inventory: Inventory):
         query = """
@@ -79,21 +86,17 @@ class RdsDomainClient(RdsClient):
         params = (inventory.id, inventory.product_id, inventory.purchase_order_position_id, inventory.quantity_received,
                   inventory.quantity_received, inventory.received_at, inventory.created_by, inventory.updated_by,
                   inventory.comments)
-        self.execute(query, params)
+        self.execute(query, params, prepare=True)
 
     def add_qty_received_in_purchase_order_position(self, purchase_order_position_id, quantity_received):
+        # No RETURNING, so the update can be queued in a pipeline() next to the inventory insert. Returns the
+        # row count, or the PipelineResult inside a pipeline()
         update_query = """
         UPDATE stock_management.purchase_order_position
         SET quantity_received = quantity_received + %s
         WHERE id = %s
-        RETURNING quantity_received;
         """
 
         update_params = (quantity_received, purchase_order_position_id)
 
-        updated_qty_received = self.execute(update_query, update_params)
-
-        if isinstance(updated_qty_received, list):
-            updated_qty_received = updated_qty_received[0]
-
-        return updated_qty_received
+        return self.execute(update_query, update_params, prepare=True)
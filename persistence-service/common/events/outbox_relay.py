@@ -0,0 +1,113 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from common.clients.rds_client import RdsClient
+from common.clients.sns_client import SnsClient, PublishFailure
+from common.events.event_codec import decode_event_message
+from common.events.events import EventType, EventStatus
+from common.utils.logger import get_logger
+
+DEFAULT_OUTBOX_BATCH_SIZE = 100
+# Retryable failures wait 1s, 2s, 4s, ... up to 5 minutes before the next attempt
+DEFAULT_OUTBOX_RETRY_BACKOFF_SECONDS = 1
+DEFAULT_OUTBOX_MAX_RETRY_BACKOFF_SECONDS = 300
+# Notified by a trigger on every Pending insert, see db_initializer/schema.sql
+OUTBOX_NOTIFY_CHANNEL = "stock_management_events"
+
+SELECT_PENDING_EVENTS_QUERY = (
+    "SELECT event_id, event_type, message, message_data FROM stock_management.events "
+    "WHERE status = %s AND (next_publish_at IS NULL OR next_publish_at <= %s) {event_filter}"
+    "ORDER BY created_at LIMIT %s FOR UPDATE SKIP LOCKED"
+)
+MARK_EVENTS_QUERY = "UPDATE stock_management.events SET status = %s, published_at = %s WHERE event_id = ANY(%s)"
+DEFER_EVENTS_QUERY = (
+    "UPDATE stock_management.events SET publish_attempts = publish_attempts + 1, "
+    "next_publish_at = %s + least(%s * power(2, publish_attempts), %s) * interval '1 second' "
+    "WHERE event_id = ANY(%s)"
+)
+
+logger = get_logger(__name__)
+
+
+class OutboxRelay:
+    """
+        Publishes Pending rows of stock_management.events to SNS in batches and marks them Processed with
+        one bulk update per batch. Rows are locked with FOR UPDATE SKIP LOCKED, so concurrent relays never
+        publish the same row; a crash between publish and update leads to a redelivery, never a loss.
+        Event types missing from `sns_map` have no subscribers and are marked Processed unpublished,
+        a type mapped to no ARN is a missing configuration and its events are marked Failed.
+        Rows that failed with a retryable error stay Pending but are skipped until their exponential
+        backoff has passed, so they do not hold back newer rows.
+    """
+
+    def __init__(self, rds_client: RdsClient, sns_client: SnsClient, sns_map: Dict[EventType, str],
+                 batch_size=DEFAULT_OUTBOX_BATCH_SIZE, retry_backoff_seconds=DEFAULT_OUTBOX_RETRY_BACKOFF_SECONDS,
+                 max_retry_backoff_seconds=DEFAULT_OUTBOX_MAX_RETRY_BACKOFF_SECONDS):
+        self.rds_client = rds_client
+        self.sns_client = sns_client
+        self.sns_map = sns_map
+        self.batch_size = batch_size
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.max_retry_backoff_seconds = max_retry_backoff_seconds
+
+    def publish_pending(self, event_ids: Optional[List[str]] = None) -> List[PublishFailure]:
+        """
+            Publishes the given events if they are still pending, or pending events batch by batch until
+            a batch comes back short when `event_ids` is None. Rows of rolled back transactions simply do
+            not show up. Returns the failed entries, retryable ones stay Pending until their backoff has passed.
+        """
+        failures = []
+        if event_ids is not None:
+            for start in range(0, len(event_ids), self.batch_size):
+                failures += self.publish_batch(event_ids[start:start + self.batch_size])[1]
+            return failures
+
+        while True:
+            selected, batch_failures = self.publish_batch()
+            failures += batch_failures
+            if selected < self.batch_size:
+                return failures
+
+    def publish_batch(self, event_ids: Optional[List[str]] = None):
+        """
+            Publishes one batch of pending events in its own transaction, returns (selected row count, failures).
+        """
+        now = datetime.now()
+        with self.rds_client.transaction() as transaction:
+            if event_ids is None:
+                rows = transaction.execute(SELECT_PENDING_EVENTS_QUERY.format(event_filter=""),
+                                           (EventStatus.Pending.name, now, self.batch_size))
+            else:
+                rows = transaction.execute(SELECT_PENDING_EVENTS_QUERY.format(event_filter="AND event_id = ANY(%s) "),
+                                           (EventStatus.Pending.name, now, event_ids, self.batch_size))
+            if not rows:
+                return 0, []
+
+            entries_by_topic = defaultdict(list)
+            failures = []
+            for event_id, event_type, message, message_data in rows:
+                message = decode_event_message(message, message_data)
+                if event_type in EventType.__members__ and EventType[event_type] not in self.sns_map:
+                    continue
+                topic_arn = self.sns_map.get(EventType[event_type]) if event_type in EventType.__members__ else None
+                if topic_arn:
+                    entries_by_topic[topic_arn].append((event_id, message))
+                else:
+                    failures.append(PublishFailure(None, message, 'NoTopic', f"No SNS topic for {event_type}",
+                                                   sender_fault=True, entry_id=event_id))
+            for topic_arn, entries in entries_by_topic.items():
+                failures += self.sns_client.publish_entries(topic_arn, entries)
+
+            failed_ids = {failure.entry_id for failure in failures if failure.sender_fault}
+            retry_ids = {failure.entry_id for failure in failures if not failure.sender_fault}
+            processed_ids = [row[0] for row in rows if row[0] not in failed_ids and row[0] not in retry_ids]
+            if processed_ids:
+                transaction.execute(MARK_EVENTS_QUERY, (EventStatus.Processed.name, now, processed_ids))
+            if failed_ids:
+                logger.error(f"Events that can never be published, marked Failed: {sorted(failed_ids)}")
+                transaction.execute(MARK_EVENTS_QUERY, (EventStatus.Failed.name, now, sorted(failed_ids)))
+            if retry_ids:
+                transaction.execute(DEFER_EVENTS_QUERY, (now, self.retry_backoff_seconds,
+                                                         self.max_retry_backoff_seconds, sorted(retry_ids)))
+            return len(rows), failures
@@ -0,0 +1,2 @@
+class StatementTimeoutException(Exception):
+    pass
@@ -0,0 +1,208 @@
+import functools
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from dataclasses import asdict
+
+DEFAULT_METRICS_NAMESPACE = "StockMate/Database"
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+MAX_STATEMENT_TEXT_LENGTH = 500
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s|\$\d+")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=512)
+def fingerprint(query) -> str:
+    """
+        Normalises a statement so every execution of the same query shares one key:
+        literals and placeholders become `?`, value lists collapse to `(?)`.
+    """
+    normalized = _STRING_LITERAL.sub('?', query)
+    normalized = _PLACEHOLDER.sub('?', normalized)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _VALUE_LIST.sub('(?)', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip().rstrip(';').strip()
+
+
+class Histogram:
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent) -> float:
+        """
+            Upper bound of the bucket holding the percentile, capped by the largest observed value.
+        """
+        if not self.count:
+            return 0.0
+        rank = percent / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+        return self.max
+
+
+class StatementMetrics:
+
+    def __init__(self, statement):
+        self.statement = statement
+        self.duration_ms = Histogram()
+        self.pool_wait_ms = Histogram()
+        self.rows = 0
+        self.errors = {}
+
+    def record(self, duration_seconds, rows, pool_wait_seconds, error):
+        self.duration_ms.observe(duration_seconds * 1000)
+        self.pool_wait_ms.observe(pool_wait_seconds * 1000)
+        self.rows += rows if rows and rows > 0 else 0
+        if error is not None:
+            error_class = type(error).__name__
+            self.errors[error_class] = self.errors.get(error_class, 0) + 1
+
+
+class QueryMetrics:
+    """
+        In-process statement and pool metrics, written to stdout as CloudWatch Embedded Metric
+        Format on flush(), so Lambda logs turn them into metrics without any extra service.
+    """
+
+    def __init__(self, namespace=None, stream=None):
+        self.namespace = namespace if namespace else os.environ.get('METRICS_NAMESPACE', DEFAULT_METRICS_NAMESPACE)
+        self.stream = stream
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._clients = weakref.WeakValueDictionary()
+        self._last_pool_stats = {}
+        self._last_statement_timeouts = {}
+
+    def record(self, query, duration_seconds, rows=None, pool_wait_seconds=0.0, error=None):
+        if isinstance(rows, list):
+            rows = len(rows)
+        elif not isinstance(rows, int):
+            rows = None
+        statement = fingerprint(query)
+        with self._lock:
+            if statement not in self._statements:
+                self._statements[statement] = StatementMetrics(statement)
+            self._statements[statement].record(duration_seconds, rows, pool_wait_seconds, error)
+
+    def register_client(self, name, rds_client):
+        """
+            Adds the client's pool_stats(), prepared_statement_stats() and statement timeouts to every flush.
+        """
+        self._clients[name] = rds_client
+
+    def flush(self):
+        with self._lock:
+            statements, self._statements = self._statements, {}
+        timestamp = int(time.time() * 1000)
+        documents = [self._statement_document(metrics, timestamp) for metrics in statements.values()]
+        documents += [self._pool_document(name, client, timestamp) for name, client in list(self._clients.items())]
+
+        stream = self.stream if self.stream else sys.stdout
+        for document in documents:
+            stream.write(json.dumps(document) + "\n")
+        stream.flush()
+        return documents
+
+    def _statement_document(self, metrics: StatementMetrics, timestamp):
+        values = {
+            "StatementCount": (metrics.duration_ms.count, "Count"),
+            "StatementErrors": (sum(metrics.errors.values()), "Count"),
+            "StatementRows": (metrics.rows, "Count"),
+            "StatementDurationP50": (metrics.duration_ms.percentile(50), "Milliseconds"),
+            "StatementDurationP90": (metrics.duration_ms.percentile(90), "Milliseconds"),
+            "StatementDurationP99": (metrics.duration_ms.percentile(99), "Milliseconds"),
+            "StatementDurationMax": (metrics.duration_ms.max, "Milliseconds"),
+            "PoolWaitP99": (metrics.pool_wait_ms.percentile(99), "Milliseconds"),
+            "PoolWaitMax": (metrics.pool_wait_ms.max, "Milliseconds"),
+        }
+        document = self._document(["StatementId"], values, timestamp)
+        document["StatementId"] = hashlib.sha1(metrics.statement.encode()).hexdigest()[:12]
+        document["Statement"] = metrics.statement[:MAX_STATEMENT_TEXT_LENGTH]
+        document["ErrorClasses"] = metrics.errors
+        document["DurationHistogram"] = dict(zip([str(bucket) for bucket in HISTOGRAM_BUCKETS_MS] + ["inf"],
+                                                 metrics.duration_ms.counts))
+        return document
+
+    def _pool_document(self, name, rds_client, timestamp):
+        stats = rds_client.pool_stats()
+        previous = self._last_pool_stats.get(name, stats.__class__(**{key: 0 for key in asdict(stats)}))
+        self._last_pool_stats[name] = stats
+        borrows = stats.borrow_count - previous.borrow_count
+        wait_seconds = stats.total_wait_seconds - previous.total_wait_seconds
+        values = {
+            "PoolSize": (stats.size, "Count"),
+            "PoolInUse": (stats.in_use, "Count"),
+            "PoolIdle": (stats.idle, "Count"),
+            "PoolBorrows": (borrows, "Count"),
+            "PoolExhausted": (stats.exhausted_count - previous.exhausted_count, "Count"),
+            "PoolReconnects": (stats.reconnect_count - previous.reconnect_count, "Count"),
+            "PoolWaitAvg": (wait_seconds / borrows * 1000 if borrows else 0.0, "Milliseconds"),
+        }
+        statement_timeouts = getattr(rds_client, 'statement_timeout_count', None)
+        if isinstance(statement_timeouts, int):
+            values["StatementTimeouts"] = (statement_timeouts - self._last_statement_timeouts.get(name, 0), "Count")
+            self._last_statement_timeouts[name] = statement_timeouts
+        prepared_statement_stats = getattr(rds_client, 'prepared_statement_stats', None)
+        if prepared_statement_stats:
+            values["PreparedStatementHitRate"] = (prepared_statement_stats().hit_rate * 100, "Percent")
+        document = self._document(["Pool"], values, timestamp)
+        document["Pool"] = name
+        return document
+
+    def _document(self, dimensions, values, timestamp):
+        document = {
+            "_aws": {
+                "Timestamp": timestamp,
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": [dimensions],
+                    "Metrics": [{"Name": name, "Unit": unit} for name, (_, unit) in values.items()],
+                }],
+            },
+        }
+        document.update({name: value for name, (value, _) in values.items()})
+        return document
+
+
+query_metrics = QueryMetrics()
+
+
+def flush_query_metrics():
+    return query_metrics.flush()
+
+
+def flushes_query_metrics(handler):
+    """
+        Decorates a Lambda handler so the collected metrics are written at the end of every invocation.
+    """
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            flush_query_metrics()
+    return wrapper
@@ -79,6 +79,15 @@ class OrderPosition(OrderPositionDto):
         self.quantity_received = quantity_received
         self.delivery_date = delivery_date
 
+    @staticmethod
+    def from_dict(position: dict) -> 'OrderPosition':
+        """
+            Rebuilds a persisted position, keeping its id.
+        """
+        order_position = OrderPosition.__new__(OrderPosition)
+        order_position.__dict__.update(position)
+        return order_position
+
 
 @dataclass
 class SalesOrderDto:
@@ -99,6 +108,19 @@ class PurchaseOrder:
         self.created_at = created_at
         self.order_positions = self.transform_order_positions(order_positions_dto)
 
+    @staticmethod
+    def from_dict(purchase_order: dict) -> 'PurchaseOrder':
+        """
+            Rebuilds a persisted purchase order, keeping the ids of the order and its positions.
+        """
+        restored = PurchaseOrder.__new__(PurchaseOrder)
+        restored.id = purchase_order['id']
+        restored.supplier_id = purchase_order['supplier_id']
+        restored.created_at = purchase_order['created_at']
+        restored.order_positions = [OrderPosition.from_dict(position)
+                                    for position in purchase_order['order_positions']]
+        return restored
+
     def transform_order_positions(self, order_positions_dto_list) -> list[OrderPosition]:
         order_positions_list = []
         for dto in order_positions_dto_list:
@@ -0,0 +1,65 @@
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from common.utils.logger import get_logger
+from common.utils.query_metrics import flush_query_metrics
+from services.event_replayer import REPLAY_PHASES, DEFAULT_REPLAY_BATCH_SIZE
+from services.projections import PROJECTIONS
+from utils.component_provider import ComponentProvider
+
+DEFAULT_REPLAY_WORKERS = 4
+
+logger = get_logger(__name__)
+
+
+def replay_partition(replay_id, phase, partition, partitions, batch_size):
+    """
+        Entry point of a worker process, which opens its own connections.
+    """
+    replayer = ComponentProvider.get_event_replayer(batch_size)
+    try:
+        return replayer.replay_partition(replay_id, phase, partition, partitions)
+    finally:
+        flush_query_metrics()
+
+
+def run_replay(replay_id, workers=DEFAULT_REPLAY_WORKERS, batch_size=DEFAULT_REPLAY_BATCH_SIZE, reset=False):
+    """
+        Replays phase after phase, each phase split into `workers` partitions replayed in parallel processes,
+        then brings the aggregate snapshots up to date. Running it again with the same `replay_id` resumes
+        from the checkpoints. Returns the replayed events.
+    """
+    if reset:
+        ComponentProvider.get_event_replayer(batch_size).reset(replay_id)
+
+    replayed = 0
+    # Spawned workers do not inherit the parent's pooled connections
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        for phase in REPLAY_PHASES:
+            futures = [executor.submit(replay_partition, replay_id, phase, partition, workers, batch_size)
+                       for partition in range(workers)]
+            phase_replayed = sum(future.result() for future in futures)
+            logger.info(f"Replay {replay_id}: phase {phase.name} done, {phase_replayed} events")
+            replayed += phase_replayed
+
+    snapshot_store = ComponentProvider.get_snapshot_store(batch_size)
+    for projection_type in PROJECTIONS:
+        snapshot_store.rebuild(projection_type)
+    return replayed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuilds the stock_management tables from the events log")
+    parser.add_argument('replay_id', help="Name of the run, rerun with the same name to resume it")
+    parser.add_argument('--workers', type=int, default=DEFAULT_REPLAY_WORKERS)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_REPLAY_BATCH_SIZE)
+    parser.add_argument('--reset', action='store_true', help="Truncate the rebuilt tables and start over")
+    args = parser.parse_args(argv)
+    replayed = run_replay(args.replay_id, args.workers, args.batch_size, args.reset)
+    logger.info(f"Replay {args.replay_id} finished, {replayed} events replayed")
+    return replayed
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple, Type
+
+from clients.rds_domain_client import RdsDomainClient
+from common.events.claim_check import ClaimCheck, load_event_message
+from common.events.events import EventType
+from common.utils.logger import get_logger
+from services.projections import Projection, PurchaseOrderReceiptsProjection
+from services.topic_router import TopicRouter
+
+DEFAULT_REPLAY_BATCH_SIZE = 1000
+
+# Tables rebuilt by a replay, truncated together by reset()
+REPLAY_TABLES = (
+    "stock_management.usage", "stock_management.sales_order_position", "stock_management.sales_order_header",
+    "stock_management.inventory", "stock_management.purchase_order_position",
+    "stock_management.purchase_order_header", "stock_management.product_supplier", "stock_management.customer",
+    "stock_management.supplier", "stock_management.product",
+)
+
+# Partitions hash the payload field naming the rows an event writes, so every event of one aggregate is
+# applied by the same worker in the order it was created and two workers never update the same row.
+# Compact and claim-checked rows have no inline payload and all go to partition 0. Order is by
+# (created_at, event_id), the event id breaks ties and is the resume position. The plain created_at
+# bound lets Postgres skip the monthly events partitions before it.
+SELECT_PHASE_EVENTS_QUERY = (
+    "SELECT event_id, event_type, message, message_data, created_at FROM stock_management.events "
+    "WHERE event_type = ANY(%s) "
+    "AND coalesce(hashtext(message -> 'payload' ->> %s) & 2147483647, 0) %% %s = %s {resume_filter}"
+    "ORDER BY created_at, event_id"
+)
+RESUME_FILTER = "AND created_at >= %s AND (created_at, event_id) > (%s, %s) "
+SELECT_CHECKPOINT_QUERY = (
+    "SELECT partitions, last_created_at, last_event_id, replayed_events, completed, snapshot_horizon "
+    "FROM stock_management.replay_checkpoints WHERE replay_id = %s AND phase = %s AND partition_no = %s"
+)
+UPSERT_CHECKPOINT_QUERY = (
+    "INSERT INTO stock_management.replay_checkpoints (replay_id, phase, partition_no, partitions, last_created_at, "
+    "last_event_id, replayed_events, completed, snapshot_horizon, updated_at) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
+    "ON CONFLICT (replay_id, phase, partition_no) DO UPDATE SET last_created_at = EXCLUDED.last_created_at, "
+    "last_event_id = EXCLUDED.last_event_id, replayed_events = EXCLUDED.replayed_events, "
+    "completed = EXCLUDED.completed, snapshot_horizon = EXCLUDED.snapshot_horizon, updated_at = EXCLUDED.updated_at"
+)
+# Received quantities of the partition's positions as of their order's latest snapshot, the same hash as
+# SELECT_PHASE_EVENTS_QUERY keeps each worker on its own positions
+SEED_POSITIONS_QUERY = (
+    "UPDATE stock_management.purchase_order_position AS position SET quantity_received = seed.quantity_received "
+    "FROM (VALUES %s) AS seed (id, quantity_received) WHERE position.id = seed.id "
+    "AND coalesce(hashtext(seed.id) & 2147483647, 0) %% {partitions} = {partition}"
+)
+DELETE_CHECKPOINTS_QUERY = "DELETE FROM stock_management.replay_checkpoints WHERE replay_id = %s"
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class ReplayPhase:
+    name: str
+    event_types: Tuple[EventType, ...]
+    # Payload field of the aggregate the phase's events write to, the events are partitioned by it
+    partition_key: str = 'id'
+    # Projection whose snapshots hold what the phase's events accumulate in the tables, see EventReplayer
+    projection: Optional[Type[Projection]] = None
+
+
+# Phases run one after another, so foreign keys to an earlier phase always resolve
+REPLAY_PHASES = (
+    ReplayPhase('master_data', (EventType.NewProductPersisted, EventType.NewSupplierPersisted,
+                                EventType.NewCustomerPersisted)),
+    ReplayPhase('orders', (EventType.NewPurchaseOrderPersisted, EventType.NewSalesOrderPersisted)),
+    # Received quantities are added to the positions, or seeded from the order snapshots
+    ReplayPhase('deliveries', (EventType.NewDeliveryPersisted,), 'purchase_order_position_id',
+                PurchaseOrderReceiptsProjection),
+)
+
+
+@dataclass
+class ReplayCheckpoint:
+    partitions: int
+    last_created_at: Optional[datetime] = None
+    last_event_id: Optional[str] = None
+    replayed_events: int = 0
+    completed: bool = False
+    # Snapshots saved up to this time seeded the partition, a resumed run uses the same ones
+    snapshot_horizon: Optional[datetime] = None
+
+
+class EventReplayer:
+    """
+        Rebuilds the stock_management tables from the Persisted events. One call replays one partition of
+        one phase: the events are streamed through a server-side cursor and applied by the TopicRouter
+        replay handlers in transactions of `batch_size` events, pipelined to save round trips. The
+        checkpoint is written in the same transaction, so an interrupted replay resumes exactly after
+        the last committed batch. Nothing is published and no events are written.
+        With a `snapshot_store`, a phase with a projection starts from the latest snapshots: the positions
+        of the snapshotted orders get their received quantity from the snapshot, and the deliveries it
+        covers only insert their inventory rows. Deliveries after the snapshot are applied in full.
+    """
+
+    def __init__(self, rds_client: RdsDomainClient, topic_router: TopicRouter, claim_check: ClaimCheck = None,
+                 batch_size=DEFAULT_REPLAY_BATCH_SIZE, snapshot_store=None):
+        self.rds_client = rds_client
+        self.topic_router = topic_router
+        self.claim_check = claim_check
+        self.batch_size = batch_size
+        self.snapshot_store = snapshot_store
+
+    def reset(self, replay_id: str):
+        """
+            Empties the rebuilt tables and forgets the checkpoints of `replay_id`, for a replay from scratch.
+        """
+        with self.rds_client.transaction() as transaction:
+            transaction.execute(f"TRUNCATE {', '.join(REPLAY_TABLES)}")
+            transaction.execute(DELETE_CHECKPOINTS_QUERY, (replay_id,))
+        logger.info(f"Reset {len(REPLAY_TABLES)} tables for replay {replay_id}")
+
+    def replay_partition(self, replay_id: str, phase: ReplayPhase, partition: int, partitions: int) -> int:
+        """
+            Replays the events of `phase` whose partition is `partition` out of `partitions`, continuing
+            from the checkpoint of an earlier run. Returns the number of events replayed by this call.
+        """
+        checkpoint = self.load_checkpoint(replay_id, phase, partition, partitions)
+        if checkpoint.completed:
+            logger.info(f"Replay {replay_id} {phase.name} partition {partition} already completed")
+            return 0
+
+        event_types = [event_type.name for event_type in phase.event_types]
+        if checkpoint.last_event_id is None:
+            query = SELECT_PHASE_EVENTS_QUERY.format(resume_filter="")
+            params = (event_types, phase.partition_key, partitions, partition)
+        else:
+            query = SELECT_PHASE_EVENTS_QUERY.format(resume_filter=RESUME_FILTER)
+            params = (event_types, phase.partition_key, partitions, partition, checkpoint.last_created_at,
+                      checkpoint.last_created_at, checkpoint.last_event_id)
+
+        snapshots = self._load_snapshots(phase, checkpoint)
+        replayed = 0
+        batch = []
+        # The replay cursor may run far longer than a regular statement
+        for row in self.rds_client.iterate(query, params, chunk_size=self.batch_size, timeout_ms=0):
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                replayed += self._apply_batch(replay_id, phase, partition, checkpoint, batch, snapshots)
+                batch = []
+        replayed += self._apply_batch(replay_id, phase, partition, checkpoint, batch, snapshots, completed=True)
+        logger.info(f"Replay {replay_id} {phase.name} partition {partition}/{partitions}: {replayed} events")
+        return replayed
+
+    def load_checkpoint(self, replay_id: str, phase: ReplayPhase, partition: int, partitions: int) \
+            -> ReplayCheckpoint:
+        # Read on the primary, a lagging replica would resume before batches that were already applied
+        with self.rds_client.transaction() as transaction:
+            rows = transaction.execute(SELECT_CHECKPOINT_QUERY, (replay_id, phase.name, partition))
+        if not rows:
+            return ReplayCheckpoint(partitions)
+        checkpoint = ReplayCheckpoint(*rows[0])
+        if checkpoint.partitions != partitions:
+            raise ValueError(f"Replay {replay_id} was started with {checkpoint.partitions} partitions, "
+                             f"resume it with the same number or reset it")
+        return checkpoint
+
+    def _load_snapshots(self, phase: ReplayPhase, checkpoint: ReplayCheckpoint) \
+            -> Optional[Tuple[Projection, Dict]]:
+        if phase.projection is None or self.snapshot_store is None:
+            return None
+        # Snapshots saved after the partition was seeded would claim deliveries already added on top of the seed
+        if checkpoint.snapshot_horizon is None:
+            checkpoint.snapshot_horizon = datetime.now()
+        return self.snapshot_store.load_latest(phase.projection, written_before=checkpoint.snapshot_horizon)
+
+    def _seed(self, partition, checkpoint: ReplayCheckpoint, snapshots):
+        _, aggregates = snapshots
+        quantities = [(position_id, position["quantity_received"]) for aggregate in aggregates.values()
+                      for position_id, position in aggregate.state["positions"].items()]
+        if quantities:
+            self.rds_client.execute_values(
+                SEED_POSITIONS_QUERY.format(partitions=checkpoint.partitions, partition=partition), quantities,
+                page_size=self.batch_size)
+
+    @staticmethod
+    def _covered(snapshots, sns_message, event_id, created_at) -> bool:
+        projection, aggregates = snapshots
+        return any(aggregates[aggregate_id].covers(event_id, created_at)
+                   for aggregate_id in projection.aggregate_ids(sns_message) if aggregate_id in aggregates)
+
+    def _apply_batch(self, replay_id, phase, partition, checkpoint: ReplayCheckpoint, rows, snapshots=None,
+                     completed=False) -> int:
+        with self.rds_client.pipeline():
+            # The first batch seeds in its own transaction, a run interrupted before it commits seeds again
+            if snapshots is not None and checkpoint.last_event_id is None:
+                self._seed(partition, checkpoint, snapshots)
+            for event_id, event_type, message, message_data, created_at in rows:
+                sns_message = load_event_message(message, message_data, self.claim_check)
+                covered = snapshots is not None and self._covered(snapshots, sns_message, event_id, created_at)
+                if not self.topic_router.replay(sns_message, covered):
+                    logger.warning(f"Skipping event {event_id}, no replay handler for {event_type}")
+            if rows:
+                checkpoint.last_event_id, checkpoint.last_created_at = rows[-1][0], rows[-1][4]
+            checkpoint.replayed_events += len(rows)
+            checkpoint.completed = completed
+            self.rds_client.execute(UPSERT_CHECKPOINT_QUERY, (
+                replay_id, phase.name, partition, checkpoint.partitions, checkpoint.last_created_at,
+                checkpoint.last_event_id, checkpoint.replayed_events, checkpoint.completed,
+                checkpoint.snapshot_horizon, datetime.now()))
+        return len(rows)
@@ -42,7 +42,32 @@ class PersistenceService:
     def persist_inventory(self, incoming_inventory: InventoryDTO) -> Inventory:
         inventory_id = IdGenerator.generate_inventory_id()
         inventory_to_persist = Inventory(id=inventory_id, **incoming_inventory.__dict__)
-        self.db_client.insert_inventory(inventory_to_persist)
-        self.db_client.add_qty_received_in_purchase_order_position(incoming_inventory.purchase_order_position_id,
-                                                                   incoming_inventory.quantity_received)
+        with self.db_client.pipeline():
+            self.db_client.insert_inventory(inventory_to_persist)
+            self.db_client.add_qty_received_in_purchase_order_position(incoming_inventory.purchase_order_position_id,
+                                                                       incoming_inventory.quantity_received)
         return inventory_to_persist
+
+    # Replay writes entities exactly as their Persisted events recorded them, ids included
+
+    def restore_product(self, product: Product):
+        self.db_client.insert_product(product)
+
+    def restore_supplier(self, supplier: Supplier):
+        self.db_client.insert_supplier(supplier)
+
+    def restore_customer(self, customer: Customer):
+        self.db_client.insert_customer(customer)
+
+    def restore_purchase_order(self, purchase_order: PurchaseOrder):
+        self.db_client.insert_purchase_order(purchase_order)
+
+    def restore_sales_order(self, sales_order: SalesOrder):
+        self.db_client.insert_sales_order(sales_order)
+
+    def restore_inventory(self, inventory: Inventory, add_quantity=True):
+        with self.db_client.pipeline():
+            self.db_client.insert_inventory(inventory)
+            if add_quantity:
+                self.db_client.add_qty_received_in_purchase_order_position(inventory.purchase_order_position_id,
+                                                                           inventory.quantity_received)
@@ -0,0 +1,101 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from common.events.events import EventType
+
+
+class Projection(ABC):
+    """
+        Folds events into per-aggregate state. A projection instance may keep lookup indexes, so it is used
+        for one load or rebuild only; track() sees every state loaded from a snapshot or changed by apply().
+    """
+    aggregate_type: str
+    event_types: Tuple[EventType, ...]
+
+    @abstractmethod
+    def initial_state(self) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def aggregate_ids(self, sns_message) -> List[str]:
+        pass
+
+    @abstractmethod
+    def apply(self, state: Dict[str, Any], sns_message):
+        pass
+
+    def track(self, aggregate_id: str, state: Dict[str, Any]):
+        pass
+
+    def payload_filters(self, aggregate_id: str, state: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+            Objects the payloads of the aggregate's events contain, at least one of them each, given its state
+            so far. None reads every event of `event_types`.
+        """
+        return None
+
+
+class ProductStockProjection(Projection):
+    aggregate_type = 'product_stock'
+    event_types = (EventType.NewDeliveryPersisted,)
+
+    def initial_state(self):
+        return {"quantity_received": 0, "deliveries": 0}
+
+    def aggregate_ids(self, sns_message):
+        return [sns_message["payload"]["product_id"]]
+
+    def apply(self, state, sns_message):
+        state["quantity_received"] += sns_message["payload"]["quantity_received"]
+        state["deliveries"] += 1
+
+    def payload_filters(self, aggregate_id, state):
+        return [{"product_id": aggregate_id}]
+
+
+class PurchaseOrderReceiptsProjection(Projection):
+    """
+        Ordered and received quantities per position. Deliveries only name their position, the order is
+        looked up in the positions of the orders seen so far.
+    """
+    aggregate_type = 'purchase_order_receipts'
+    event_types = (EventType.NewPurchaseOrderPersisted, EventType.NewDeliveryPersisted)
+
+    def __init__(self):
+        self._order_by_position = {}
+
+    def initial_state(self):
+        return {"supplier_id": None, "positions": {}}
+
+    def aggregate_ids(self, sns_message):
+        payload = sns_message["payload"]
+        if sns_message["event_type"] == EventType.NewPurchaseOrderPersisted.name:
+            return [payload["id"]]
+        order_id = self._order_by_position.get(payload["purchase_order_position_id"])
+        return [order_id] if order_id else []
+
+    def apply(self, state, sns_message):
+        payload = sns_message["payload"]
+        if sns_message["event_type"] == EventType.NewPurchaseOrderPersisted.name:
+            state["supplier_id"] = payload["supplier_id"]
+            for position in payload["order_positions"]:
+                state["positions"][position["id"]] = {
+                    "product_id": position["product_id"],
+                    "quantity_ordered": position["quantity_ordered"],
+                    "quantity_received": position.get("quantity_received", 0),
+                }
+        else:
+            state["positions"][payload["purchase_order_position_id"]]["quantity_received"] += \
+                payload["quantity_received"]
+
+    def track(self, aggregate_id, state):
+        for position_id in state["positions"]:
+            self._order_by_position[position_id] = aggregate_id
+
+    def payload_filters(self, aggregate_id, state):
+        # Deliveries are only found once the order named their positions
+        return [{"id": aggregate_id}] + [{"purchase_order_position_id": position_id}
+                                         for position_id in state["positions"]]
+
+
+PROJECTIONS = (ProductStockProjection, PurchaseOrderReceiptsProjection)
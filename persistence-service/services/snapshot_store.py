@@ -0,0 +1,206 @@
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from clients.rds_domain_client import RdsDomainClient
+from common.events.claim_check import ClaimCheck, load_event_message
+from common.utils import json_codec
+from common.utils.logger import get_logger
+from services.event_replayer import ReplayCheckpoint, SELECT_CHECKPOINT_QUERY, UPSERT_CHECKPOINT_QUERY, \
+    DEFAULT_REPLAY_BATCH_SIZE
+from services.projections import Projection
+
+DEFAULT_SNAPSHOT_INTERVAL_EVENTS = 100
+SNAPSHOT_CURSOR_PHASE = 'snapshots'
+
+SELECT_LATEST_SNAPSHOT_QUERY = (
+    "SELECT aggregate_id, event_count, last_event_id, last_created_at, state "
+    "FROM stock_management.aggregate_snapshots WHERE aggregate_type = %s AND aggregate_id = %s {as_of_filter}"
+    "ORDER BY event_count DESC LIMIT 1"
+)
+SELECT_LATEST_SNAPSHOTS_QUERY = (
+    "SELECT DISTINCT ON (aggregate_id) aggregate_id, event_count, last_event_id, last_created_at, state "
+    "FROM stock_management.aggregate_snapshots WHERE aggregate_type = %s {written_filter}"
+    "ORDER BY aggregate_id, event_count DESC"
+)
+WRITTEN_BEFORE_FILTER = "AND created_at <= %s "
+INSERT_SNAPSHOTS_QUERY = (
+    "INSERT INTO stock_management.aggregate_snapshots (aggregate_type, aggregate_id, event_count, last_event_id, "
+    "last_created_at, state, created_at) VALUES %s ON CONFLICT (aggregate_type, aggregate_id, event_count) DO NOTHING"
+)
+SELECT_EVENTS_QUERY = (
+    "SELECT event_id, event_type, message, message_data, created_at FROM stock_management.events "
+    "WHERE event_type = ANY(%s) {filters}ORDER BY created_at, event_id"
+)
+AFTER_POSITION_FILTER = "AND created_at >= %s AND (created_at, event_id) > (%s, %s) "
+AS_OF_FILTER = "AND created_at <= %s "
+# Snapshots are as old as the last event they cover, not as the rebuild that wrote them
+SNAPSHOT_AS_OF_FILTER = "AND last_created_at <= %s "
+# Inline payloads are matched through events_payload_idx. Compact and claim-checked rows keep no inline payload,
+# they are all read through events_opaque_payload_idx and told apart by Projection.aggregate_ids()
+PAYLOAD_FILTER = "AND (message -> 'payload' IS NULL OR {containments}) "
+PAYLOAD_CONTAINMENT = "message -> 'payload' @> %s::jsonb"
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class AggregateState:
+    aggregate_id: str
+    state: Dict[str, Any]
+    event_count: int = 0
+    last_event_id: Optional[str] = None
+    last_created_at: Optional[datetime] = None
+
+    def covers(self, event_id, created_at) -> bool:
+        return self.last_event_id is not None and (created_at, event_id) <= (self.last_created_at, self.last_event_id)
+
+
+class SnapshotStore:
+    """
+        Saves projection state per aggregate in stock_management.aggregate_snapshots every
+        `snapshot_interval` events of the aggregate, each snapshot marked with the last event it covers.
+        Loading an aggregate starts from its latest snapshot and applies only the events after it.
+    """
+
+    def __init__(self, rds_client: RdsDomainClient, claim_check: ClaimCheck = None, snapshot_interval=None,
+                 batch_size=DEFAULT_REPLAY_BATCH_SIZE):
+        self.rds_client = rds_client
+        self.claim_check = claim_check
+        self.snapshot_interval = int(snapshot_interval if snapshot_interval is not None
+                                     else os.environ.get('SNAPSHOT_INTERVAL_EVENTS', DEFAULT_SNAPSHOT_INTERVAL_EVENTS))
+        self.batch_size = batch_size
+
+    def load(self, projection_type: Type[Projection], aggregate_id: str, as_of: datetime = None) -> AggregateState:
+        """
+            Current state of the aggregate, or its state at `as_of`. Snapshots that fall due are saved on the way.
+        """
+        projection = projection_type()
+        as_of_filter, as_of_params = (SNAPSHOT_AS_OF_FILTER, (as_of,)) if as_of else ("", ())
+        rows = self.rds_client.execute(SELECT_LATEST_SNAPSHOT_QUERY.format(as_of_filter=as_of_filter),
+                                       (projection.aggregate_type, aggregate_id) + as_of_params)
+        aggregate = self._from_row(rows[0]) if rows else AggregateState(aggregate_id, projection.initial_state())
+        projection.track(aggregate_id, aggregate.state)
+
+        due = []
+        reading = True
+        while reading:
+            reading = False
+            payload_filters = projection.payload_filters(aggregate_id, aggregate.state)
+            query, params = self._events_query(projection, aggregate.last_event_id, aggregate.last_created_at, as_of,
+                                               payload_filters)
+            # Fetched at once, a server-side cursor is planned for a fast start and walks every event in order
+            # instead of going through the payload indexes
+            for event_id, event_type, message, message_data, created_at in \
+                    self.rds_client.execute(query, params, timeout_ms=0):
+                sns_message = load_event_message(message, message_data, self.claim_check)
+                if aggregate_id in projection.aggregate_ids(sns_message):
+                    self._apply(projection, aggregate, sns_message, event_id, created_at)
+                    if aggregate.event_count % self.snapshot_interval == 0:
+                        due.append(self._snapshot_params(projection, aggregate))
+                    # The aggregate's later events are found through what this one added, read on from it
+                    if projection.payload_filters(aggregate_id, aggregate.state) != payload_filters:
+                        reading = True
+                        break
+        if due:
+            self._save(due)
+        return aggregate
+
+    def load_latest(self, projection_type: Type[Projection], written_before: datetime = None) \
+            -> Tuple[Projection, Dict[str, AggregateState]]:
+        """
+            The latest snapshot of every aggregate, only from snapshots saved up to `written_before` if given,
+            and the projection that tracked them.
+        """
+        projection = projection_type()
+        written_filter, written_params = (WRITTEN_BEFORE_FILTER, (written_before,)) if written_before else ("", ())
+        aggregates = {}
+        for row in self.rds_client.execute(SELECT_LATEST_SNAPSHOTS_QUERY.format(written_filter=written_filter),
+                                           (projection.aggregate_type,) + written_params, timeout_ms=0):
+            aggregates[row[0]] = self._from_row(row)
+            projection.track(row[0], aggregates[row[0]].state)
+        return projection, aggregates
+
+    def rebuild(self, projection_type: Type[Projection]) -> int:
+        """
+            Brings the snapshots of every aggregate up to date, starting from where the last rebuild
+            stopped. Aggregates changed since then also get a snapshot of their final state, so the next
+            rebuild can skip everything before its cursor. Returns the number of events applied.
+        """
+        cursor_id = f"{SNAPSHOT_CURSOR_PHASE}:{projection_type.aggregate_type}"
+        # Read on the primary like the replay checkpoints
+        with self.rds_client.transaction() as transaction:
+            rows = transaction.execute(SELECT_CHECKPOINT_QUERY, (cursor_id, SNAPSHOT_CURSOR_PHASE, 0))
+        cursor = ReplayCheckpoint(*rows[0]) if rows else ReplayCheckpoint(1)
+
+        projection, aggregates = self.load_latest(projection_type)
+
+        applied = 0
+        changed = {}
+        due = []
+        query, params = self._events_query(projection, cursor.last_event_id, cursor.last_created_at)
+        for event_id, event_type, message, message_data, created_at in \
+                self.rds_client.iterate(query, params, chunk_size=self.batch_size, timeout_ms=0):
+            sns_message = load_event_message(message, message_data, self.claim_check)
+            for aggregate_id in projection.aggregate_ids(sns_message):
+                aggregate = aggregates.setdefault(aggregate_id,
+                                                  AggregateState(aggregate_id, projection.initial_state()))
+                if aggregate.covers(event_id, created_at):
+                    continue
+                self._apply(projection, aggregate, sns_message, event_id, created_at)
+                applied += 1
+                changed[aggregate_id] = aggregate
+                if aggregate.event_count % self.snapshot_interval == 0:
+                    due.append(self._snapshot_params(projection, aggregate))
+                    del changed[aggregate_id]
+            cursor.last_event_id, cursor.last_created_at = event_id, created_at
+            if len(due) >= self.batch_size:
+                self._save(due)
+                due = []
+
+        with self.rds_client.transaction():
+            self._save(due + [self._snapshot_params(projection, aggregate) for aggregate in changed.values()])
+            if cursor.last_event_id is not None:
+                self.rds_client.execute(UPSERT_CHECKPOINT_QUERY, (
+                    cursor_id, SNAPSHOT_CURSOR_PHASE, 0, 1, cursor.last_created_at, cursor.last_event_id,
+                    cursor.replayed_events + applied, True, None, datetime.now()))
+        logger.info(f"Snapshots of {projection.aggregate_type} rebuilt, {applied} events applied")
+        return applied
+
+    @staticmethod
+    def _events_query(projection: Projection, after_event_id, after_created_at, as_of: datetime = None,
+                      payload_filters: List[Dict[str, Any]] = None):
+        filters, params = "", [[event_type.name for event_type in projection.event_types]]
+        if after_event_id is not None:
+            filters += AFTER_POSITION_FILTER
+            params += [after_created_at, after_created_at, after_event_id]
+        if as_of is not None:
+            filters += AS_OF_FILTER
+            params.append(as_of)
+        if payload_filters is not None:
+            filters += PAYLOAD_FILTER.format(containments=" OR ".join([PAYLOAD_CONTAINMENT] * len(payload_filters)))
+            params += [json_codec.dumps(payload_filter) for payload_filter in payload_filters]
+        return SELECT_EVENTS_QUERY.format(filters=filters), tuple(params)
+
+    @staticmethod
+    def _apply(projection: Projection, aggregate: AggregateState, sns_message, event_id, created_at):
+        projection.apply(aggregate.state, sns_message)
+        aggregate.event_count += 1
+        aggregate.last_event_id, aggregate.last_created_at = event_id, created_at
+        projection.track(aggregate.aggregate_id, aggregate.state)
+
+    @staticmethod
+    def _from_row(row) -> AggregateState:
+        aggregate_id, event_count, last_event_id, last_created_at, state = row
+        return AggregateState(aggregate_id, json_codec.loads(state), event_count, last_event_id, last_created_at)
+
+    @staticmethod
+    def _snapshot_params(projection: Projection, aggregate: AggregateState):
+        # Encoded right away, the state keeps changing after the snapshot is taken
+        return (projection.aggregate_type, aggregate.aggregate_id, aggregate.event_count, aggregate.last_event_id,
+                aggregate.last_created_at, json_codec.dumps(aggregate.state), datetime.now())
+
+    def _save(self, snapshots):
+        if snapshots:
+            self.rds_client.execute_values(INSERT_SNAPSHOTS_QUERY, snapshots, page_size=self.batch_size)
@@ -1,7 +1,7 @@
-import json
-
+from common.events.claim_check import ClaimCheck, resolve_message
 from common.events.event_manager import EventManager
 from common.events.events import EventType
+from common.utils import json_codec
 from common.utils.logger import get_logger
 from models.models import ProductDto, CustomerDto, SupplierDto, Product, Supplier, Customer, PurchaseOrderDto, \
     SalesOrderDto, PurchaseOrder, SalesOrder, default_product_dict, InventoryDTO, Inventory
@@ -14,9 +14,11 @@ logger = get_logger(__name__)
 
 class TopicRouter:
 
-    def __init__(self, persistence_service: PersistenceService, event_manager: EventManager):
+    def __init__(self, persistence_service: PersistenceService, event_manager: EventManager,
+                 claim_check: ClaimCheck = None):
         self.persistence_service = persistence_service
         self.event_manager = event_manager
+        self.claim_check = claim_check
         self.event_type_to_handler = {
             EventType.NewProductScheduled.name: self.handle_new_product,
             EventType.NewSupplierScheduled.name: self.handle_new_supplier,
@@ -25,6 +27,15 @@ class TopicRouter:
             EventType.NewSalesOrderScheduled.name: self.handle_new_sales_order,
             EventType.NewDeliveryScheduled.name: self.handle_new_delivery
         }
+        # Used by the event replay: applies what a Scheduled handler persisted, without emitting events
+        self.event_type_to_replay_handler = {
+            EventType.NewProductPersisted.name: self.replay_product,
+            EventType.NewSupplierPersisted.name: self.replay_supplier,
+            EventType.NewCustomerPersisted.name: self.replay_customer,
+            EventType.NewPurchaseOrderPersisted.name: self.replay_purchase_order,
+            EventType.NewSalesOrderPersisted.name: self.replay_sales_order,
+            EventType.NewDeliveryPersisted.name: self.replay_delivery
+        }
 
     def handle_new_product(self, sns_message):
         incoming_product = ProductDto(**{**default_product_dict, **sns_message})
@@ -56,15 +67,53 @@ class TopicRouter:
         inventory: Inventory = self.persistence_service.persist_inventory(incoming_inventory)
         self.event_manager.send_event(inventory.__dict__, EventType.NewDeliveryPersisted, EMITTER_NAME)
 
+    def replay_product(self, payload):
+        self.persistence_service.restore_product(Product(**payload))
+
+    def replay_supplier(self, payload):
+        self.persistence_service.restore_supplier(Supplier(**payload))
+
+    def replay_customer(self, payload):
+        self.persistence_service.restore_customer(Customer(**payload))
+
+    def replay_purchase_order(self, payload):
+        self.persistence_service.restore_purchase_order(PurchaseOrder.from_dict(payload))
+
+    def replay_sales_order(self, payload):
+        self.persistence_service.restore_sales_order(SalesOrder(**payload))
+
+    def replay_delivery(self, payload, covered=False):
+        self.persistence_service.restore_inventory(Inventory(**payload), add_quantity=not covered)
+
+    def replay(self, sns_message, covered=False) -> bool:
+        """
+            Applies one Persisted event message, returns False for event types replay does not handle.
+            A `covered` delivery is already counted in the received quantity seeded from a snapshot.
+        """
+        handler = self.event_type_to_replay_handler.get(sns_message["event_type"])
+        if handler is None:
+            return False
+        if covered:
+            handler(sns_message["payload"], covered=True)
+        else:
+            handler(sns_message["payload"])
+        return True
+
     def route(self, event):
-        for record in event['Records']:
-            logger.info(f"Processing record:{record}")
-            sns_message = json.loads(record['Sns']['Message'])
-            logger.info(f"Sns message: {sns_message}")
+        try:
+            for record in event['Records']:
+                logger.info(f"Processing record:{record}")
+                sns_message = resolve_message(self.claim_check, json_codec.loads(record['Sns']['Message']))
+                logger.info(f"Sns message: {sns_message}")
 
-            handler = self.event_type_to_handler.get(sns_message["event_type"])
+                handler = self.event_type_to_handler.get(sns_message["event_type"])
 
-            if handler:
-                handler(sns_message["payload"])
-            else:
-                logger.error(f"Unknown event_type: {sns_message['event_type']}")
+                if handler:
+                    # The domain writes and the outbox event of a record commit together
+                    with self.event_manager.transaction():
+                        handler(sns_message["payload"])
+                else:
+                    logger.error(f"Unknown event_type: {sns_message['event_type']}")
+        finally:
+            # Events of already persisted records are published even if a later record fails
+            self.event_manager.flush()
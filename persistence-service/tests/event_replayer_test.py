@@ -0,0 +1,141 @@
+import json
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from common.events.event_codec import EVENT_MESSAGE_FORMAT_COMPACT, encode_event_message
+from services.event_replayer import EventReplayer, REPLAY_PHASES, REPLAY_TABLES
+from services.projections import PurchaseOrderReceiptsProjection
+from services.snapshot_store import AggregateState
+
+
+def _row(event_id, event_type, payload, compact=False):
+    message_json = json.dumps({"event_type": event_type, "payload": payload})
+    message, message_data = encode_event_message(message_json, EVENT_MESSAGE_FORMAT_COMPACT) if compact \
+        else (message_json, None)
+    return event_id, event_type, message, message_data, datetime(2024, 1, 1)
+
+
+class TestEventReplayer(unittest.TestCase):
+
+    def setUp(self):
+        self.rds_client = MagicMock()
+        self.rds_client.execute.return_value = []
+        self.transaction = self.rds_client.transaction.return_value.__enter__.return_value
+        self.transaction.execute.return_value = []
+        self.topic_router = MagicMock()
+        self.replayer = EventReplayer(self.rds_client, self.topic_router, batch_size=2)
+        self.phase = REPLAY_PHASES[0]
+
+    def test_replays_in_batches_and_checkpoints_each_batch(self):
+        self.rds_client.iterate.return_value = iter([
+            _row('evnt_1', 'NewProductPersisted', {"id": "prod_1"}),
+            _row('evnt_2', 'NewSupplierPersisted', {"id": "sup_1"}, compact=True),
+            _row('evnt_3', 'NewProductPersisted', {"id": "prod_2"}),
+        ])
+
+        self.assertEqual(self.replayer.replay_partition('run', self.phase, 1, 4), 3)
+
+        self.assertEqual(self.topic_router.replay.call_count, 3)
+        self.assertEqual(self.topic_router.replay.call_args_list[1].args[0]["payload"], {"id": "sup_1"})
+        self.assertEqual(self.rds_client.pipeline.call_count, 2)
+        query, params = self.rds_client.iterate.call_args.args
+        self.assertNotIn('(created_at, event_id) >', query)
+        self.assertEqual(params, (['NewProductPersisted', 'NewSupplierPersisted', 'NewCustomerPersisted'], 'id', 4, 1))
+        self.transaction.execute.assert_called_once()
+        checkpoints = [call.args[1] for call in self.rds_client.execute.call_args_list]
+        self.assertEqual([(checkpoint[5], checkpoint[6], checkpoint[7]) for checkpoint in checkpoints],
+                         [('evnt_2', 2, False), ('evnt_3', 3, True)])
+
+    def test_resumes_after_checkpoint(self):
+        self.transaction.execute.return_value = [(4, datetime(2024, 1, 1), 'evnt_2', 2, False)]
+        self.rds_client.iterate.return_value = iter([])
+
+        self.assertEqual(self.replayer.replay_partition('run', self.phase, 0, 4), 0)
+
+        query, params = self.rds_client.iterate.call_args.args
+        self.assertIn('(created_at, event_id) >', query)
+        self.assertEqual(params[-1], 'evnt_2')
+
+    def test_events_of_one_aggregate_share_a_partition(self):
+        deliveries = REPLAY_PHASES[2]
+        first = {"id": "inv_1", "purchase_order_position_id": "pop_1", "quantity_received": 2}
+        second = {"id": "inv_2", "purchase_order_position_id": "pop_1", "quantity_received": 3}
+        hashed_keys = []
+        for event_id, payload in (('evnt_1', first), ('evnt_9', second)):
+            self.rds_client.iterate.return_value = iter([_row(event_id, 'NewDeliveryPersisted', payload)])
+            self.replayer.replay_partition('run', deliveries, 0, 4)
+            query, params = self.rds_client.iterate.call_args.args
+            hashed_keys.append(payload[params[1]])
+
+        self.assertIn("hashtext(message -> 'payload' ->> %s)", query)
+        self.assertNotIn("hashtext(event_id)", query)
+        self.assertEqual(hashed_keys, ['pop_1', 'pop_1'])
+
+    def test_deliveries_start_from_the_order_snapshots(self):
+        deliveries = REPLAY_PHASES[2]
+        projection = PurchaseOrderReceiptsProjection()
+        snapshot = AggregateState("po_1", {"supplier_id": "sup_1", "positions": {
+            "pop_1": {"product_id": "prod_1", "quantity_ordered": 10, "quantity_received": 5}}},
+                                  2, 'evnt_2', datetime(2024, 1, 1))
+        projection.track("po_1", snapshot.state)
+        snapshot_store = MagicMock()
+        snapshot_store.load_latest.return_value = (projection, {"po_1": snapshot})
+        replayer = EventReplayer(self.rds_client, self.topic_router, batch_size=10, snapshot_store=snapshot_store)
+        self.rds_client.iterate.return_value = iter([
+            _row('evnt_2', 'NewDeliveryPersisted', {"id": "inv_1", "purchase_order_position_id": "pop_1"}),
+            _row('evnt_3', 'NewDeliveryPersisted', {"id": "inv_2", "purchase_order_position_id": "pop_1"}),
+        ])
+
+        self.assertEqual(replayer.replay_partition('run', deliveries, 1, 4), 2)
+
+        seed_query, quantities = self.rds_client.execute_values.call_args.args
+        self.assertIn("% 4 = 1", seed_query)
+        self.assertEqual(quantities, [("pop_1", 5)])
+        # The snapshot already counts evnt_2, only evnt_3 adds its quantity
+        self.assertEqual([call.args[1] for call in self.topic_router.replay.call_args_list], [True, False])
+        horizon = snapshot_store.load_latest.call_args.kwargs['written_before']
+        self.assertEqual(self.rds_client.execute.call_args.args[1][8], horizon)
+
+    def test_resumed_deliveries_keep_their_snapshots_and_seed_once(self):
+        horizon = datetime(2024, 1, 2)
+        self.transaction.execute.return_value = [(4, datetime(2024, 1, 1), 'evnt_2', 2, False, horizon)]
+        snapshot_store = MagicMock()
+        snapshot_store.load_latest.return_value = (PurchaseOrderReceiptsProjection(), {})
+        replayer = EventReplayer(self.rds_client, self.topic_router, snapshot_store=snapshot_store)
+        self.rds_client.iterate.return_value = iter([])
+
+        replayer.replay_partition('run', REPLAY_PHASES[2], 0, 4)
+
+        snapshot_store.load_latest.assert_called_once_with(PurchaseOrderReceiptsProjection, written_before=horizon)
+        self.rds_client.execute_values.assert_not_called()
+
+    def test_completed_partition_is_skipped(self):
+        self.transaction.execute.return_value = [(4, datetime(2024, 1, 1), 'evnt_2', 2, True)]
+
+        self.assertEqual(self.replayer.replay_partition('run', self.phase, 0, 4), 0)
+
+        self.rds_client.iterate.assert_not_called()
+
+    def test_resume_with_other_partition_count_fails(self):
+        self.transaction.execute.return_value = [(4, datetime(2024, 1, 1), 'evnt_2', 2, False)]
+
+        with self.assertRaises(ValueError):
+            self.replayer.replay_partition('run', self.phase, 0, 2)
+
+    def test_events_without_replay_handler_are_skipped(self):
+        self.topic_router.replay.return_value = False
+        self.rds_client.iterate.return_value = iter([_row('evnt_1', 'NewProductPersisted', {})])
+
+        self.assertEqual(self.replayer.replay_partition('run', self.phase, 0, 1), 1)
+
+    def test_reset(self):
+        self.replayer.reset('run')
+
+        truncate, delete = self.transaction.execute.call_args_list
+        self.assertTrue(all(table in truncate.args[0] for table in REPLAY_TABLES))
+        self.assertEqual(delete.args[1], ('run',))
+
+
+if __name__ == '__main__':
+    unittest.main()
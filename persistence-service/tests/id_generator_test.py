@@ -0,0 +1,32 @@
+import unittest
+
+from utils.id_generator import IdGenerator
+
+
+class TestIdGenerator(unittest.TestCase):
+
+    def test_ids_keep_prefix_and_are_time_ordered(self):
+        first = IdGenerator.generate_product_id()
+        second = IdGenerator.generate_product_id()
+
+        self.assertTrue(first.startswith("prod_"))
+        self.assertLessEqual(len(first), 20)
+        self.assertLess(first, second)
+
+    def test_generate_ids(self):
+        ids = IdGenerator.generate_ids("op_", 3)
+
+        self.assertEqual(len(set(ids)), 3)
+        self.assertTrue(all(identifier.startswith("op_") for identifier in ids))
+
+    def test_all_prefixes(self):
+        generated = [IdGenerator.generate_supplier_id(), IdGenerator.generate_customer_id(),
+                     IdGenerator.generate_purchase_order_id(), IdGenerator.generate_sales_order_id(),
+                     IdGenerator.generate_order_position_id(), IdGenerator.generate_inventory_id()]
+
+        self.assertEqual([identifier.split("_")[0] for identifier in generated],
+                         ["sup", "cus", "po", "so", "op", "inv"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, MagicMock, patch
 
-from models.models import ProductDto, SupplierDto, CustomerDto
+from models.models import ProductDto, SupplierDto, CustomerDto, InventoryDTO
 from services.persistence_service import PersistenceService
 
 
@@ -43,3 +43,36 @@ class TestPersistenceService(unittest.TestCase):
         service.persist_customer(incoming_customer)
 
         mock_db_client.insert_customer.assert_called_once()
+
+    @patch('services.persistence_service.IdGenerator')
+    def test_persist_inventory_in_one_pipeline(self, mock_IdGenerator):
+        mock_db_client = MagicMock()
+        mock_IdGenerator.generate_inventory_id.return_value = "inv_123"
+        service = PersistenceService(db_client=mock_db_client)
+
+        incoming_inventory = InventoryDTO(product_id="prod_123", purchase_order_position_id="op_123",
+                                          quantity_received=5, received_at="2023-11-18", created_by="tester")
+        service.persist_inventory(incoming_inventory)
+
+        mock_db_client.pipeline.assert_called_once()
+        mock_db_client.pipeline.return_value.__exit__.assert_called_once()
+        mock_db_client.insert_inventory.assert_called_once()
+        mock_db_client.add_qty_received_in_purchase_order_position.assert_called_once_with("op_123", 5)
+
+    def test_restore_keeps_ids_and_adds_received_quantity(self):
+        mock_db_client = MagicMock()
+        service = PersistenceService(db_client=mock_db_client)
+        inventory = Mock(id="inv_1", purchase_order_position_id="op_1", quantity_received=3)
+
+        for restore in (service.restore_product, service.restore_supplier, service.restore_customer,
+                        service.restore_purchase_order, service.restore_sales_order):
+            restore(Mock())
+        service.restore_inventory(inventory)
+
+        mock_db_client.insert_inventory.assert_called_once_with(inventory)
+        mock_db_client.add_qty_received_in_purchase_order_position.assert_called_once_with("op_1", 3)
+        mock_db_client.insert_sales_order.assert_called_once()
+
+        service.restore_inventory(inventory, add_quantity=False)
+        self.assertEqual(mock_db_client.insert_inventory.call_count, 2)
+        mock_db_client.add_qty_received_in_purchase_order_position.assert_called_once()
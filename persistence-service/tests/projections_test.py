@@ -0,0 +1,63 @@
+import unittest
+
+from services.projections import ProductStockProjection, PurchaseOrderReceiptsProjection
+
+ORDER = {"event_type": "NewPurchaseOrderPersisted", "payload": {
+    "id": "po_1", "supplier_id": "sup_1", "order_positions": [
+        {"id": "op_1", "product_id": "prod_1", "quantity_ordered": 10, "quantity_received": 0},
+        {"id": "op_2", "product_id": "prod_2", "quantity_ordered": 5},
+    ]}}
+
+
+def _delivery(position_id, product_id, quantity):
+    return {"event_type": "NewDeliveryPersisted", "payload": {
+        "purchase_order_position_id": position_id, "product_id": product_id, "quantity_received": quantity}}
+
+
+class TestProductStockProjection(unittest.TestCase):
+
+    def test_sums_deliveries_per_product(self):
+        projection = ProductStockProjection()
+        state = projection.initial_state()
+
+        for delivery in (_delivery("op_1", "prod_1", 3), _delivery("op_1", "prod_1", 4)):
+            self.assertEqual(projection.aggregate_ids(delivery), ["prod_1"])
+            projection.apply(state, delivery)
+
+        self.assertEqual(state, {"quantity_received": 7, "deliveries": 2})
+
+
+class TestPurchaseOrderReceiptsProjection(unittest.TestCase):
+
+    def setUp(self):
+        self.projection = PurchaseOrderReceiptsProjection()
+
+    def test_deliveries_are_added_to_their_position(self):
+        state = self.projection.initial_state()
+        self.projection.apply(state, ORDER)
+        self.projection.track("po_1", state)
+
+        delivery = _delivery("op_2", "prod_2", 2)
+        self.assertEqual(self.projection.aggregate_ids(delivery), ["po_1"])
+        self.projection.apply(state, delivery)
+
+        self.assertEqual(state["supplier_id"], "sup_1")
+        self.assertEqual(state["positions"]["op_1"]["quantity_received"], 0)
+        self.assertEqual(state["positions"]["op_2"], {"product_id": "prod_2", "quantity_ordered": 5,
+                                                      "quantity_received": 2})
+
+    def test_delivery_of_unknown_order_has_no_aggregate(self):
+        self.assertEqual(self.projection.aggregate_ids(_delivery("op_9", "prod_1", 1)), [])
+
+    def test_payload_filters_follow_the_order_positions(self):
+        state = self.projection.initial_state()
+        self.assertEqual(self.projection.payload_filters("po_1", state), [{"id": "po_1"}])
+
+        self.projection.apply(state, ORDER)
+
+        self.assertEqual(self.projection.payload_filters("po_1", state), [
+            {"id": "po_1"}, {"purchase_order_position_id": "op_1"}, {"purchase_order_position_id": "op_2"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
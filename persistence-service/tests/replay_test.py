@@ -0,0 +1,31 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import replay
+from services.event_replayer import REPLAY_PHASES
+from services.projections import PROJECTIONS
+
+
+class TestReplay(unittest.TestCase):
+
+    @patch('replay.ProcessPoolExecutor', lambda max_workers, mp_context: ThreadPoolExecutor(max_workers))
+    @patch('replay.ComponentProvider.get_snapshot_store')
+    @patch('replay.ComponentProvider.get_event_replayer')
+    def test_main_replays_every_phase_in_partitions(self, mock_get_event_replayer, mock_get_snapshot_store):
+        replayer = mock_get_event_replayer.return_value
+        replayer.replay_partition.return_value = 5
+
+        self.assertEqual(replay.main(['run', '--workers', '2', '--reset']), 5 * 2 * len(REPLAY_PHASES))
+
+        replayer.reset.assert_called_once_with('run')
+        partitions = {(call.args[1].name, call.args[2], call.args[3])
+                      for call in replayer.replay_partition.call_args_list}
+        self.assertEqual(partitions, {(phase.name, partition, 2)
+                                      for phase in REPLAY_PHASES for partition in range(2)})
+        rebuilt = [call.args[0] for call in mock_get_snapshot_store.return_value.rebuild.call_args_list]
+        self.assertEqual(rebuilt, list(PROJECTIONS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import json
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from services.projections import ProductStockProjection, PurchaseOrderReceiptsProjection
+from services.snapshot_store import SnapshotStore
+
+
+def _row(event_id, product_id, quantity, day=1):
+    message = json.dumps({"event_type": "NewDeliveryPersisted",
+                          "payload": {"product_id": product_id, "quantity_received": quantity}})
+    return event_id, "NewDeliveryPersisted", message, None, datetime(2024, 1, day)
+
+
+def _snapshot(product_id, event_count, last_event_id, quantity, day=1):
+    state = json.dumps({"quantity_received": quantity, "deliveries": event_count})
+    return product_id, event_count, last_event_id, datetime(2024, 1, day), state
+
+
+class TestSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self.rds_client = MagicMock()
+        self.rds_client.execute.return_value = []
+        self.transaction = self.rds_client.transaction.return_value.__enter__.return_value
+        self.transaction.execute.return_value = []
+        self.store = SnapshotStore(self.rds_client, snapshot_interval=2, batch_size=10)
+
+    def test_load_applies_events_after_latest_snapshot(self):
+        self.rds_client.execute.side_effect = [[_snapshot("prod_1", 2, "evnt_2", 5)],
+                                               [_row("evnt_3", "prod_1", 4, 2), _row("evnt_4", "prod_2", 1, 2)]]
+
+        aggregate = self.store.load(ProductStockProjection, "prod_1")
+
+        self.assertEqual(aggregate.state, {"quantity_received": 9, "deliveries": 3})
+        self.assertEqual((aggregate.event_count, aggregate.last_event_id), (3, "evnt_3"))
+        query, params = self.rds_client.execute.call_args.args
+        self.assertIn("(created_at, event_id) >", query)
+        self.assertIn("message -> 'payload' IS NULL OR message -> 'payload' @> %s::jsonb", query)
+        self.assertEqual(params, (["NewDeliveryPersisted"], datetime(2024, 1, 1), datetime(2024, 1, 1), "evnt_2",
+                                  '{"product_id":"prod_1"}'))
+        self.rds_client.execute_values.assert_not_called()
+
+    def test_load_as_of_reads_older_snapshot_and_events(self):
+        as_of = datetime(2024, 1, 5)
+        self.rds_client.execute.side_effect = [[], [_row("evnt_1", "prod_1", 4), _row("evnt_2", "prod_1", 1)]]
+
+        aggregate = self.store.load(ProductStockProjection, "prod_1", as_of)
+
+        self.assertEqual(aggregate.state, {"quantity_received": 5, "deliveries": 2})
+        (snapshot_query, snapshot_params), (_, event_params) = \
+            [call.args for call in self.rds_client.execute.call_args_list]
+        self.assertIn("last_created_at <= %s", snapshot_query)
+        self.assertEqual(snapshot_params[-1], as_of)
+        self.assertEqual(event_params[-2], as_of)
+        saved = self.rds_client.execute_values.call_args.args[1]
+        self.assertEqual([snapshot[:4] for snapshot in saved],
+                         [("product_stock", "prod_1", 2, "evnt_2")])
+
+    def test_load_reads_again_once_the_order_names_its_positions(self):
+        order = json.dumps({"event_type": "NewPurchaseOrderPersisted", "payload": {
+            "id": "po_1", "supplier_id": "sup_1",
+            "order_positions": [{"id": "op_1", "product_id": "prod_1", "quantity_ordered": 10}]}})
+        delivery = json.dumps({"event_type": "NewDeliveryPersisted", "payload": {
+            "purchase_order_position_id": "op_1", "product_id": "prod_1", "quantity_received": 4}})
+        self.rds_client.execute.side_effect = [
+            [],
+            [("evnt_1", "NewPurchaseOrderPersisted", order, None, datetime(2024, 1, 1))],
+            [("evnt_2", "NewDeliveryPersisted", delivery, None, datetime(2024, 1, 2))],
+        ]
+
+        aggregate = self.store.load(PurchaseOrderReceiptsProjection, "po_1")
+
+        self.assertEqual(aggregate.state["positions"]["op_1"]["quantity_received"], 4)
+        first, second = [call.args[1] for call in self.rds_client.execute.call_args_list[1:]]
+        self.assertEqual(first[1:], ('{"id":"po_1"}',))
+        self.assertEqual(second[1:], (datetime(2024, 1, 1), datetime(2024, 1, 1), "evnt_1", '{"id":"po_1"}',
+                                      '{"purchase_order_position_id":"op_1"}'))
+
+    def test_rebuild_continues_from_cursor_and_snapshots_changed_aggregates(self):
+        self.transaction.execute.return_value = [(1, datetime(2024, 1, 1), "evnt_2", 2, True)]
+        self.rds_client.execute.side_effect = [
+            [_snapshot("prod_1", 1, "evnt_1", 3), _snapshot("prod_2", 1, "evnt_3", 2, day=3)],
+            [],
+        ]
+        self.rds_client.iterate.return_value = iter([
+            _row("evnt_3", "prod_2", 2, 3), _row("evnt_4", "prod_1", 4, 4), _row("evnt_5", "prod_3", 1, 5),
+        ])
+
+        self.assertEqual(self.store.rebuild(ProductStockProjection), 2)
+
+        self.assertEqual(self.rds_client.iterate.call_args.args[1][-1], "evnt_2")
+        saved = self.rds_client.execute_values.call_args.args[1]
+        self.assertEqual([snapshot[1:4] for snapshot in saved], [("prod_1", 2, "evnt_4"), ("prod_3", 1, "evnt_5")])
+        self.assertEqual(json.loads(saved[0][5]), {"quantity_received": 7, "deliveries": 2})
+        cursor = self.rds_client.execute.call_args.args[1]
+        self.assertEqual(cursor[:3], ("snapshots:product_stock", "snapshots", 0))
+        self.assertEqual((cursor[5], cursor[6]), ("evnt_5", 4))
+        self.assertEqual(self.rds_client.transaction.call_count, 2)
+
+    def test_rebuild_without_new_events_keeps_cursor(self):
+        self.rds_client.iterate.return_value = iter([])
+
+        self.assertEqual(self.store.rebuild(ProductStockProjection), 0)
+
+        self.rds_client.execute_values.assert_not_called()
+        self.transaction.execute.assert_called_once()
+        self.assertEqual(self.rds_client.execute.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import unittest
+from unittest.mock import MagicMock, Mock
+
+from services.topic_router import TopicRouter
+
+
+def _record(event_type, payload):
+    return {"Sns": {"Message": json.dumps({"event_type": event_type, "payload": payload})}}
+
+
+class TestTopicRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.persistence_service = Mock()
+        self.event_manager = MagicMock()
+        self.router = TopicRouter(self.persistence_service, self.event_manager)
+
+    def test_route_flushes_events_once_per_invocation(self):
+        event = {"Records": [_record("NewCustomerScheduled", {"name": "Jane"}),
+                             _record("NewCustomerScheduled", {"name": "John"})]}
+
+        self.router.route(event)
+
+        self.assertEqual(self.event_manager.send_event.call_count, 2)
+        self.assertEqual(self.event_manager.transaction.call_count, 2)
+        self.event_manager.flush.assert_called_once()
+
+    def test_route_flushes_events_when_a_record_fails(self):
+        self.persistence_service.persist_customer.side_effect = [Mock(), Exception("DB down")]
+        event = {"Records": [_record("NewCustomerScheduled", {"name": "Jane"}),
+                             _record("NewCustomerScheduled", {"name": "John"})]}
+
+        with self.assertRaises(Exception):
+            self.router.route(event)
+
+        self.event_manager.send_event.assert_called_once()
+        self.event_manager.flush.assert_called_once()
+
+    def test_route_resolves_claim_checks(self):
+        claim_check = Mock()
+        claim_check.resolve.return_value = {"event_type": "NewCustomerScheduled", "payload": {"name": "Jane"}}
+        router = TopicRouter(self.persistence_service, self.event_manager, claim_check)
+        reference = {"Sns": {"Message": json.dumps({"event_type": "NewCustomerScheduled",
+                                                    "claim_check": {"key": "abc"}})}}
+
+        router.route({"Records": [reference]})
+
+        claim_check.resolve.assert_called_once()
+        self.persistence_service.persist_customer.assert_called_once()
+
+
+    def test_replay_restores_persisted_entities_without_sending_events(self):
+        self.router.replay({"event_type": "NewPurchaseOrderPersisted", "payload": {
+            "id": "po_1", "supplier_id": "sup_1", "created_at": "2024-01-01",
+            "order_positions": [{"id": "op_1", "product_id": "prod_1", "price": 2.5, "quantity_ordered": 10,
+                                 "quantity_received": 0, "delivery_date": "2024-02-01"}]}})
+        self.router.replay({"event_type": "NewDeliveryPersisted", "payload": {
+            "id": "inv_1", "product_id": "prod_1", "purchase_order_position_id": "op_1", "quantity_received": 3,
+            "received_at": "2024-02-01", "created_by": "me", "updated_by": "", "comments": ""}})
+
+        purchase_order = self.persistence_service.restore_purchase_order.call_args.args[0]
+        self.assertEqual((purchase_order.id, purchase_order.order_positions[0].id), ("po_1", "op_1"))
+        self.assertEqual(self.persistence_service.restore_inventory.call_args.args[0].id, "inv_1")
+        self.event_manager.send_event.assert_not_called()
+
+    def test_replay_of_covered_delivery_only_restores_the_inventory_row(self):
+        self.router.replay({"event_type": "NewDeliveryPersisted", "payload": {
+            "id": "inv_1", "product_id": "prod_1", "purchase_order_position_id": "op_1", "quantity_received": 3,
+            "received_at": "2024-02-01", "created_by": "me", "updated_by": "", "comments": ""}}, covered=True)
+
+        self.assertEqual(self.persistence_service.restore_inventory.call_args.kwargs, {'add_quantity': False})
+
+    def test_replay_master_data(self):
+        self.router.replay({"event_type": "NewProductPersisted", "payload": {
+            "id": "prod_1", "name": "pen", "description": "", "safety_stock": 0, "max_stock": 0}})
+        self.router.replay({"event_type": "NewSupplierPersisted", "payload": {"id": "sup_1", "name": "ACME"}})
+        self.router.replay({"event_type": "NewCustomerPersisted", "payload": {"id": "cus_1", "name": "Jane"}})
+        self.router.replay({"event_type": "NewSalesOrderPersisted", "payload": {
+            "id": "so_1", "customer_id": "cus_1", "created_at": "2024-01-01", "order_positions": []}})
+
+        self.assertEqual(self.persistence_service.restore_product.call_args.args[0].id, "prod_1")
+        self.assertEqual(self.persistence_service.restore_supplier.call_args.args[0].id, "sup_1")
+        self.assertEqual(self.persistence_service.restore_customer.call_args.args[0].id, "cus_1")
+        self.assertEqual(self.persistence_service.restore_sales_order.call_args.args[0].id, "so_1")
+
+    def test_replay_ignores_scheduled_events(self):
+        self.assertFalse(self.router.replay({"event_type": "NewProductScheduled", "payload": {}}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
 from clients.rds_domain_client import RdsDomainClient
+from common.events.claim_check import ClaimCheck
 from common.events.event_manager import EventManager
+from services.event_replayer import EventReplayer, DEFAULT_REPLAY_BATCH_SIZE
 from services.persistence_service import PersistenceService
+from services.snapshot_store import SnapshotStore
 from services.topic_router import TopicRouter
 
 
@@ -27,11 +30,27 @@ class ComponentProvider:
     def get_topic_router():
         if ComponentProvider._topic_router is None:
             persistence_service = ComponentProvider.get_persistence_service()
-            ComponentProvider._topic_router = TopicRouter(persistence_service, ComponentProvider.get_event_manager())
+            ComponentProvider._topic_router = TopicRouter(persistence_service, ComponentProvider.get_event_manager(),
+                                                          ClaimCheck.from_environment())
         return ComponentProvider._topic_router
 
     @staticmethod
     def get_event_manager():
         if ComponentProvider._event_manager is None:
-            ComponentProvider._event_manager = EventManager()
+            ComponentProvider._event_manager = EventManager(rds_client=ComponentProvider.get_rds_domain_client(),
+                                                          outbox=True)
         return ComponentProvider._event_manager
+
+    @staticmethod
+    def get_event_replayer(batch_size=DEFAULT_REPLAY_BATCH_SIZE):
+        """
+            The replay never sends events, so its router gets no event manager.
+        """
+        topic_router = TopicRouter(ComponentProvider.get_persistence_service(), None)
+        return EventReplayer(ComponentProvider.get_rds_domain_client(), topic_router, ClaimCheck.from_environment(),
+                             batch_size, ComponentProvider.get_snapshot_store(batch_size))
+
+    @staticmethod
+    def get_snapshot_store(batch_size=DEFAULT_REPLAY_BATCH_SIZE):
+        return SnapshotStore(ComponentProvider.get_rds_domain_client(), ClaimCheck.from_environment(),
+                             batch_size=batch_size)
@@ -1,36 +1,41 @@
-import uuid
+from typing import List
+
+from common.utils.sortable_id import new_id, new_ids
 
 
 class IdGenerator:
+    """
+        Prefixed, time-ordered ids, so inserts land at the right edge of the primary key indexes.
+    """
 
     @staticmethod
-    def _generate_unique_id():
-        return str(uuid.uuid4()).split('-')[-1]
+    def generate_ids(prefix: str, count: int) -> List[str]:
+        return new_ids(prefix, count)
 
     @staticmethod
     def generate_product_id():
-        return "prod_" + IdGenerator._generate_unique_id()
+        return new_id("prod_")
 
     @staticmethod
     def generate_supplier_id():
-        return "sup_" + IdGenerator._generate_unique_id()
+        return new_id("sup_")
 
     @staticmethod
     def generate_customer_id():
-        return "cus_" + IdGenerator._generate_unique_id()
+        return new_id("cus_")
 
     @staticmethod
     def generate_purchase_order_id():
-        return "po_" + IdGenerator._generate_unique_id()
+        return new_id("po_")
 
     @staticmethod
     def generate_sales_order_id():
-        return "so_" + IdGenerator._generate_unique_id()
+        return new_id("so_")
 
     @staticmethod
     def generate_order_position_id():
-        return "op_" + IdGenerator._generate_unique_id()
+        return new_id("op_")
 
     @staticmethod
     def generate_inventory_id():
-        return "inv_" + IdGenerator._generate_unique_id()
\ No newline at end of file
+        return new_id("inv_")
@@ -0,0 +1,63 @@
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+from common.clients.async_rds_client import AsyncRdsClient
+
+
+def new_mock_connection():
+    conn = MagicMock()
+    conn.commit = AsyncMock()
+    conn.rollback = AsyncMock()
+    cur = MagicMock()
+    cur.execute = AsyncMock()
+    cur.fetchall = AsyncMock(return_value=[('result1',)])
+    cur.rowcount = 1
+    conn.cursor.return_value.__aenter__ = AsyncMock(return_value=cur)
+    conn.cursor.return_value.__aexit__ = AsyncMock(return_value=False)
+    return conn, cur
+
+
+class TestAsyncRdsClient(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.conn, self.cur = new_mock_connection()
+        self.borrow_count = 0
+        self.client = AsyncRdsClient(secret_provider=MagicMock())
+        self.client.connection_pool = MagicMock()
+        self.client.connection_pool.connection = self.borrow
+
+    @asynccontextmanager
+    async def borrow(self):
+        self.borrow_count += 1
+        yield self.conn
+
+    async def test_execute_select_returns_rows(self):
+        result = await self.client.execute("SELECT * FROM table")
+
+        self.assertEqual(result, [('result1',)])
+        self.cur.execute.assert_awaited_once_with("SELECT * FROM table", None)
+        self.conn.commit.assert_not_awaited()
+
+    async def test_execute_write_commits(self):
+        result = await self.client.execute("INSERT INTO table VALUES (%s)", (1,))
+
+        self.assertEqual(result, 1)
+        self.conn.commit.assert_awaited_once()
+
+    async def test_transaction_pins_one_connection_and_commits_once(self):
+        async with self.client.transaction() as tx:
+            await self.client.execute("INSERT INTO table VALUES (%s)", (1,))
+            await tx.execute("INSERT INTO table VALUES (%s)", (2,))
+
+        self.assertEqual(self.borrow_count, 1)
+        self.conn.commit.assert_awaited_once()
+
+    async def test_transaction_rolls_back_on_error(self):
+        with self.assertRaises(ValueError):
+            async with self.client.transaction():
+                await self.client.execute("INSERT INTO table VALUES (%s)", (1,))
+                raise ValueError('Domain validation failed')
+
+        self.conn.rollback.assert_awaited_once()
+        self.conn.commit.assert_not_awaited()
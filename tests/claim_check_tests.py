@@ -0,0 +1,118 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from common.clients.blob_store import LocalBlobStore, S3BlobStore, get_blob_store
+from common.events.claim_check import ClaimCheck, load_event_message, resolve_message
+from common.events.event_codec import EVENT_MESSAGE_FORMAT_COMPACT, encode_event_message
+
+
+class TestClaimCheck(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.blob_store = LocalBlobStore(self.tmp_dir.name)
+        self.claim_check = ClaimCheck(self.blob_store, threshold_bytes=100, cache_size=2)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_offload_keeps_small_messages_inline(self):
+        message_json = json.dumps({"event_type": "NewProductScheduled", "payload": {"name": "pen"}})
+
+        self.assertEqual(self.claim_check.offload(message_json, "NewProductScheduled"), message_json)
+
+    def test_offload_replaces_large_message_with_reference(self):
+        message = {"event_type": "NewProductScheduled", "payload": {"description": "x" * 1000}}
+
+        reference = json.loads(self.claim_check.offload(json.dumps(message), "NewProductScheduled"))
+
+        self.assertEqual(reference["event_type"], "NewProductScheduled")
+        self.assertEqual(reference["claim_check"]["encoding"], "zlib")
+        self.assertNotIn("payload", reference)
+        self.assertEqual(ClaimCheck(self.blob_store).resolve(reference), message)
+
+    def test_identical_payloads_share_one_blob(self):
+        message_json = json.dumps({"payload": "y" * 1000})
+
+        first = self.claim_check.offload(message_json, "NewProductScheduled")
+        second = self.claim_check.offload(message_json, "NewProductScheduled")
+
+        self.assertEqual(first, second)
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(self.tmp_dir.name)), 1)
+
+    def test_resolve_uses_cache(self):
+        reference = json.loads(self.claim_check.offload(json.dumps({"payload": "z" * 1000}), "NewProductScheduled"))
+
+        with patch.object(self.blob_store, 'get') as get:
+            self.claim_check.resolve(reference)
+            get.assert_not_called()
+
+    def test_cache_evicts_least_recently_used(self):
+        for size in (1000, 2000, 3000):
+            self.claim_check.offload(json.dumps({"payload": "a" * size}), "NewProductScheduled")
+
+        self.assertEqual(len(self.claim_check._cache), 2)
+
+    def test_resolve_message_without_store(self):
+        message = {"event_type": "NewProductScheduled", "payload": {}}
+
+        self.assertEqual(resolve_message(None, message), message)
+        with self.assertRaises(ValueError):
+            resolve_message(None, {"event_type": "NewProductScheduled", "claim_check": {"key": "abc"}})
+
+    def test_load_event_message_from_parsed_jsonb(self):
+        message = {"event_type": "NewProductScheduled", "payload": {"name": "pen"}}
+
+        self.assertIs(load_event_message(message, None, self.claim_check), message)
+
+    def test_load_event_message_from_compact_row_with_reference(self):
+        message = {"event_type": "NewProductScheduled", "payload": {"description": "x" * 1000}}
+        reference_json = self.claim_check.offload(json.dumps(message), "NewProductScheduled")
+
+        self.assertEqual(load_event_message(*encode_event_message(reference_json, EVENT_MESSAGE_FORMAT_COMPACT),
+                                            self.claim_check), message)
+
+
+class TestGetBlobStore(unittest.TestCase):
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_no_store_configured(self):
+        self.assertIsNone(get_blob_store())
+        self.assertIsNone(ClaimCheck.from_environment())
+
+    @patch.dict(os.environ, {'CLAIM_CHECK_DIR': '/tmp/claim-checks'}, clear=True)
+    def test_local_store(self):
+        self.assertIsInstance(get_blob_store(), LocalBlobStore)
+
+    @patch.dict(os.environ, {'CLAIM_CHECK_BUCKET': 'events', 'AWS_DEFAULT_REGION': 'eu-west-1'}, clear=True)
+    def test_s3_store(self):
+        blob_store = get_blob_store()
+
+        self.assertIsInstance(blob_store, S3BlobStore)
+        self.assertEqual(blob_store.prefix, 'claim-checks/')
+
+
+class TestBlobStore(unittest.TestCase):
+
+    def test_local_store_put_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            blob_store = LocalBlobStore(tmp_dir)
+            blob_store.put_file('archive.csv.gz', io.BytesIO(b'abc'))
+
+            self.assertEqual(blob_store.get('archive.csv.gz'), b'abc')
+
+    def test_s3_store_put_file_uploads_stream(self):
+        s3_client = MagicMock()
+        archive = io.BytesIO(b'abc')
+
+        S3BlobStore('archive-bucket', 'events-archive/', s3_client).put_file('archive.csv.gz', archive)
+
+        s3_client.upload_fileobj.assert_called_once_with(archive, 'archive-bucket', 'events-archive/archive.csv.gz')
+
+
+if __name__ == '__main__':
+    unittest.main()
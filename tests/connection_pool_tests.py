@@ -0,0 +1,96 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from psycopg2 import extensions
+
+from common.clients.connection_pool import ConnectionPool
+from common.exceptions.pool_exhausted_exception import PoolExhaustedException
+
+
+def new_mock_connection():
+    conn = MagicMock()
+    conn.closed = 0
+    conn.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+    return conn
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.connection_factory = MagicMock(side_effect=new_mock_connection)
+
+    def test_init_opens_min_connections(self):
+        pool = ConnectionPool(2, 5, connection_factory=self.connection_factory)
+
+        self.assertEqual(self.connection_factory.call_count, 2)
+        self.assertEqual(pool.stats().size, 2)
+        self.assertEqual(pool.stats().idle, 2)
+
+    def test_returned_connection_is_reused(self):
+        pool = ConnectionPool(1, 5, connection_factory=self.connection_factory)
+
+        conn = pool.getconn()
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(), conn)
+        self.assertEqual(self.connection_factory.call_count, 1)
+
+    def test_getconn_raises_after_timeout_when_exhausted(self):
+        pool = ConnectionPool(0, 1, connection_factory=self.connection_factory)
+        pool.getconn()
+
+        with self.assertRaises(PoolExhaustedException):
+            pool.getconn(timeout=0.01)
+
+        self.assertEqual(pool.stats().exhausted_count, 1)
+
+    def test_getconn_waits_for_returned_connection(self):
+        pool = ConnectionPool(0, 1, connection_factory=self.connection_factory)
+        conn = pool.getconn()
+        threading.Timer(0.05, pool.putconn, args=(conn,)).start()
+
+        self.assertIs(pool.getconn(timeout=1), conn)
+        self.assertGreater(pool.stats().max_wait_seconds, 0)
+
+    def test_closed_connection_is_replaced(self):
+        pool = ConnectionPool(1, 1, connection_factory=self.connection_factory)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.closed = 1
+
+        replacement = pool.getconn()
+
+        self.assertIsNot(replacement, conn)
+        self.assertEqual(pool.stats().reconnect_count, 1)
+        self.assertEqual(pool.stats().size, 1)
+
+    def test_failed_health_check_reconnects(self):
+        pool = ConnectionPool(1, 1, health_check_interval=0, connection_factory=self.connection_factory)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.cursor.return_value.__enter__.return_value.execute.side_effect = Exception('server closed the connection')
+        time.sleep(0.001)
+
+        self.assertIsNot(pool.getconn(), conn)
+        conn.close.assert_called_once()
+
+    def test_putconn_rolls_back_open_transaction(self):
+        pool = ConnectionPool(0, 1, connection_factory=self.connection_factory)
+        conn = pool.getconn()
+        conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+
+        pool.putconn(conn)
+
+        conn.rollback.assert_called_once()
+        self.assertEqual(pool.stats().idle, 1)
+
+    def test_putconn_with_close_shrinks_pool(self):
+        pool = ConnectionPool(0, 1, connection_factory=self.connection_factory)
+        conn = pool.getconn()
+
+        pool.putconn(conn, close=True)
+
+        conn.close.assert_called_once()
+        self.assertEqual(pool.stats().size, 0)
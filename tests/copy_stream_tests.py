@@ -0,0 +1,69 @@
+import io
+import unittest
+from unittest.mock import MagicMock
+
+from common.clients.copy_stream import CopyInStream, CopyOutBuffer, copy_options, to_csv_field
+
+
+class TestCopyStream(unittest.TestCase):
+
+    def test_to_csv_field(self):
+        self.assertEqual(to_csv_field(None), '')
+        self.assertEqual(to_csv_field(''), '""')
+        self.assertEqual(to_csv_field('say "hi", bye'), '"say ""hi"", bye"')
+        self.assertEqual(to_csv_field(42), '"42"')
+        self.assertEqual(to_csv_field({'k': 1}), '"{""k"":1}"')
+
+    def test_copy_in_stream_reads_lazily_in_bounded_chunks(self):
+        consumed = []
+
+        def rows():
+            for i in range(1000):
+                consumed.append(i)
+                yield i, 'name'
+
+        stream = CopyInStream(rows(), buffer_size=64)
+        first = stream.read(64)
+
+        self.assertEqual(len(first), 64)
+        self.assertLess(len(consumed), 10)
+        rest = b''.join(iter(lambda: stream.read(64), b''))
+        self.assertEqual((first + rest).count(b'\n'), 1000)
+        self.assertTrue(first.startswith(b'"0","name"\n"1","name"\n'))
+
+    def test_copy_in_stream_passes_binary_chunks_through(self):
+        stream = CopyInStream([b'PGCOPY', bytearray(b'\n\xff')], copy_format='binary')
+        self.assertEqual(stream.read(100), b'PGCOPY\n\xff')
+        self.assertEqual(stream.read(100), b'')
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            CopyInStream([], copy_format='text')
+        with self.assertRaises(ValueError):
+            copy_options('xml')
+
+    def test_copy_options(self):
+        self.assertEqual(copy_options('csv', header=True), '(FORMAT csv, HEADER true)')
+        self.assertEqual(copy_options('binary', header=True), '(FORMAT binary)')
+
+    def test_copy_out_buffer_batches_writes(self):
+        sink = io.BytesIO()
+        sink.write = MagicMock(wraps=sink.write)
+        buffer = CopyOutBuffer(sink, buffer_size=10)
+        for _ in range(5):
+            buffer.write(b'1,abc\n')
+        buffer.flush()
+
+        self.assertEqual(sink.getvalue(), b'1,abc\n' * 5)
+        self.assertEqual(sink.write.call_count, 3)
+
+    def test_copy_out_buffer_decodes_for_text_sinks(self):
+        sink = io.StringIO()
+        buffer = CopyOutBuffer(sink)
+        buffer.write('1,"é"\n'.encode('utf-8'))
+        buffer.flush()
+        self.assertEqual(sink.getvalue(), '1,"é"\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
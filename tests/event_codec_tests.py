@@ -0,0 +1,50 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from common.events.event_codec import EVENT_MESSAGE_FORMAT_COMPACT, EVENT_MESSAGE_FORMAT_JSON, \
+    ZLIB_V1_FORMAT_TAG, decode_event_message, encode_event_message, get_event_message_format
+
+MESSAGE_JSON = ('{"event_type":"NewPurchaseOrderPersisted","payload":{"id":"po_8f2a9c1e4b7d",'
+                '"supplier_id":"sup_1a2b3c4d5e6f","created_at":"2024-05-01","order_positions":['
+                '{"id":"op_000000000001","product_id":"prod_000000000007","price":25.99,"quantity_ordered":10,'
+                '"quantity_received":0,"delivery_date":"2024-06-01"},'
+                '{"id":"op_000000000002","product_id":"prod_00000000000e","price":3.5,"quantity_ordered":200,'
+                '"quantity_received":0,"delivery_date":"2024-06-15"}]}}')
+
+
+class TestEventCodec(unittest.TestCase):
+
+    def test_json_rows_keep_the_text(self):
+        self.assertEqual(encode_event_message(MESSAGE_JSON), (MESSAGE_JSON, None))
+        self.assertEqual(decode_event_message(MESSAGE_JSON, None), MESSAGE_JSON)
+
+    def test_parsed_jsonb_message_is_encoded_again(self):
+        self.assertEqual(decode_event_message({"event_type": "NewProductPersisted", "payload": {"id": "prod_1"}}),
+                         '{"event_type":"NewProductPersisted","payload":{"id":"prod_1"}}')
+        self.assertIsNone(decode_event_message(None))
+
+    def test_compact_round_trip(self):
+        message, message_data = encode_event_message(MESSAGE_JSON, EVENT_MESSAGE_FORMAT_COMPACT)
+
+        self.assertIsNone(message)
+        self.assertEqual(message_data[0], ZLIB_V1_FORMAT_TAG)
+        self.assertLess(len(message_data) * 3, len(MESSAGE_JSON))
+        self.assertEqual(decode_event_message(message, memoryview(message_data)), MESSAGE_JSON)
+
+    def test_unknown_format_tag(self):
+        with self.assertRaises(ValueError):
+            decode_event_message(None, b'\x7f')
+
+    @patch.dict(os.environ, {'EVENT_MESSAGE_FORMAT': 'msgpack'})
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            get_event_message_format()
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_json_is_the_default_format(self):
+        self.assertEqual(get_event_message_format(), EVENT_MESSAGE_FORMAT_JSON)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,13 @@
 import unittest
 from datetime import datetime
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
+from common.events.event_codec import EVENT_MESSAGE_FORMAT_COMPACT, encode_event_message
 from common.events.event_manager import EventManager
+from common.events.event_query import EventQuery, decode_cursor
 from common.events.events import EventType
+from common.exceptions.failed_to_retrieve_event_exception import FailedToRetrieveEventException
+from common.exceptions.failed_to_save_event_exception import FailedToSaveEventException
 
 
 class TestEventManager(unittest.TestCase):
@@ -18,3 +22,131 @@ class TestEventManager(unittest.TestCase):
             mock_datetime.now.return_value = datetime(2021, 1, 1)
             self.event_manager.insert_event(EventType.NewPurchaseOrderScheduled, 'emitter', 'payload')
             self.mock_rds_client.execute.assert_called()
+
+
+class TestEventManagerBatchPublishing(unittest.TestCase):
+
+    def test_send_event_batch_publishing(self):
+        sns_client = MagicMock()
+        event_manager = EventManager(MagicMock(), sns_client, batch_publishing=True)
+
+        event_manager.send_event({'id': 1}, EventType.NewProductPersisted, 'emitter')
+        event_manager.flush()
+
+        sns_client.queue_sns_message.assert_called_once()
+        sns_client.send_sns_message.assert_not_called()
+        sns_client.flush.assert_called_once()
+
+    def test_send_event_background_publishing(self):
+        calls = MagicMock()
+        event_manager = EventManager(calls.rds_client, calls.sns_client, background_publishing=True)
+
+        future = event_manager.send_event({'id': 1}, EventType.NewProductScheduled, 'emitter')
+        event_manager.flush()
+
+        sns_client = calls.sns_client
+        self.assertIs(future, sns_client.publish_async.return_value)
+        # The event row is written before the publish starts
+        self.assertEqual([name for name, _, _ in calls.mock_calls if not name.endswith('__')][:2],
+                         ['rds_client.execute', 'sns_client.publish_async'])
+        sns_client.send_sns_message.assert_not_called()
+        sns_client.flush.assert_called_once()
+
+    def test_send_event_background_publishing_skips_publish_when_insert_fails(self):
+        rds_client, sns_client = MagicMock(), MagicMock()
+        rds_client.execute.side_effect = Exception('insert failed')
+        event_manager = EventManager(rds_client, sns_client, background_publishing=True)
+
+        with self.assertRaises(FailedToSaveEventException):
+            event_manager.send_event({'id': 1}, EventType.NewProductScheduled, 'emitter')
+        sns_client.publish_async.assert_not_called()
+
+    def test_background_publishing_disabled_by_default(self):
+        self.assertFalse(EventManager(MagicMock(), MagicMock()).background_publishing)
+
+    @patch.dict('os.environ', {'SNS_BACKGROUND_PUBLISHING': 'true'})
+    def test_background_publishing_enabled_by_environment(self):
+        self.assertTrue(EventManager(MagicMock(), MagicMock()).background_publishing)
+
+    def test_send_event_outbox_writes_pending_row_and_flush_relays_it(self):
+        rds_client, sns_client = MagicMock(), MagicMock()
+        event_manager = EventManager(rds_client, sns_client, outbox=True)
+        event_manager.outbox_relay = MagicMock()
+        event_manager.outbox_relay.publish_pending.return_value = []
+
+        with event_manager.transaction():
+            event_manager.send_event({'id': 1}, EventType.NewProductPersisted, 'emitter')
+
+        query, params = rds_client.execute.call_args.args
+        self.assertEqual(params[-1], 'Pending')
+        sns_client.send_sns_message.assert_not_called()
+        rds_client.transaction.assert_called_once()
+
+        self.assertEqual(event_manager.flush(), [])
+        event_manager.outbox_relay.publish_pending.assert_called_once_with([params[0]])
+        self.assertEqual(event_manager.flush(), [])
+        event_manager.outbox_relay.publish_pending.assert_called_once()
+
+    @patch.dict('os.environ', {'OUTBOX_RELAY_ON_FLUSH': 'false'})
+    def test_outbox_left_to_relay_worker(self):
+        event_manager = EventManager(MagicMock(), MagicMock(), outbox=True)
+        event_manager.outbox_relay = MagicMock()
+
+        event_manager.send_event({'id': 1}, EventType.NewProductPersisted, 'emitter')
+
+        self.assertEqual(event_manager.flush(), [])
+        event_manager.outbox_relay.publish_pending.assert_not_called()
+
+    def test_send_event_offloads_large_message(self):
+        rds_client, sns_client, claim_check = MagicMock(), MagicMock(), MagicMock()
+        claim_check.offload.return_value = '{"claim_check": {"key": "abc"}}'
+        event_manager = EventManager(rds_client, sns_client, claim_check=claim_check)
+
+        event_manager.send_event({'id': 1}, EventType.NewProductPersisted, 'emitter')
+
+        claim_check.offload.assert_called_once()
+        self.assertEqual(sns_client.send_sns_message.call_args.args[1], '{"claim_check": {"key": "abc"}}')
+        self.assertIn('{"claim_check": {"key": "abc"}}', rds_client.execute.call_args.args[1])
+
+    def test_persist_event_compact_format(self):
+        rds_client = MagicMock()
+        event_manager = EventManager(rds_client, MagicMock(), message_format='compact')
+
+        event_manager.send_event({'id': 1}, EventType.NewProductPersisted, 'emitter')
+
+        query, params = rds_client.execute.call_args.args
+        self.assertIn('message_data', query)
+        self.assertIsNone(params[3])
+        self.assertIsInstance(params[4], bytes)
+
+
+class TestEventManagerQueryEvents(unittest.TestCase):
+
+    def test_query_events_decodes_rows_and_returns_next_cursor(self):
+        rds_client = MagicMock()
+        message, message_data = encode_event_message('{"event_type": "NewProductPersisted", "payload": {"id": 2}}',
+                                                     EVENT_MESSAGE_FORMAT_COMPACT)
+        rds_client.execute.return_value = [
+            ('evnt_1', 'NewProductPersisted', 'emitter', '{"payload": {"id": 1}}', None, datetime(2024, 1, 1),
+             'Processed', None),
+            ('evnt_2', 'NewProductPersisted', 'emitter', message, message_data, datetime(2024, 1, 2),
+             'Processed', None),
+        ]
+        event_manager = EventManager(rds_client, MagicMock())
+
+        page = event_manager.query_events(EventQuery(event_type='NewProductPersisted', limit=2))
+
+        self.assertEqual([event['message']['payload'] for event in page.events], [{'id': 1}, {'id': 2}])
+        self.assertNotIn('message_data', page.events[0])
+        self.assertEqual(decode_cursor(page.next_cursor), (datetime(2024, 1, 2), 'evnt_2'))
+        query, params = rds_client.execute.call_args.args
+        self.assertIn('event_type = %s', query)
+        self.assertEqual(params, ['NewProductPersisted', 2])
+
+    def test_query_events_failure(self):
+        rds_client = MagicMock()
+        rds_client.execute.side_effect = Exception("connection lost")
+        event_manager = EventManager(rds_client, MagicMock())
+
+        with self.assertRaises(FailedToRetrieveEventException):
+            event_manager.query_events(EventQuery())
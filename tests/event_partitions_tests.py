@@ -0,0 +1,104 @@
+import gzip
+import os
+import unittest
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+from common.clients.blob_store import LocalBlobStore, S3BlobStore
+from common.events.event_partitions import EventPartitionManager, add_months, partition_month
+
+
+class TestEventPartitionManager(unittest.TestCase):
+
+    def setUp(self):
+        self.rds_client = MagicMock()
+        self.transaction = self.rds_client.transaction.return_value.__enter__.return_value
+        self.archive_store = MagicMock()
+        self.manager = EventPartitionManager(self.rds_client, self.archive_store, months_ahead=2,
+                                             retention_months=12, lock_timeout_ms=100)
+
+    def test_add_months(self):
+        self.assertEqual(add_months(date(2024, 11, 17), 2), date(2025, 1, 1))
+        self.assertEqual(add_months(date(2024, 1, 31), -1), date(2023, 12, 1))
+
+    def test_partition_month(self):
+        self.assertEqual(partition_month('events_p202403'), date(2024, 3, 1))
+        self.assertIsNone(partition_month('events_default'))
+
+    def test_creates_current_and_upcoming_months(self):
+        self.transaction.execute.side_effect = [None, [(False,)], None, [(True,)], None, [(True,)]]
+
+        created = self.manager.create_partitions(date(2024, 11, 17))
+
+        self.assertEqual(created, [date(2024, 12, 1), date(2025, 1, 1)])
+        months = [call.args[1][0] for call in self.transaction.execute.call_args_list[1::2]]
+        self.assertEqual(months, [date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1)])
+        self.assertEqual(self.transaction.execute.call_args_list[0].args[1], (100,))
+
+    def test_archives_expired_partitions_before_dropping_them(self):
+        def copy_out(query, sink, copy_format, header, timeout_ms):
+            sink.write(b'event_id\nevnt_1\n')
+            return 1
+
+        def put_file(key, archive):
+            archived_files[key] = gzip.decompress(archive.read())
+
+        archived_files = {}
+        self.rds_client.copy_out.side_effect = copy_out
+        self.archive_store.put_file.side_effect = put_file
+        self.transaction.execute.side_effect = [
+            [('events_default',), ('events_p202310',), ('events_p202311',), ('events_p202312',)],
+            [(0,)], None, None, None,
+            [(3,)],
+        ]
+
+        archived = self.manager.apply_retention(date(2024, 12, 5))
+
+        self.assertEqual(archived, ['events_p202310'])
+        self.assertEqual(archived_files, {'events_p202310.csv.gz': b'event_id\nevnt_1\n'})
+        self.assertEqual(self.rds_client.copy_out.call_args.kwargs['timeout_ms'], 0)
+        statements = [call.args[0] for call in self.transaction.execute.call_args_list]
+        self.assertIn('DETACH PARTITION stock_management.events_p202310', statements[3])
+        self.assertEqual(statements[4], 'DROP TABLE stock_management.events_p202310')
+        self.assertIn('events_p202311', statements[5])
+        self.assertEqual(len(statements), 6)
+
+    def test_failed_archive_keeps_partition(self):
+        self.archive_store.put_file.side_effect = IOError("unreachable")
+        self.transaction.execute.side_effect = [[('events_p202301',)], [(0,)]]
+
+        with self.assertRaises(IOError):
+            self.manager.apply_retention(date(2024, 12, 5))
+
+        self.assertEqual(self.transaction.execute.call_count, 2)
+
+    def test_keeps_every_month_without_retention(self):
+        manager = EventPartitionManager(self.rds_client)
+
+        self.assertEqual(manager.apply_retention(date(2024, 12, 5)), [])
+        self.rds_client.transaction.assert_not_called()
+
+    def test_retention_without_archive_fails(self):
+        with self.assertRaises(ValueError):
+            EventPartitionManager(self.rds_client, retention_months=12)
+
+    @patch.dict(os.environ, {'EVENTS_ARCHIVE_DIR': '/tmp/events-archive', 'EVENTS_RETENTION_MONTHS': '24',
+                             'EVENTS_PARTITION_MONTHS_AHEAD': '6'})
+    def test_from_environment(self):
+        manager = EventPartitionManager.from_environment(self.rds_client)
+
+        self.assertIsInstance(manager.archive_store, LocalBlobStore)
+        self.assertEqual((manager.retention_months, manager.months_ahead), (24, 6))
+
+    @patch.dict(os.environ, {'EVENTS_ARCHIVE_BUCKET': 'archive-bucket'})
+    @patch('common.clients.blob_store.boto3')
+    def test_from_environment_with_bucket(self, mock_boto3):
+        manager = EventPartitionManager.from_environment(self.rds_client)
+
+        self.assertIsInstance(manager.archive_store, S3BlobStore)
+        self.assertEqual(manager.archive_store.prefix, 'events-archive/')
+        self.assertIsNone(manager.retention_months)
+
+
+if __name__ == '__main__':
+    unittest.main()
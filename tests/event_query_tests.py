@@ -0,0 +1,84 @@
+import unittest
+from datetime import datetime
+
+from common.events.event_query import EventQuery, MAX_EVENT_PAGE_SIZE, decode_cursor, encode_cursor, \
+    event_from_row
+
+
+class TestEventQuery(unittest.TestCase):
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor(datetime(2024, 5, 1, 12, 30, 0, 123456), 'evnt_0abc')
+
+        self.assertEqual(decode_cursor(cursor), (datetime(2024, 5, 1, 12, 30, 0, 123456), 'evnt_0abc'))
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor')
+
+    def test_unfiltered_query(self):
+        query, params = EventQuery(limit=10).to_sql()
+
+        self.assertIn('WHERE TRUE ORDER BY created_at, event_id LIMIT %s', query)
+        self.assertEqual(params, [10])
+
+    def test_filters_and_cursor(self):
+        cursor = encode_cursor(datetime(2024, 5, 2), 'evnt_9')
+        event_query = EventQuery('NewProductPersisted', 'event-emitter-api', datetime(2024, 5, 1),
+                                 datetime(2024, 6, 1), after=cursor, limit=100)
+
+        query, params = event_query.to_sql()
+
+        self.assertIn('event_type = %s AND emitter = %s AND created_at >= %s AND created_at < %s '
+                      'AND created_at >= %s AND (created_at, event_id) > (%s, %s) ', query)
+        self.assertEqual(params, ['NewProductPersisted', 'event-emitter-api', datetime(2024, 5, 1),
+                                  datetime(2024, 6, 1), datetime(2024, 5, 2), datetime(2024, 5, 2), 'evnt_9', 100])
+
+    def test_payload_filter(self):
+        query, params = EventQuery(event_type='NewDeliveryPersisted', payload={'product_id': 'prod_1'}).to_sql()
+
+        self.assertIn("AND message -> 'payload' @> %s::jsonb ", query)
+        self.assertEqual(params, ['NewDeliveryPersisted', '{"product_id":"prod_1"}', 500])
+
+    def test_payload_from_params(self):
+        event_query = EventQuery.from_params({'payload': '{"order_positions": [{"product_id": "prod_1"}]}'})
+
+        self.assertEqual(event_query.payload, {'order_positions': [{'product_id': 'prod_1'}]})
+        for payload in ('{"product_id": ', '["prod_1"]'):
+            with self.assertRaises(ValueError):
+                EventQuery.from_params({'payload': payload})
+
+    def test_from_params(self):
+        event_query = EventQuery.from_params({'event_type': 'NewDeliveryPersisted', 'from': '2024-05-01T00:00:00',
+                                              'limit': '50'})
+
+        self.assertEqual(event_query, EventQuery(event_type='NewDeliveryPersisted',
+                                                 created_from=datetime(2024, 5, 1), limit=50))
+        self.assertEqual(EventQuery.from_params(None), EventQuery())
+
+    def test_page_size_is_bounded(self):
+        for limit in (0, MAX_EVENT_PAGE_SIZE + 1):
+            with self.assertRaises(ValueError):
+                EventQuery(limit=limit)
+        with self.assertRaises(ValueError):
+            EventQuery.from_params({'limit': 'all'})
+
+    def test_next_cursor_only_after_full_page(self):
+        row = ('evnt_2', 'NewProductPersisted', 'emitter', '{}', None, datetime(2024, 5, 2), 'Processed', None)
+        event_query = EventQuery(limit=2)
+
+        self.assertIsNone(event_query.next_cursor([row]))
+        self.assertEqual(decode_cursor(event_query.next_cursor([row, row])), (datetime(2024, 5, 2), 'evnt_2'))
+
+    def test_event_from_row(self):
+        row = ('evnt_1', 'NewProductPersisted', 'emitter', '{"a": 1}', None, datetime(2024, 5, 2), 'Processed', None)
+
+        event = event_from_row(row, lambda message, message_data: message.upper())
+
+        self.assertEqual(event['message'], '{"A": 1}')
+        self.assertEqual(set(event), {'event_id', 'event_type', 'emitter', 'message', 'created_at', 'status',
+                                      'published_at'})
+
+
+if __name__ == '__main__':
+    unittest.main()
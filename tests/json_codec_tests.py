@@ -0,0 +1,64 @@
+import unittest
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from common.utils import json_codec
+
+
+@dataclass
+class Position:
+    product_id: str
+    price: Decimal
+    delivery_date: date
+
+
+class TestJsonCodec(unittest.TestCase):
+
+    def tearDown(self):
+        json_codec.set_backend(json_codec.JSON_BACKEND_ORJSON)
+
+    def test_backends_encode_the_same(self):
+        value = {
+            "position": Position("prod_1", Decimal("25.99"), date(2024, 1, 31)),
+            "created_at": datetime(2024, 1, 1, 12, 30),
+            "id": UUID("12345678-1234-5678-1234-567812345678"),
+            1: "non string key",
+        }
+        encoded = {}
+        for backend in (json_codec.JSON_BACKEND_ORJSON, json_codec.JSON_BACKEND_STDLIB):
+            json_codec.set_backend(backend)
+            encoded[backend] = json_codec.loads(json_codec.dumps(value))
+
+        self.assertEqual(encoded[json_codec.JSON_BACKEND_ORJSON], encoded[json_codec.JSON_BACKEND_STDLIB])
+        self.assertEqual(encoded[json_codec.JSON_BACKEND_STDLIB], {
+            "position": {"product_id": "prod_1", "price": "25.99", "delivery_date": "2024-01-31"},
+            "created_at": "2024-01-01T12:30:00",
+            "id": "12345678-1234-5678-1234-567812345678",
+            "1": "non string key",
+        })
+
+    def test_decimals_keep_every_digit(self):
+        value = Decimal("12345678901234567.89")
+        for backend in (json_codec.JSON_BACKEND_ORJSON, json_codec.JSON_BACKEND_STDLIB):
+            json_codec.set_backend(backend)
+            self.assertEqual(Decimal(json_codec.loads(json_codec.dumps({"price": value}))["price"]), value)
+
+    def test_loads_accepts_bytes(self):
+        self.assertEqual(json_codec.loads(b'{"a": [1, 2]}'), {"a": [1, 2]})
+
+    def test_unknown_backend_falls_back_to_stdlib(self):
+        json_codec.set_backend('unknown')
+
+        self.assertEqual(json_codec.backend_name(), json_codec.JSON_BACKEND_STDLIB)
+
+    def test_unsupported_type(self):
+        for backend in (json_codec.JSON_BACKEND_ORJSON, json_codec.JSON_BACKEND_STDLIB):
+            json_codec.set_backend(backend)
+            with self.assertRaises(TypeError):
+                json_codec.dumps({"value": object()})
+
+
+if __name__ == '__main__':
+    unittest.main()
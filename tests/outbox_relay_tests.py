@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import MagicMock
+
+from common.clients.sns_client import PublishFailure
+from common.events.event_codec import EVENT_MESSAGE_FORMAT_COMPACT, encode_event_message
+from common.events.events import EventType
+from common.events.outbox_relay import OutboxRelay
+
+
+class TestOutboxRelay(unittest.TestCase):
+
+    def setUp(self):
+        self.rds_client = MagicMock()
+        self.transaction = self.rds_client.transaction.return_value.__enter__.return_value
+        self.sns_client = MagicMock()
+        self.sns_client.publish_entries.return_value = []
+        self.relay = OutboxRelay(self.rds_client, self.sns_client, {
+            EventType.NewProductPersisted: 'product-topic',
+            EventType.NewSupplierPersisted: 'supplier-topic',
+            EventType.NewDeliveryPersisted: None,
+        }, batch_size=3)
+
+    def _pending(self, *rows):
+        self.transaction.execute.side_effect = [list(rows)] + [1] * 3
+
+    def test_publishes_per_topic_and_marks_in_one_update(self):
+        self._pending(('evnt_1', 'NewProductPersisted', 'm1', None), ('evnt_2', 'NewSupplierPersisted', 'm2', None),
+                      ('evnt_3', 'NewProductPersisted', 'm3', None))
+
+        processed, failures = self.relay.publish_batch()
+
+        self.assertEqual((processed, failures), (3, []))
+        self.sns_client.publish_entries.assert_any_call('product-topic', [('evnt_1', 'm1'), ('evnt_3', 'm3')])
+        self.sns_client.publish_entries.assert_any_call('supplier-topic', [('evnt_2', 'm2')])
+        select, update = self.transaction.execute.call_args_list
+        self.assertIn('FOR UPDATE SKIP LOCKED', select.args[0])
+        self.assertEqual(update.args[1][0], 'Processed')
+        self.assertEqual(update.args[1][2], ['evnt_1', 'evnt_2', 'evnt_3'])
+
+    def test_retryable_failures_stay_pending_and_permanent_ones_are_marked_failed(self):
+        self._pending(('evnt_1', 'NewProductPersisted', 'm1', None), ('evnt_2', 'NewProductPersisted', 'm2', None),
+                      ('evnt_3', 'NewDeliveryPersisted', 'm3', None))
+        self.sns_client.publish_entries.return_value = [
+            PublishFailure('product-topic', 'm2', 'Throttled', 'slow down', entry_id='evnt_2')]
+
+        selected, failures = self.relay.publish_batch()
+
+        self.assertEqual(selected, 3)
+        self.assertEqual([failure.entry_id for failure in failures], ['evnt_3', 'evnt_2'])
+        _, processed_update, failed_update, deferred_update = self.transaction.execute.call_args_list
+        self.assertEqual(processed_update.args[1][0::2], ('Processed', ['evnt_1']))
+        self.assertEqual(failed_update.args[1][0::2], ('Failed', ['evnt_3']))
+        # The retryable row stays Pending but is skipped until its backoff has passed
+        self.assertIn('publish_attempts = publish_attempts + 1', deferred_update.args[0])
+        self.assertEqual(deferred_update.args[1][1:], (1, 300, ['evnt_2']))
+
+    def test_events_without_topic_are_processed_unpublished(self):
+        self._pending(('evnt_1', 'NewCustomerPersisted', 'm1', None), ('evnt_2', 'NewProductPersisted', 'm2', None))
+
+        processed, failures = self.relay.publish_batch()
+
+        self.assertEqual((processed, failures), (2, []))
+        self.sns_client.publish_entries.assert_called_once_with('product-topic', [('evnt_2', 'm2')])
+        _, update = self.transaction.execute.call_args_list
+        self.assertEqual(update.args[1][0::2], ('Processed', ['evnt_1', 'evnt_2']))
+
+    def test_publish_pending_for_given_events(self):
+        self._pending()
+
+        self.assertEqual(self.relay.publish_pending(['evnt_1', 'evnt_2']), [])
+
+        select = self.transaction.execute.call_args
+        self.assertIn('event_id = ANY(%s)', select.args[0])
+        self.assertIn('next_publish_at <= %s', select.args[0])
+        self.assertEqual(select.args[1][0], 'Pending')
+        self.assertEqual(select.args[1][2:], (['evnt_1', 'evnt_2'], 3))
+        self.sns_client.publish_entries.assert_not_called()
+
+    def test_publish_pending_drains_until_short_batch(self):
+        self.transaction.execute.side_effect = [
+            [('evnt_1', 'NewProductPersisted', 'm1', None), ('evnt_2', 'NewProductPersisted', 'm2', None),
+             ('evnt_3', 'NewProductPersisted', 'm3', None)], 3,
+            [('evnt_4', 'NewProductPersisted', 'm4', None)], 1,
+        ]
+
+        self.relay.publish_pending()
+
+        self.assertEqual(self.rds_client.transaction.call_count, 2)
+
+    def test_publish_pending_keeps_draining_after_full_batch_with_retryable_failures(self):
+        self.transaction.execute.side_effect = [
+            [('evnt_1', 'NewProductPersisted', 'm1', None), ('evnt_2', 'NewProductPersisted', 'm2', None),
+             ('evnt_3', 'NewProductPersisted', 'm3', None)], 1, 2,
+            [('evnt_4', 'NewProductPersisted', 'm4', None)], 1,
+        ]
+        self.sns_client.publish_entries.side_effect = [
+            [PublishFailure('product-topic', 'm2', 'Throttled', 'slow down', entry_id='evnt_2'),
+             PublishFailure('product-topic', 'm3', 'Throttled', 'slow down', entry_id='evnt_3')], []]
+
+        failures = self.relay.publish_pending()
+
+        self.assertEqual(len(failures), 2)
+        self.assertEqual(self.rds_client.transaction.call_count, 2)
+        self.sns_client.publish_entries.assert_called_with('product-topic', [('evnt_4', 'm4')])
+
+    def test_compact_messages_are_published_as_json(self):
+        _, message_data = encode_event_message('{"event_type":"NewProductPersisted"}', EVENT_MESSAGE_FORMAT_COMPACT)
+        self._pending(('evnt_1', 'NewProductPersisted', None, message_data))
+
+        self.relay.publish_batch()
+
+        self.sns_client.publish_entries.assert_called_once_with(
+            'product-topic', [('evnt_1', '{"event_type":"NewProductPersisted"}')])
+
+
+if __name__ == '__main__':
+    unittest.main()
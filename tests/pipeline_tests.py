@@ -0,0 +1,105 @@
+import unittest
+from unittest.mock import MagicMock
+
+from common.clients.pipeline import Pipeline
+from common.clients.rds_client import returns_rows
+
+
+def new_mock_connection():
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.mogrify.side_effect = lambda query, params: (query % params).encode()
+    return conn, cur
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_flush_sends_queued_statements_in_one_round_trip(self):
+        conn, cur = new_mock_connection()
+        pipeline = Pipeline(conn)
+
+        first = pipeline.execute("INSERT INTO inventory VALUES (%s)", (1,))
+        second = pipeline.execute("UPDATE position SET qty = qty + %s", (5,))
+        cur.execute.assert_not_called()
+        pipeline.flush()
+
+        cur.execute.assert_called_once_with(
+            b"SAVEPOINT pipeline;\nINSERT INTO inventory VALUES (1);\nUPDATE position SET qty = qty + 5;\n"
+            b"RELEASE SAVEPOINT pipeline")
+        self.assertTrue(first.succeeded)
+        self.assertTrue(second.succeeded)
+
+    def test_queue_is_flushed_when_full(self):
+        conn, cur = new_mock_connection()
+        pipeline = Pipeline(conn, max_queued=2)
+
+        pipeline.execute("INSERT INTO inventory VALUES (%s)", (1,))
+        pipeline.execute("INSERT INTO inventory VALUES (%s)", (2,))
+
+        cur.execute.assert_called_once()
+
+    def test_failed_batch_reports_errors_per_statement(self):
+        conn, cur = new_mock_connection()
+        error = Exception('duplicate key value violates unique constraint')
+
+        def execute(statement):
+            statement = statement if isinstance(statement, bytes) else statement.encode()
+            if statement.startswith(b"SAVEPOINT pipeline;") or statement == b"INSERT INTO inventory VALUES (2)":
+                raise error
+        cur.execute.side_effect = execute
+        cur.rowcount = 1
+        pipeline = Pipeline(conn, raise_on_error=False)
+
+        first = pipeline.execute("INSERT INTO inventory VALUES (%s)", (1,))
+        second = pipeline.execute("INSERT INTO inventory VALUES (%s)", (2,))
+        pipeline.flush()
+
+        self.assertTrue(first.succeeded)
+        self.assertEqual(first.rowcount, 1)
+        self.assertIs(second.error, error)
+        cur.execute.assert_any_call("ROLLBACK TO SAVEPOINT pipeline_statement")
+
+    def test_failed_statement_is_raised_by_default(self):
+        conn, cur = new_mock_connection()
+        cur.execute.side_effect = [Exception('batch failed'), None, None, None, Exception('not null violation'), None]
+        pipeline = Pipeline(conn)
+
+        pipeline.execute("INSERT INTO inventory VALUES (%s)", (1,))
+        with self.assertRaisesRegex(Exception, 'not null violation'):
+            pipeline.flush()
+
+    def test_flush_applies_statement_timeouts(self):
+        conn, cur = new_mock_connection()
+        pipeline = Pipeline(conn, timeout_ms=25000)
+
+        pipeline.execute("INSERT INTO inventory VALUES (%s)", (1,))
+        pipeline.execute("INSERT INTO inventory VALUES (%s)", (2,))
+        pipeline.execute("UPDATE position SET qty = qty + %s", (5,), timeout_ms=0)
+        pipeline.flush()
+
+        cur.execute.assert_called_once_with(
+            b"SAVEPOINT pipeline;\nSET LOCAL statement_timeout = 25000;\nINSERT INTO inventory VALUES (1);\n"
+            b"INSERT INTO inventory VALUES (2);\nSET LOCAL statement_timeout = 0;\n"
+            b"UPDATE position SET qty = qty + 5;\nRELEASE SAVEPOINT pipeline")
+
+    def test_replayed_statements_keep_their_timeout(self):
+        conn, cur = new_mock_connection()
+
+        def execute(statement):
+            if isinstance(statement, bytes) and statement.startswith(b"SAVEPOINT pipeline;"):
+                raise Exception('batch failed')
+        cur.execute.side_effect = execute
+        pipeline = Pipeline(conn, timeout_ms=100)
+
+        pipeline.execute("INSERT INTO inventory VALUES (%s)", (1,))
+        pipeline.flush()
+
+        statements = [call.args[0] for call in cur.execute.call_args_list]
+        self.assertLess(statements.index(b"SET LOCAL statement_timeout = 100"),
+                        statements.index(b"INSERT INTO inventory VALUES (1)"))
+
+    def test_statements_returning_rows_are_not_queued(self):
+        self.assertTrue(returns_rows(" select * from product"))
+        self.assertTrue(returns_rows("UPDATE position SET qty = qty + %s WHERE id = %s\nRETURNING qty"))
+        self.assertFalse(returns_rows("UPDATE position SET returning_customer = %s"))
+        self.assertFalse(returns_rows("INSERT INTO inventory VALUES (%s)"))
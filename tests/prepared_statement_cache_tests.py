@@ -0,0 +1,55 @@
+import unittest
+from unittest.mock import MagicMock, call
+
+from common.clients.prepared_statement_cache import PreparedStatementCache
+
+INSERT_QUERY = "INSERT INTO stock_management.supplier (id, name) VALUES (%s, %s)"
+
+
+def new_mock_cursor():
+    cur = MagicMock()
+    cur.connection = MagicMock()
+    return cur
+
+
+class TestPreparedStatementCache(unittest.TestCase):
+
+    def test_statement_is_prepared_once_per_connection(self):
+        cache = PreparedStatementCache()
+        cur = new_mock_cursor()
+
+        cache.execute(cur, INSERT_QUERY, ('sup_1', 'Supplier 1'))
+        cache.execute(cur, INSERT_QUERY, ('sup_2', 'Supplier 2'))
+
+        prepare_sql = cur.execute.call_args_list[0][0][0]
+        self.assertTrue(prepare_sql.startswith("PREPARE stmt_"))
+        self.assertTrue(prepare_sql.endswith("VALUES ($1, $2)"))
+        name = prepare_sql.split()[1]
+        self.assertEqual(cur.execute.call_args_list[1:], [
+            call(f"EXECUTE {name} (%s, %s)", ('sup_1', 'Supplier 1')),
+            call(f"EXECUTE {name} (%s, %s)", ('sup_2', 'Supplier 2')),
+        ])
+        self.assertEqual(cache.stats().hit_rate, 0.5)
+
+    def test_each_connection_prepares_its_own_statements(self):
+        cache = PreparedStatementCache()
+
+        cache.execute(new_mock_cursor(), INSERT_QUERY, ('sup_1', 'Supplier 1'))
+        cache.execute(new_mock_cursor(), INSERT_QUERY, ('sup_2', 'Supplier 2'))
+
+        self.assertEqual(cache.stats().misses, 2)
+
+    def test_least_recently_used_statement_is_deallocated(self):
+        cache = PreparedStatementCache(max_size=1)
+        cur = new_mock_cursor()
+
+        cache.execute(cur, "SELECT 1")
+        first_name = cur.execute.call_args_list[0][0][0].split()[1]
+        cache.execute(cur, "SELECT 2")
+
+        cur.execute.assert_any_call(f"DEALLOCATE {first_name}")
+        self.assertEqual(cache.stats().evictions, 1)
+
+    def test_named_placeholders_are_rejected(self):
+        with self.assertRaises(ValueError):
+            PreparedStatementCache().execute(new_mock_cursor(), "SELECT * FROM product WHERE id = %(id)s", {'id': 1})
@@ -0,0 +1,90 @@
+import io
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from common.clients.connection_pool import PoolStats
+from common.clients.prepared_statement_cache import PreparedStatementStats
+from common.utils.query_metrics import QueryMetrics, Histogram, fingerprint
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_literals_and_placeholders_are_normalized(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM product  WHERE id = 'prod_1'\n AND max_stock > 10"),
+            fingerprint("SELECT * FROM product WHERE id = %s AND max_stock > %s"))
+
+    def test_value_lists_are_collapsed(self):
+        self.assertEqual(fingerprint("INSERT INTO supplier (id, name) VALUES (%s, %s), (%s, %s);"),
+                         "INSERT INTO supplier (id, name) VALUES (?)")
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_percentiles(self):
+        histogram = Histogram()
+        for value in [0.5] * 98 + [40, 700]:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.percentile(50), 1)
+        self.assertEqual(histogram.percentile(99), 50)
+        self.assertEqual(histogram.percentile(100), 700)
+
+
+class TestQueryMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.metrics = QueryMetrics(namespace='Test', stream=self.stream)
+
+    def flushed_documents(self):
+        self.metrics.flush()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_flush_writes_embedded_metric_format_per_statement(self):
+        self.metrics.record("INSERT INTO supplier VALUES (%s)", 0.002, 1, 0.001)
+        self.metrics.record("INSERT INTO supplier VALUES (%s)", 0.004, 1, 0.0, Exception('duplicate key'))
+
+        documents = self.flushed_documents()
+
+        self.assertEqual(len(documents), 1)
+        document = documents[0]
+        self.assertEqual(document['_aws']['CloudWatchMetrics'][0]['Namespace'], 'Test')
+        self.assertEqual(document['_aws']['CloudWatchMetrics'][0]['Dimensions'], [['StatementId']])
+        self.assertEqual(document['Statement'], "INSERT INTO supplier VALUES (?)")
+        self.assertEqual(document['StatementCount'], 2)
+        self.assertEqual(document['StatementErrors'], 1)
+        self.assertEqual(document['StatementRows'], 2)
+        self.assertEqual(document['ErrorClasses'], {'Exception': 1})
+        self.assertEqual(document['StatementDurationMax'], 4)
+
+    def test_flush_resets_statement_metrics(self):
+        self.metrics.record("SELECT 1", 0.001, [(1,)])
+        self.metrics.flush()
+
+        self.assertEqual(self.metrics.flush(), [])
+
+    def test_flush_reports_registered_pool_as_deltas(self):
+        rds_client = MagicMock()
+        rds_client.pool_stats.side_effect = [
+            PoolStats(2, 1, 1, 10, 4, 1, 0, 0.004, 0.003),
+            PoolStats(2, 2, 0, 10, 6, 1, 0, 0.006, 0.003),
+        ]
+        rds_client.prepared_statement_stats.return_value = PreparedStatementStats(3, 1, 0)
+        rds_client.statement_timeout_count = 2
+        self.metrics.register_client('RdsClient', rds_client)
+
+        first = self.metrics.flush()[0]
+        rds_client.statement_timeout_count = 3
+        second = self.metrics.flush()[0]
+
+        self.assertEqual(first['Pool'], 'RdsClient')
+        self.assertEqual(first['PoolBorrows'], 4)
+        self.assertEqual(first['PoolExhausted'], 1)
+        self.assertEqual(first['PreparedStatementHitRate'], 75)
+        self.assertEqual(second['PoolBorrows'], 2)
+        self.assertEqual(second['PoolExhausted'], 0)
+        self.assertAlmostEqual(second['PoolWaitAvg'], 1)
+        self.assertEqual(first['StatementTimeouts'], 2)
+        self.assertEqual(second['StatementTimeouts'], 1)
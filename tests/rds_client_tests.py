@@ -1,8 +1,10 @@
+import io
 import os
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, call
 
 from common.clients.rds_client import RdsClient
+from common.exceptions.statement_timeout_exception import StatementTimeoutException
 
 
 @patch.dict(os.environ, {
@@ -63,3 +65,185 @@ class TestRdsClient(unittest.TestCase):
         mock_cursor.execute.assert_called_once_with('SELECT * FROM table')
         mock_logging.error.assert_called_once_with('Query execution failed: Query execution failed')
         self.assertIsNone(result)
+
+
+@patch.dict(os.environ, {
+    'DB_HOST': 'localhost',
+    'DB_NAME': 'test_db'
+})
+class TestRdsClientBatching(unittest.TestCase):
+
+    @patch('common.clients.connection_pool.ConnectionPool')
+    def setUp(self, mock_pool_class):
+        self.mock_pool = mock_pool_class.return_value
+        self.mock_conn = MagicMock()
+        self.mock_cur = MagicMock()
+        self.mock_pool.getconn.return_value = self.mock_conn
+        self.mock_conn.cursor.return_value.__enter__.return_value = self.mock_cur
+        self.client = RdsClient(secret_provider=MagicMock())
+
+    @patch('psycopg2.extras.execute_values')
+    def test_execute_values_sends_pages(self, mock_execute_values):
+        self.mock_cur.rowcount = 2
+        rows = [(1,), (2,), (3,), (4,), (5,)]
+
+        result = self.client.execute_values("INSERT INTO table (id) VALUES %s", iter(rows), page_size=2)
+
+        self.assertEqual(mock_execute_values.call_count, 3)
+        self.assertEqual(mock_execute_values.call_args_list[0][0][2], [(1,), (2,)])
+        self.assertEqual(mock_execute_values.call_args_list[2][0][2], [(5,)])
+        self.assertEqual(result, 6)
+        self.mock_conn.commit.assert_called_once()
+        self.mock_pool.putconn.assert_called_once_with(self.mock_conn)
+
+    @patch('psycopg2.extras.execute_values')
+    def test_execute_values_rolls_back_on_failure(self, mock_execute_values):
+        mock_execute_values.side_effect = Exception('duplicate key')
+        self.mock_conn.closed = 0
+
+        with self.assertRaises(Exception):
+            self.client.execute_values("INSERT INTO table (id) VALUES %s", [(1,)])
+
+        self.mock_conn.rollback.assert_called_once()
+        self.mock_conn.commit.assert_not_called()
+        self.mock_pool.putconn.assert_called_once_with(self.mock_conn)
+
+    def test_copy_in_streams_rows_and_commits(self):
+        cur = self.mock_cur
+        cur.rowcount = 2
+
+        with patch('psycopg2.sql.Composed.as_string', return_value='COPY'):
+            result = self.client.copy_in('stock_management.products', ['id', 'name'], [(1, 'a'), (2, None)])
+
+        statement, stream = cur.copy_expert.call_args.args
+        self.assertEqual(result, 2)
+        self.assertEqual(stream.read(1024), b'"1","a"\n"2",\n')
+        self.assertIn("FORMAT csv", repr(statement))
+        self.mock_conn.commit.assert_called_once()
+        self.mock_pool.putconn.assert_called_once_with(self.mock_conn)
+
+    def test_copy_out_writes_to_sink(self):
+        cur = self.mock_cur
+        cur.rowcount = 1
+        cur.copy_expert.side_effect = lambda query, file, size: file.write(b'1,"a"\n')
+        sink = io.BytesIO()
+
+        result = self.client.copy_out("SELECT id, name FROM products", sink, header=True)
+
+        self.assertEqual(result, 1)
+        self.assertEqual(sink.getvalue(), b'1,"a"\n')
+        self.assertEqual(cur.copy_expert.call_args.args[0],
+                         "COPY (SELECT id, name FROM products) TO STDOUT WITH (FORMAT csv, HEADER true)")
+        self.mock_conn.commit.assert_not_called()
+
+    def test_copy_out_applies_statement_timeout(self):
+        self.client.statement_timeout_ms = 3000
+        self.client.copy_out("SELECT id FROM products", io.BytesIO())
+        self.client.copy_out("SELECT id FROM products", io.BytesIO(), timeout_ms=0)
+
+        self.mock_cur.execute.assert_has_calls([call("SET LOCAL statement_timeout = 3000; "),
+                                                call("SET LOCAL statement_timeout = 0; ")])
+
+    def test_execute_applies_statement_timeout_in_same_round_trip(self):
+        self.client.statement_timeout_ms = 3000
+        self.client.execute("SELECT * FROM table WHERE id = %s", (1,))
+        self.client.execute("SELECT * FROM table", timeout_ms=0)
+
+        self.assertEqual(self.mock_cur.execute.call_args_list[0].args,
+                         ("SET LOCAL statement_timeout = 3000; SELECT * FROM table WHERE id = %s", (1,)))
+        self.assertEqual(self.mock_cur.execute.call_args_list[1].args,
+                         ("SET LOCAL statement_timeout = 0; SELECT * FROM table",))
+
+    def test_execute_statement_timeout(self):
+        self.mock_conn.closed = 0
+        cancelled = Exception("canceling statement due to statement timeout")
+        cancelled.pgcode = '57014'
+        self.mock_cur.execute.side_effect = cancelled
+
+        with self.assertRaises(StatementTimeoutException) as context:
+            self.client.execute("SELECT pg_sleep(60)", timeout_ms=100)
+
+        self.assertIs(context.exception.__cause__, cancelled)
+        self.assertEqual(self.client.statement_timeout_count, 1)
+        self.mock_conn.rollback.assert_called_once()
+        self.mock_pool.putconn.assert_called_once_with(self.mock_conn)
+
+
+@patch.dict(os.environ, {
+    'DB_HOST': 'localhost',
+    'DB_NAME': 'test_db'
+})
+class TestRdsClientTransaction(unittest.TestCase):
+
+    @patch('common.clients.connection_pool.ConnectionPool')
+    def setUp(self, mock_pool_class):
+        self.mock_pool = mock_pool_class.return_value
+        self.mock_conn = MagicMock()
+        self.mock_conn.closed = 0
+        self.mock_pool.getconn.return_value = self.mock_conn
+        self.client = RdsClient(secret_provider=MagicMock())
+
+    def test_transaction_pins_one_connection_and_commits_once(self):
+        with self.client.transaction() as tx:
+            self.client.execute("INSERT INTO table VALUES (1)")
+            tx.execute("INSERT INTO table VALUES (2)")
+            with self.client.transaction():
+                self.client.execute("UPDATE table SET value = 3")
+
+        self.mock_pool.getconn.assert_called_once()
+        self.mock_pool.putconn.assert_called_once_with(self.mock_conn)
+        self.mock_conn.commit.assert_called_once()
+        self.assertIsNone(self.client.active_transaction())
+
+    def test_transaction_rolls_back_on_error(self):
+        with self.assertRaises(Exception):
+            with self.client.transaction():
+                self.client.execute("INSERT INTO table VALUES (1)")
+                raise Exception('Domain validation failed')
+
+        self.mock_conn.commit.assert_not_called()
+        self.mock_conn.rollback.assert_called_once()
+        self.mock_pool.putconn.assert_called_once_with(self.mock_conn)
+
+
+@patch.dict(os.environ, {
+    'DB_HOST': 'localhost',
+    'DB_NAME': 'test_db'
+})
+class TestRdsClientReplicaRouting(unittest.TestCase):
+
+    @patch('common.clients.connection_pool.ConnectionPool')
+    def setUp(self, mock_pool_class):
+        self.primary, self.replica = MagicMock(), MagicMock()
+        mock_pool_class.side_effect = [self.primary, self.replica]
+        self.replica_conn = self.replica.getconn.return_value
+        self.replica_conn.cursor.return_value.__enter__.return_value.fetchone.return_value = (0,)
+        with patch.dict(os.environ, {'DB_REPLICA_HOSTS': 'replica-1:5433'}):
+            self.client = RdsClient(secret_provider=MagicMock())
+        self.replica_connection_factory = mock_pool_class.call_args_list[1].kwargs['connection_factory']
+
+    def test_replica_pool_connects_to_replica_endpoint(self):
+        self.assertEqual(self.replica_connection_factory.args, ('replica-1', '5433'))
+
+    def test_select_goes_to_replica(self):
+        self.client.execute("SELECT * FROM table")
+
+        self.primary.getconn.assert_not_called()
+        self.replica.putconn.assert_called_with(self.replica_conn)
+
+    def test_writes_and_transactions_go_to_primary(self):
+        self.client.execute("INSERT INTO table VALUES (1)")
+        with self.client.transaction():
+            self.client.execute("SELECT * FROM table")
+
+        self.assertEqual(self.primary.getconn.call_count, 2)
+        self.replica.getconn.assert_not_called()
+
+    def test_select_falls_back_to_primary_when_replica_lags(self):
+        self.replica_conn.cursor.return_value.__enter__.return_value.fetchone.return_value = (120.0,)
+
+        self.client.execute("SELECT * FROM table")
+
+        self.primary.getconn.assert_called_once()
+        self.assertEqual(self.client.replica_stats()[0]['lag_seconds'], 120.0)
+
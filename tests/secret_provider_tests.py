@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from common.clients.secret_provider import SecretProvider
+
+SECRET_STRING = json.dumps({"username": "dbmaster", "password": "secret"})
+
+
+class TestSecretProvider(unittest.TestCase):
+
+    def setUp(self):
+        self.secrets_manager_client = MagicMock()
+        self.secrets_manager_client.get_secret_value.return_value = {'SecretString': SECRET_STRING}
+
+    def test_secret_is_cached_within_ttl(self):
+        provider = SecretProvider('db-secret', ttl_seconds=60, secrets_manager_client=self.secrets_manager_client)
+
+        provider.get_secret_string()
+        result = provider.get_secret_dict()
+
+        self.assertEqual(result['username'], 'dbmaster')
+        self.secrets_manager_client.get_secret_value.assert_called_once_with(SecretId='db-secret')
+
+    def test_expired_secret_is_fetched_again(self):
+        provider = SecretProvider('db-secret', ttl_seconds=0, refresh_ahead_seconds=0,
+                                  secrets_manager_client=self.secrets_manager_client)
+
+        provider.get_secret_string()
+        provider.get_secret_string()
+
+        self.assertEqual(self.secrets_manager_client.get_secret_value.call_count, 2)
+
+    def test_secret_is_refreshed_in_background_before_expiry(self):
+        provider = SecretProvider('db-secret', ttl_seconds=60, refresh_ahead_seconds=60,
+                                  secrets_manager_client=self.secrets_manager_client)
+
+        provider.get_secret_string()
+        self.assertEqual(provider.get_secret_string(), SECRET_STRING)
+
+        for _ in range(100):
+            if self.secrets_manager_client.get_secret_value.call_count == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.secrets_manager_client.get_secret_value.call_count, 2)
+
+    def test_cache_file_is_shared_between_providers(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            SecretProvider('db/secret', ttl_seconds=60, cache_dir=cache_dir,
+                           secrets_manager_client=self.secrets_manager_client).get_secret_string()
+            other_client = MagicMock()
+
+            result = SecretProvider('db/secret', ttl_seconds=60, cache_dir=cache_dir,
+                                    secrets_manager_client=other_client).get_secret_string()
+
+            self.assertEqual(result, SECRET_STRING)
+            other_client.get_secret_value.assert_not_called()
+            self.assertEqual(os.listdir(cache_dir), ['secret-db_secret.json'])
+
+    def test_with_credentials_retries_once_on_auth_failure(self):
+        provider = SecretProvider('db-secret', ttl_seconds=60, secrets_manager_client=self.secrets_manager_client)
+        operation = MagicMock(side_effect=[Exception('FATAL: password authentication failed for user'), 'conn'])
+
+        result = provider.with_credentials(operation)
+
+        self.assertEqual(result, 'conn')
+        self.assertEqual(self.secrets_manager_client.get_secret_value.call_count, 2)
+
+    def test_with_credentials_does_not_retry_other_errors(self):
+        provider = SecretProvider('db-secret', ttl_seconds=60, secrets_manager_client=self.secrets_manager_client)
+        operation = MagicMock(side_effect=Exception('could not connect to server'))
+
+        with self.assertRaises(Exception):
+            provider.with_credentials(operation)
+
+        operation.assert_called_once()
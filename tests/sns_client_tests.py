@@ -0,0 +1,133 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from common.api_responses import FAILED_TO_PUBLISH_TO_SNS_RESPONSE
+from common.clients.sns_client import SnsClient, PublishFailure, MAX_SNS_BATCH_BYTES
+
+
+class TestSnsClient(unittest.TestCase):
+
+    def setUp(self):
+        self.boto_client = MagicMock()
+        self.boto_client.publish_batch.return_value = {'Successful': [], 'Failed': []}
+        self.sns_client = SnsClient(self.boto_client, max_batch_age_seconds=60)
+
+    def test_send_sns_message(self):
+        self.sns_client.send_sns_message('topic', 'message')
+        self.boto_client.publish.assert_called_once_with(TopicArn='topic', Message='message')
+
+    def test_send_sns_message_failure(self):
+        self.boto_client.publish.side_effect = Exception('throttled')
+        self.assertEqual(self.sns_client.send_sns_message('topic', 'message'), FAILED_TO_PUBLISH_TO_SNS_RESPONSE)
+
+    def test_queue_sends_full_batch_per_topic(self):
+        for i in range(12):
+            self.sns_client.queue_sns_message('topic-a', f'a{i}')
+        self.sns_client.queue_sns_message('topic-b', 'b0')
+
+        self.boto_client.publish_batch.assert_called_once()
+        entries = self.boto_client.publish_batch.call_args.kwargs['PublishBatchRequestEntries']
+        self.assertEqual([entry['Message'] for entry in entries], [f'a{i}' for i in range(10)])
+        self.assertEqual(len({entry['Id'] for entry in entries}), 10)
+
+        self.assertEqual(self.sns_client.flush(), [])
+        flushed = {call.kwargs['TopicArn']: [entry['Message'] for entry in call.kwargs['PublishBatchRequestEntries']]
+                   for call in self.boto_client.publish_batch.call_args_list[1:]}
+        self.assertEqual(flushed, {'topic-a': ['a10', 'a11'], 'topic-b': ['b0']})
+        self.assertEqual(self.sns_client.flush(), [])
+        self.assertEqual(self.boto_client.publish_batch.call_count, 3)
+
+    @patch('common.clients.sns_client.time.monotonic')
+    def test_queue_flushes_everything_once_oldest_message_is_too_old(self, mock_monotonic):
+        self.sns_client.max_batch_age_seconds = 1
+        mock_monotonic.return_value = 100.0
+        self.sns_client.queue_sns_message('topic-a', 'a0')
+        mock_monotonic.return_value = 100.5
+        self.sns_client.queue_sns_message('topic-b', 'b0')
+        self.boto_client.publish_batch.assert_not_called()
+
+        mock_monotonic.return_value = 101.0
+        self.sns_client.queue_sns_message('topic-b', 'b1')
+        self.assertEqual(self.boto_client.publish_batch.call_count, 2)
+
+    def test_batches_respect_payload_size_limit(self):
+        message = 'x' * (MAX_SNS_BATCH_BYTES // 2)
+        for _ in range(3):
+            self.sns_client.queue_sns_message('topic', message)
+        self.sns_client.flush()
+
+        sizes = [len(call.kwargs['PublishBatchRequestEntries']) for call in self.boto_client.publish_batch.call_args_list]
+        self.assertEqual(sizes, [2, 1])
+
+    def test_flush_reports_failed_entries(self):
+        self.boto_client.publish_batch.return_value = {
+            'Successful': [{'Id': '0', 'MessageId': 'm-0'}],
+            'Failed': [{'Id': '1', 'Code': 'InternalError', 'Message': 'try again', 'SenderFault': False}]
+        }
+        self.sns_client.queue_sns_message('topic', 'ok')
+        self.sns_client.queue_sns_message('topic', 'lost')
+
+        self.assertEqual(self.sns_client.flush(), [PublishFailure('topic', 'lost', 'InternalError', 'try again', entry_id='1')])
+
+    def test_publish_entries_reports_failures_by_entry_id(self):
+        self.boto_client.publish_batch.side_effect = [
+            {'Failed': [{'Id': 'evnt_2', 'Code': 'InvalidParameter', 'Message': 'bad', 'SenderFault': True}]},
+            {'Successful': [{'Id': 'evnt_10'}, {'Id': 'evnt_11'}]},
+        ]
+
+        failures = self.sns_client.publish_entries('topic', [(f'evnt_{i}', 'same message') for i in range(12)])
+
+        self.assertEqual(self.boto_client.publish_batch.call_count, 2)
+        self.assertEqual(failures, [PublishFailure('topic', 'same message', 'InvalidParameter', 'bad', True,
+                                                   entry_id='evnt_2')])
+
+    def test_flush_reports_every_entry_when_call_fails(self):
+        self.boto_client.publish_batch.side_effect = Exception('throttled')
+        self.sns_client.queue_sns_message('topic', 'first')
+        self.sns_client.queue_sns_message('topic', 'second')
+
+        failures = self.sns_client.flush()
+
+        self.assertEqual([failure.message for failure in failures], ['first', 'second'])
+        self.assertEqual(failures[0].code, 'Exception')
+
+
+    def test_publish_async_returns_future_and_drain_waits(self):
+        self.boto_client.publish.return_value = {'MessageId': 'm-1'}
+
+        future = self.sns_client.publish_async('topic', 'message')
+
+        self.assertEqual(self.sns_client.drain(), [])
+        self.assertEqual(future.result(), 'm-1')
+        self.boto_client.publish.assert_called_once_with(TopicArn='topic', Message='message')
+
+    def test_drain_reports_failed_and_unfinished_publishes(self):
+        release = threading.Event()
+
+        def publish(TopicArn, Message):
+            if Message == 'slow':
+                release.wait(5)
+            if Message == 'broken':
+                raise Exception('throttled')
+            return {'MessageId': Message}
+
+        self.boto_client.publish.side_effect = publish
+        self.sns_client.publish_async('topic', 'broken')
+        self.sns_client.publish_async('topic', 'slow')
+
+        failures = self.sns_client.drain(timeout=0.2)
+        release.set()
+
+        self.assertEqual([(failure.message, failure.code) for failure in failures],
+                         [('broken', 'Exception'), ('slow', 'Timeout')])
+        self.assertEqual(self.sns_client.drain(), [])
+
+    def test_flush_drains_background_publishes(self):
+        self.boto_client.publish.side_effect = Exception('throttled')
+        self.sns_client.publish_async('topic', 'message')
+
+        self.assertEqual([failure.message for failure in self.sns_client.flush()], ['message'])
+
+if __name__ == '__main__':
+    unittest.main()
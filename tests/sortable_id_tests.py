@@ -0,0 +1,71 @@
+import threading
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from common.utils import sortable_id
+from common.utils.sortable_id import ID_LENGTH, SortableIdGenerator, id_timestamp, new_id, new_ids
+
+
+class TestSortableId(unittest.TestCase):
+
+    def setUp(self):
+        self.generator = SortableIdGenerator()
+
+    def test_id_keeps_prefix_and_fits_key_columns(self):
+        identifier = new_id("evnt_")
+
+        self.assertTrue(identifier.startswith("evnt_"))
+        self.assertEqual(len(identifier), len("evnt_") + ID_LENGTH)
+        self.assertLessEqual(len(identifier), 20)
+
+    def test_ids_are_strictly_increasing(self):
+        ids = [self.generator.new_id("po_") for _ in range(10000)]
+
+        self.assertEqual(ids, sorted(set(ids)))
+
+    def test_batch_ids_are_consecutive(self):
+        ids = new_ids("op_", 50)
+
+        self.assertEqual(len(ids), 50)
+        self.assertEqual(ids, sorted(set(ids)))
+
+    def test_unique_across_threads(self):
+        ids = []
+
+        def generate():
+            ids.extend(self.generator.new_ids("prod_", 2000))
+
+        threads = [threading.Thread(target=generate) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(ids)), 8000)
+
+    def test_clock_going_backwards_keeps_order(self):
+        with patch.object(sortable_id.time, 'time_ns', side_effect=[2_000_000_000, 1_000_000_000]):
+            first, second = self.generator.new_id(), self.generator.new_id()
+
+        self.assertLess(first, second)
+        self.assertEqual(id_timestamp(first), id_timestamp(second))
+
+    def test_random_part_overflow_moves_to_next_millisecond(self):
+        self.generator._last_ms = 2_000
+        self.generator._last_random = sortable_id._RANDOM_LIMIT - 1
+        with patch.object(sortable_id.time, 'time_ns', return_value=2_000_000_000):
+            identifier = self.generator.new_id()
+
+        self.assertEqual(self.generator._last_ms, 2_001)
+        self.assertEqual(id_timestamp(identifier), datetime.fromtimestamp(2.001, tz=timezone.utc))
+
+    def test_id_timestamp(self):
+        with patch.object(sortable_id.time, 'time_ns', return_value=1_700_000_000_123_000_000):
+            identifier = self.generator.new_id("sup_")
+
+        self.assertEqual(id_timestamp(identifier), datetime.fromtimestamp(1_700_000_000.123, tz=timezone.utc))
+
+
+if __name__ == '__main__':
+    unittest.main()